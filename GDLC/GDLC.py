@@ -34,6 +34,16 @@ Usage:
         - debug module. See `debug/debug.py` for details. 
         - query module. Sets up elements involving interaction with the user. See `query/query.py` for details. 
         - future module. Future developments and work in progress. See `future/future.py` for details.
+        - cache module. On-disk cache of formatted entries. See `cache/cache.py` for details.
+        - index module. Headword index of the output files. See `index/index.py` for details.
+        - bench module. Benchmarks of the main functions. See `bench/bench.py` for details.
+        - timers module. Opt-in timers for the stages of a build. See `timers/timers.py` for details.
+        - progress module. Progress display of a run, across worker processes. See `progress/progress.py` for details.
+        - shard module. Output files of a chosen size, listed in content.opf. See `shard/shard.py` for details.
+        - inflect module. Feminine and plural forms of the headwords. See `inflect/inflect.py` for details.
+        - chunk module. A large file split into chunks of entries, formatted on several cores. See `chunk/chunk.py` for details.
+        - memory module. Memory ceiling and peak memory of a run. See `memory/memory.py` for details.
+        - mobi module. Text of a Kindle book, read from the azw file without unpacking it, and Kindle dictionary, written without KindleGen. See `mobi/mobi.py` for details.
     There is no proper documentation for this project. Limited information may be found in the `docs` directory and inside function docstrings. As the project evolves, some information may have become obsolete, beware. 
 
 Args:
@@ -74,18 +84,25 @@ Created 3 May 2020
 
 @author: patricktoche
 """
+__version__ = '0.0.1'
+
 import sys
 import os
 from pathlib import Path, PosixPath
 import io
 import re
+import json
+import hashlib
+import gc
+import string
+import functools
 from shutil import copy2  # shutil.copy2 copies metadata+permissions
+from concurrent.futures import ProcessPoolExecutor, wait
 
-from bs4 import BeautifulSoup, Tag, NavigableString, Comment, PageElement, ProcessingInstruction
+from bs4 import BeautifulSoup, Tag, NavigableString, Comment, CData, PageElement, ProcessingInstruction
 from typing import List, Set, Tuple, Dict, Iterable, Union, Any
 
 from pprint import pprint
-import progressbar  # !!  progressbar2 under the hood
 
 import logging
 import traceback
@@ -268,6 +285,134 @@ def destroy_tags(soup:BeautifulSoup, *args:str) -> BeautifulSoup:
     return soup
 
 
+class Entry:
+    """
+    A formatted dictionary entry, or a protected tag, as yielded by `iter_dictionary()`.
+
+    Args:
+        n (int): ordinal of the entry among the children of <body>, starting at 1
+        markup (str): the formatted <idx:entry>, or the protected tag as is
+        source (str, optional): name of the source file
+        protected (bool, optional): True for a protected tag, e.g. a heading
+    Notes:
+        `__slots__` keeps each record small. The label, the short and long forms of the headword and the definition are read from the markup when first requested, with `index.get_entry_fields()`, so writers that only need the markup do not pay for them.
+    """
+    __slots__ = ('n', 'markup', 'source', 'protected', 'fields')
+
+    def __init__(self, n, markup, source=None, protected=False):
+        self.n = n
+        self.markup = markup
+        self.source = source
+        self.protected = protected
+        self.fields = None
+
+    def __str__(self):
+        return self.markup
+
+    def __repr__(self):
+        return 'Entry(' + repr(self.n) + ', ' + repr(self.headword if not self.protected else self.markup[:40]) + ')'
+
+    def get_fields(self) -> dict:
+        """Return the headword, label, short and long forms and definition, read from the markup once. Empty for a protected tag."""
+        if self.fields is None:
+            if self.protected:
+                self.fields = {'headword': '', 'label': '', 'short': '', 'long': '', 'definition': ''}
+            else:
+                from GDLC.index.index import get_entry_fields
+                self.fields = get_entry_fields(self.markup)
+        return self.fields
+
+    @property
+    def headword(self) -> str:
+        return self.get_fields()['headword']
+
+    @property
+    def label(self) -> str:
+        return self.get_fields()['label']
+
+    @property
+    def short(self) -> str:
+        return self.get_fields()['short']
+
+    @property
+    def long(self) -> str:
+        return self.get_fields()['long']
+
+    @property
+    def definition(self) -> str:
+        return self.get_fields()['definition']
+
+
+def escape_attr(value: str) -> str:
+    """Quote an attribute value with the BeautifulSoup 'minimal' formatter."""
+    value = escape_text(value)
+    if '"' in value:
+        if "'" in value:
+            return '"' + value.replace('"', '&quot;') + '"'
+        return "'" + value + "'"
+    return '"' + value + '"'
+
+
+def escape_text(text: str) -> str:
+    """Escape &, <, > in a string with the BeautifulSoup 'minimal' formatter."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+# the characters escaped in the values of a `Template`:
+XML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+
+
+def escape_xml(value: str) -> str:
+    """Escape &, <, > and double quotes in a string, in a single pass, for use in text or in a double-quoted attribute."""
+    return value.translate(XML_ESCAPES)
+
+
+def extract_element(element, strip=False):
+    """
+    Remove an lxml element from its tree, keeping the text that follows it. 
+    Counterpart of the patched BeautifulSoup `.extract()` method, used by the 'lxml-stream' engine. 
+    With `strip=True`, blank strings next to the element are removed exactly as `extract(strip=True)` does.
+
+    Args:
+        element (lxml.etree._Element): element to be removed
+        strip (bool): if True, suppress blank strings around the element
+    Returns:
+        element (lxml.etree._Element): the element, no longer part of the tree
+    Modules: 
+        lxml (etree)
+    """
+    parent = element.getparent()
+    if parent is None:
+        return element
+    # list the parent contents the way BeautifulSoup sees them, strings and tags:
+    contents = [parent.text] if parent.text else []
+    for child in parent:
+        contents.append(child)
+        if child.tail:
+            contents.append(child.tail)
+    index = next(i for i, item in enumerate(contents) if item is element)
+    del contents[index]
+    if strip:
+        try:
+            for i in range(index-1, index+1):
+                if isinstance(contents[i], str) and contents[i].strip() == '':
+                    del contents[i]
+        except IndexError: 
+            pass
+    element.tail = None
+    parent.remove(element)
+    # write the remaining strings back into text and tails:
+    parent.text, last = None, None
+    for item in contents:
+        if not isinstance(item, str):
+            item.tail, last = None, item
+        elif last is None:
+            parent.text = (parent.text or '') + item
+        else:
+            last.tail = (last.tail or '') + item
+    return element
+
+
 # PATCH for BeautifulSoup extract() method
 # import PageElement if it has not been imported already
 if 'PageElement' not in sys.modules:
@@ -296,10 +441,12 @@ def extract_patched(self, _self_index=None, strip=False):
         # ! PATCH STARTS HERE !
         # remove empty line introduced by extract():
         # check that nearby parent.contents is really empty before deleting
+        # only strings can be blank, do not serialize neighbouring tags:
         if strip:
             try:
                 for i in range(_self_index-1, _self_index+1):
-                    if str(self.parent.contents[i]).strip() == '':
+                    item = self.parent.contents[i]
+                    if isinstance(item, NavigableString) and item.strip() == '':
                         del self.parent.contents[i]
             except: 
                 pass
@@ -405,18 +552,46 @@ def get_body_from_soup(soup:BeautifulSoup):
     Also tries to suppress excess blank lines. 
 
     Args: 
-        soup (BeautifulSoup): markup language as BeautifulSoup object
+        soup (BeautifulSoup, Tag): markup language as BeautifulSoup object. A Tag outside of any <body> is its own body.
     Returns: 
         body (str): <body> of the page
     Modules: 
-        bs4 (BeautifulSoup), re
+        bs4 (BeautifulSoup)
+    Functions: 
+        `normalize_definition()`, see `Normalizer`
+    Notes:
+        An <xml> header inserted by the parser is removed as well.
     """
-    body = soup.find('body')
+    body = soup if soup.name == 'body' else soup.find('body')
+    if body is None:
+        body = [soup]
     body = ''.join(['%s' % x for x in body])
-    body = re.sub(r'\n+', '\n', body).strip()  # .strip() removes leading/trailing blankspaces/newlines
+    # remove excess blank lines and leading/trailing blankspaces/newlines, in one pass:
+    body = normalize_definition(body)
     return body
 
 
+# the modules where the entries are transformed, relative to the package directory, in a fixed order:
+TRANSFORM_MODULES = ('GDLC.py', 'inflect/inflect.py')
+
+
+@functools.lru_cache(maxsize=1)
+def get_code_fingerprint() -> str:
+    """
+    Digest of the source of the modules where the entries are transformed, the `TRANSFORM_MODULES` of this package.
+
+    Returns:
+        digest (str): hexadecimal digest, computed on the first call only
+    Modules:
+        pathlib (Path)
+    Functions:
+        `get_files_hash()`
+    Notes:
+        Part of the keys of the entry cache and of the records of the build manifest, so that both are invalidated together by any change to `split_entry()`, `make_label()`, `make_headword()`, `make_definition()`, the normalizers or the templates in this module, or to the inflection rules of `inflect/inflect.py`, even when `__version__` is not bumped.
+    """
+    return get_files_hash([Path(__file__).parent / name for name in TRANSFORM_MODULES])
+
+
 def get_content(soup:BeautifulSoup, tag: str=None): # -> dictionary
     """
     Make a dictionary of some relevant information stored in selected tags.
@@ -474,6 +649,45 @@ def get_duplicate_id(dml):
     return id_duplicate
 
 
+def get_file_hash(file, algorithm='sha256') -> str:
+    """
+    Digest of the content of a file, read in chunks. 
+
+    Args:
+        file (str): path to file
+        algorithm (str): any algorithm known to hashlib, defaults to 'sha256'
+    Returns:
+        digest (str): hexadecimal digest
+    Modules: 
+        hashlib
+    """
+    h = hashlib.new(algorithm)
+    with open(file, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_files_hash(files, algorithm='sha256') -> str:
+    """
+    Digest of the contents of several files, in order.
+
+    Args:
+        files ([str]): paths to files
+        algorithm (str): any algorithm known to hashlib, defaults to 'sha256'
+    Returns:
+        digest (str): hexadecimal digest of the digests of the files
+    Modules: 
+        hashlib
+    Functions:
+        `get_file_hash()`
+    """
+    h = hashlib.new(algorithm)
+    for file in files:
+        h.update(get_file_hash(file, algorithm).encode('ascii'))
+    return h.hexdigest()
+
+
 def get_function_name():
     """
     Return the name of the caller (function or method). 
@@ -548,6 +762,12 @@ def get_headword(tag):
     return [short, long]
 
 
+def get_label(tag) -> str:
+    """Return the label of a dictionary entry: the letters of the first part of the entry, e.g. 'ABC' for '-&gt;ABC<sup>1</sup>'. The first part is a BeautifulSoup Tag, or an lxml element with the 'lxml-stream' engine, so both engines share the same label."""
+    text = tag.get_text() if isinstance(tag, PageElement) else get_text_from_element(tag)
+    return ''.join(re.findall(r'[^\W\d_]', text))
+
+
 def get_html_attrs(dml, features='lxml'):
     """
     Wrapper for document markup language.
@@ -579,6 +799,111 @@ def get_html_attrs_from_soup(soup:BeautifulSoup):
     return attr
 
 
+def get_id_from_file(file, encoding='utf8') -> list:
+    """
+    List the id attributes of a file, in order, without parsing it.
+
+    Args:
+        file (str): path to an xhtml file
+    Returns:
+        ids ([str]): values of the id attributes found inside tags
+    Modules: 
+        re
+    Notes:
+        Text such as `id="d12345"` outside of a tag is ignored.
+    """
+    with open(file, encoding=encoding) as f:
+        dml = f.read()
+    # id attributes inside an opening tag:
+    ids = re.findall(r'<[^>!?/][^>]*?\sid\s*=\s*["\']([^"\']*)["\']', dml)
+    return ids
+
+
+def get_id_index(files, workers=None) -> tuple:
+    """
+    Build an index of the ids defined across several files, e.g. all `Text/*.xhtml` files of the dictionary.
+
+    Args:
+        files ([str]): paths to the files to be scanned
+        workers (int, optional): number of worker processes. Defaults to None, files are then scanned one at a time.
+    Returns:
+        index ({str:[str]}): for each id, the names of the files that contain it
+        collisions ({str:[str]}): the ids found in more than one file, with the names of those files
+    Modules: 
+        pathlib (Path), concurrent.futures (ProcessPoolExecutor)
+    Functions: 
+        `get_id_from_file()`
+    Notes:
+        The index may be passed to `strip_anchor(soup, ids=index)` to resolve cross-file anchors. Ids repeated inside one file are reported by `get_sorted_id()`.
+        Collisions must be resolved before the parts are merged for KindleGen.
+    """
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scans = list(executor.map(get_id_from_file, files, chunksize=8))
+    else:
+        scans = [get_id_from_file(file) for file in files]
+    index = {}
+    for file, ids in zip(files, scans):
+        name = Path(file).name
+        for id in dict.fromkeys(ids):
+            index.setdefault(id, []).append(name)
+    collisions = {id: names for id, names in index.items() if len(names) > 1}
+    return index, collisions
+
+
+def get_loop_options(tags=[], protected=[], classes=[], clean=False, features='lxml', engine='bs4', cache=None, progress=True, verbose=False, inflections=False) -> dict:
+    """
+    Return the options of a loop over the source files, with the defaults filled in.
+
+    Args:
+        As in `main_loop()`. Empty `tags`, `protected` and `classes` are replaced by their defaults.
+    Returns:
+        options ({str:any}): the options, by name, to be passed on to `main_loop_file()` or `iter_dictionary()`
+    Notes:
+        Shared by `main_loop()`, `shard.shard_loop()`, `chunk.chunk_loop()`, `mobi.mobi_loop()` and `mobi.make_kindle()`, so the defaults are set in one place. An unknown option raises a TypeError.
+    """
+    # set up tags to be processed / tags that are protected, unless set by user:
+    return {
+        'tags': tags or ['blockquote'],
+        'protected': protected or ['h1', 'h2', 'h3', 'h4', 'h5', '\n'],
+        'classes': classes or ['calibre27'],
+        'clean': clean,
+        'features': features,
+        'engine': engine,
+        'cache': cache,
+        'progress': progress,
+        'verbose': verbose,
+        'inflections': inflections,
+    }
+
+
+def get_markup_from_element(element, inner=False) -> str:
+    """
+    Serialize an lxml element the way BeautifulSoup does with `str(tag)`.
+
+    Args:
+        element (lxml.etree._Element): element parsed by lxml, typically in the 'lxml-stream' engine
+        inner (bool): if True, serialize the content of the element only, without the element tags
+    Returns:
+        markup (str): document markup language, tail excluded
+    Functions: 
+        `serialize_element()`, `list_void_tags()`
+    Notes:
+        Uses the 'minimal' formatter of BeautifulSoup: only &, <, > are escaped. Empty void elements are closed as `<br/>`. Multi-valued class attributes are normalized to single spaces. 
+    """
+    parts, void = [], set(list_void_tags())
+    if inner:
+        if element.text:
+            parts.append(escape_text(element.text))
+        for child in element:
+            serialize_element(child, parts, void)
+            if child.tail:
+                parts.append(escape_text(child.tail))
+    else:
+        serialize_element(element, parts, void)
+    return ''.join(parts)
+
+
 def get_meta_opf(dir, tags=[], encoding='utf8', features='lxml'):
     """
     Wrapper to read meta content of open package format (opf) file. 
@@ -634,6 +959,37 @@ def get_meta_opf_from_soup(soup:BeautifulSoup, tags=[]):
     return content
 
 
+@functools.lru_cache(maxsize=64)
+def get_normalizer(literals: tuple, replace='', ignorecase=False, strip=False):
+    """
+    Return a `Normalizer` that replaces each of the literal strings with `replace`, compiled on the first call only.
+
+    Args:
+        literals (tuple): strings to be replaced
+        replace (str): replacement
+    Returns:
+        normalizer (Normalizer)
+    Modules:
+        functools
+    """
+    return Normalizer(dict.fromkeys(literals, replace), ignorecase=ignorecase, strip=strip)
+
+
+def get_options_fingerprint(options: dict) -> str:
+    """
+    Digest of the options passed to `main_loop()` that change the content of the output.
+
+    Args:
+        options ({str:any}): e.g. tags, protected, classes, clean, features
+    Returns:
+        digest (str): hexadecimal digest, independent of the order of the keys
+    Modules: 
+        hashlib, json
+    """
+    s = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256(s.encode('utf8')).hexdigest()
+
+
 def get_pi(dml, features='lxml'):
     """
     Wrapper for document markup language.
@@ -688,11 +1044,14 @@ def get_sorted_id_from_soup(soup:BeautifulSoup):
         unique, duplicate ({}): two lists for unique and duplicated IDs
     Modules: 
         bs4 (BeautifulSoup)
+    Notes:
+        Both lists come from a single parse: prefer `get_sorted_id()` to calling `get_unique_id()` and `get_duplicate_id()` one after the other.
     """
-    unique, dupe = [], []
+    unique, dupe, seen = [], [], set()
     for tag in soup.find_all(attrs={'id':True}):
         id = tag.get('id')
-        if id not in unique:
+        if id not in seen:
+            seen.add(id)
             unique.append(id)
         else:
             dupe.append(id)
@@ -715,6 +1074,11 @@ def insert_pagebreak(soup: BeautifulSoup, tag: Tag) -> None:
     return None
 
 
+def get_text_from_element(element) -> str:
+    """Return the text of an lxml element and its descendants, comments excluded, like BeautifulSoup `.get_text()`."""
+    return ''.join(element.itertext())
+
+
 def get_unique_id(dml):
     """
     Wrapper for document markup language.
@@ -727,6 +1091,174 @@ def get_unique_id(dml):
     return id_unique
 
 
+def iter_dictionary(dml, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, verbose=False, engine='bs4', cache=None, timer=None, source=None):
+    """
+    Process several dictionary definitions from a document markup language, one at a time.
+
+    Args:
+        dml (Tag): BeautifulSoup Tag. With engine 'lxml-stream', path to a file or file object.
+        protected ([str]): protected tags are returned untouched
+        engine (str): 'bs4' to process a BeautifulSoup Tag, 'lxml-stream' to stream the file with `iter_dictionary_stream()`
+        cache (EntryCache, optional): on-disk cache of formatted entries, see `cache/cache.py`
+        timer (StageTimer, optional): records the time spent in each stage, see `timers/timers.py`
+        progress (bool or Progress, optional): if True, show the progress of this call. A `Progress` or `SharedCounter` object is updated instead, see `progress/progress.py`.
+        source (str, optional): name of the source file, recorded in each Entry
+    Returns:
+        entry (Entry): one record per formatted entry or protected tag, in order, see `Entry`
+    Modules:
+        GDLC (cache, progress)
+    Functions:
+        `debug.print_child_info()`, `make_entry`, `iter_dictionary_stream()`, `get_code_fingerprint()`, `cache.get_entry_key()`
+    Notes:
+        The entries are formatted as they are requested, so a writer can consume them without keeping a whole file of strings in memory.
+    """ 
+    if engine == 'lxml-stream':
+        yield from iter_dictionary_stream(dml, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress, verbose=verbose, cache=cache, timer=timer, source=source)
+        return
+    elif engine != 'bs4':
+        raise ValueError('engine must be one of "bs4" or "lxml-stream"')
+    if cache is not None:
+        from GDLC.cache.cache import get_entry_key
+        options = {'version': __version__, 'code': get_code_fingerprint(), 'features': features}
+    children = dml.findChildren(recursive=False)
+    n = len(children)+1
+    if verbose:  # print to debug:
+        from GDLC.debug.debug import print_dictionary_info
+        print_dictionary_info(n)
+    # initialize a counter:
+    i = 0
+    # a progress display of its own, or the one of the run:
+    if progress is True:
+        from GDLC.progress.progress import Progress
+        progress = Progress(total_entries=len(children))
+        standalone = True
+    else:
+        standalone = False
+    for child in children:
+        # update a counter and the progress display:
+        i += 1
+        if progress:
+            progress.update(entries=1)
+        if verbose:  # print to debug:
+            from GDLC.debug.debug import print_child_info
+            print_child_info(child)
+        # print protected tags as is: 
+        if child.name in protected:
+            yield Entry(i, str(child), source=source, protected=True)
+        # process tags that contain dictionary definitions (defined above):
+        elif child.name in tags and any(c in child.get('class', []) for c in classes):
+            entry = None
+            # look up the raw entry in the cache:
+            if cache is not None:
+                if timer is not None:
+                    start = timer.start()
+                key = get_entry_key(str(child), options)
+                entry = cache.get(key)
+                if timer is not None:
+                    timer.add('cache', start)
+            if entry is None:
+                # the entry is edited in place, no need to parse it again:
+                # the <xml> header, if any, was removed from the definition by `make_definition()`:
+                entry = make_entry(child, timer=timer)
+                # add empty line for clarity:
+                entry = entry + '\n'
+                if cache is not None:
+                    cache.put(key, entry)
+            yield Entry(i, entry, source=source)
+        else:
+            # remove all other children: 
+            child.extract(strip=True)
+            if verbose:  # print to debug:
+                from GDLC.debug.debug import print_child_extract
+                print_child_extract(child)
+    if standalone:
+        progress.close()
+
+
+def iter_dictionary_stream(dml, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, verbose=False, cache=None, timer=None, source=None):
+    """
+    Process several dictionary definitions by streaming a document with `lxml.etree.iterparse`, one at a time.
+    Each child of <body> is formatted as soon as it is closed, then cleared, so memory stays flat. 
+
+    Args:
+        dml (str, Path, file, Tag): path to a file, file object, or BeautifulSoup Tag (serialized first)
+        tags ([str]): tag names that contain definitions to be processed
+        protected ([str]): protected tags are returned untouched
+        classes ([str]): class names that contain definitions to be processed
+        cache (EntryCache, optional): on-disk cache of formatted entries, shared with `make_dictionary()`
+        timer (StageTimer, optional): records the time spent in each stage, see `timers/timers.py`
+        progress (bool or Progress, optional): as in `make_dictionary()`
+        source (str, optional): name of the source file, recorded in each Entry
+    Returns:
+        entry (Entry): one record per formatted entry or protected tag, identical to those of `iter_dictionary()`
+    Modules:
+        lxml (etree), GDLC (cache, progress)
+    Functions:
+        `make_entry_from_element()`, `get_markup_from_element()`, `normalize_blank_strings()`, `get_code_fingerprint()`, `cache.get_entry_key()`
+    """ 
+    from lxml import etree
+    if cache is not None:
+        from GDLC.cache.cache import get_entry_key
+        options = {'version': __version__, 'code': get_code_fingerprint(), 'features': features}
+    # a BeautifulSoup object is serialized and streamed like a file:
+    if isinstance(dml, Tag):
+        dml = io.BytesIO(str(dml).encode('utf8'))
+    elif isinstance(dml, Path):
+        dml = str(dml)
+    i = 0
+    # a progress display of its own, or the one of the run:
+    if progress is True:
+        from GDLC.progress.progress import Progress
+        progress = Progress()
+        standalone = True
+    else:
+        standalone = False
+    body = None
+    for event, child in etree.iterparse(dml, events=('start', 'end'), html=True):
+        if event == 'start':
+            if body is None and child.tag == 'body':
+                body = child
+            continue
+        # only the children of <body> are processed, comments are skipped:
+        if body is None or child.getparent() is not body or not isinstance(child.tag, str):
+            continue
+        # update a counter and the progress display:
+        i += 1
+        if progress:
+            progress.update(entries=1)
+        # print protected tags as is: 
+        if child.tag in protected:
+            yield Entry(i, get_markup_from_element(child), source=source, protected=True)
+        # process tags that contain dictionary definitions (defined above):
+        elif child.tag in tags and any(c in child.get('class', '').split() for c in classes):
+            entry = None
+            # look up the raw entry in the cache, with the same markup as BeautifulSoup:
+            if cache is not None:
+                if timer is not None:
+                    start = timer.start()
+                normalize_blank_strings(child)
+                key = get_entry_key(get_markup_from_element(child), options)
+                entry = cache.get(key)
+                if timer is not None:
+                    timer.add('cache', start)
+            if entry is None:
+                # the <xml> header, if any, was removed from the definition:
+                entry = make_entry_from_element(child, timer=timer)
+                # add empty line for clarity:
+                entry = entry + '\n'
+                if cache is not None:
+                    cache.put(key, entry)
+            yield Entry(i, entry, source=source)
+        elif verbose:  # print to debug:
+            from GDLC.debug.debug import print_child_extract
+            print_child_extract(get_markup_from_element(child))
+        # free the memory held by the processed child:
+        child.clear()
+        body.remove(child)
+    if standalone:
+        progress.close()
+
+
 def list_files_all(dir):
     """ 
     List files in the given directory.
@@ -846,6 +1378,14 @@ def list_invalid_tags_kf8():
     return ['audio', 'base', 'big', 'canvas', 'center', 'command', 'datalist', 'eventsource', 'font', 'form', 'iframe', 'input', 'keygen', 'marquee', 'noscript', 'param', 'script', 'video']
 
 
+def list_void_tags():
+    """
+    List of void tags, closed as `<br/>` by BeautifulSoup.
+    Reference: https://html.spec.whatwg.org/multipage/syntax.html#void-elements
+    """
+    return ['area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img', 'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr']
+
+
 def list_valid_tags():
     """
     List of tags permitted in book content.
@@ -854,68 +1394,47 @@ def list_valid_tags():
     return ['a', 'b', 'big', 'blockquote', 'body', 'br', 'center', 'cite', 'dd', 'del', 'dfn', 'div', 'em', 'font', 'head', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'html', 'i', 'img', 'li', 'ol', 'p', 's', 'small', 'span', 'strike', 'strong', 'sub', 'sup', 'u', 'ul', 'var']
 
 
-def make_dictionary(dml, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, verbose=False):
+def make_dictionary(dml, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, verbose=False, engine='bs4', cache=None, timer=None):
     """
     Process several dictionary definitions from a document markup language.
 
     Args:
-        dml (Tag): BeautifulSoup Tag
+        dml (Tag): BeautifulSoup Tag. With engine 'lxml-stream', path to a file or file object.
         protected ([str]): protected tags are returned untouched
+        engine (str): 'bs4' to process a BeautifulSoup Tag, 'lxml-stream' to stream the file with `make_dictionary_stream()`
+        cache (EntryCache, optional): on-disk cache of formatted entries, see `cache/cache.py`
+        timer (StageTimer, optional): records the time spent in each stage, see `timers/timers.py`
+        progress (bool or Progress, optional): if True, show the progress of this call. A `Progress` or `SharedCounter` object is updated instead, see `progress/progress.py`.
     Returns:
         dic ({str}): a dictionary of definitions
-    Modules:
-        progressbar
     Functions:
-        `version_check()`, `debug.print_child_info()`, `make_entry`, `strip_header()`
+        `version_check()`, `iter_dictionary()`
+    Notes:
+        Keeps every entry in memory. Use `iter_dictionary()` to consume the entries one at a time.
     """ 
     # definitions will be stored in an order-preserving dictionary:
     version_check()  # abort if Python < 3.6
-    # dictionary values will be joined at the end:
-    dic = {}
-    children = dml.findChildren(recursive=False)
-    n = len(children)+1
-    if verbose:  # print to debug:
-        from GDLC.debug.debug import print_dictionary_info
-        print_dictionary_info(n)
-    # initialize a counter:
-    i = 0
-    if progress:
-        widgets = [progressbar.Percentage(), progressbar.Bar(marker='■')]
-        bar = progressbar.ProgressBar(widgets=widgets, max_value=n).start()
-    for child in children:
-        # update a counter and progressbar:
-        i += 1
-        if progress:
-            bar.update(i+1)
-        # flush fake progressbar to console:
-        # print('■', end='', flush=True)
-        if verbose:  # print to debug:
-            from GDLC.debug.debug import print_child_info
-            print_child_info(child)
-        # print protected tags as is: 
-        if child.name in protected:
-            dic.update({str(i): str(child)})
-        # process tags that contain dictionary definitions (defined above):
-        elif child.name in tags and any(c in child['class'] for c in classes):
-            soup = BeautifulSoup(str(child), features=features)
-            entry = make_entry(soup)
-            # remove <xml> header, in case one was inserted by parser:
-            entry = strip_header(entry)
-            # add empty line for clarity:
-            entry = entry + '\n'
-            dic.update({str(i): entry})
-        else:
-            # remove all other children: 
-            child.extract(strip=True)
-            if verbose:  # print to debug:
-                from GDLC.debug.debug import print_child_extract
-                print_child_extract(child)
-    if progress:
-        bar.finish()
+    dic = {str(entry.n): entry.markup for entry in iter_dictionary(dml, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress, verbose=verbose, engine=engine, cache=cache, timer=timer)}
     return dic
 
 
-def main_loop(files, dir=None, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, query=True, verbose=False):
+def make_dictionary_stream(source, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, verbose=False, cache=None, timer=None):
+    """
+    Process several dictionary definitions by streaming a document with `lxml.etree.iterparse`.
+
+    Args:
+        source (str, Path, file, Tag): path to a file, file object, or BeautifulSoup Tag (serialized first)
+        Other arguments as in `make_dictionary()`.
+    Returns:
+        dic ({str}): a dictionary of definitions, identical to the one returned by `make_dictionary()`
+    Functions:
+        `iter_dictionary_stream()`
+    """ 
+    dic = {str(entry.n): entry.markup for entry in iter_dictionary_stream(source, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress, verbose=verbose, cache=cache, timer=timer)}
+    return dic
+
+
+def main_loop(files, dir=None, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, query=True, verbose=False, workers=None, engine='bs4', incremental=False, cache=None, index=None, timings=False, pipeline=False, prefetch=2, inflections=False, chunks=False, max_memory=None):
     """
     Loop over all files in a given directory.
 
@@ -928,13 +1447,28 @@ def main_loop(files, dir=None, tags=[], protected=[], classes=[], clean=False, f
         verbose (bool): if True, selected information is printed to the console. Used for debugging.
         clean (bool): if True, non-fundamental tags and classes are removed.
         features (str): specifies the parser used by BeautifulSoup. Defaults to 'lxml'.
-        progress (bool, optional): progressbar depends on module progressbar2, can be turned off.
+        progress (bool, optional): if True, show one progress display for the whole run, see `progress/progress.py`. If False, print the name of each file instead.
+        workers (int, optional): number of worker processes. Defaults to None, files are then processed one at a time.
+        engine (str, optional): 'bs4' parses each file with BeautifulSoup, 'lxml-stream' streams it with `lxml.etree.iterparse`.
+        incremental (bool, optional): if True, skip files whose input, GDLC version and options are unchanged since the last run.
+        cache (str, optional): path to an on-disk cache of formatted entries, see `cache/cache.py`. Unchanged entries are not processed again.
+        index (str, optional): path to a headword index, see `index/index.py`. Each output file is indexed after it is written.
+        timings (bool or str, optional): if True, time each stage of the build and print a summary table at the end. If a path, also save the summary as json. See `timers/timers.py`.
+        pipeline (bool, optional): if True, read the next files, process files in `workers` processes and write pages at the same time, see `main_loop_pipeline()`.
+        prefetch (int, optional): with `pipeline=True`, the number of files read ahead and of pages waiting to be written.
+        inflections (bool, optional): if True, add the feminine and plural forms of the headwords to <idx:infl>, see `inflect/inflect.py`.
+        chunks (bool or int, optional): with `workers` set, if True, split each file into chunks of entries, formatted in several workers, see `chunk/chunk.py`. If an int, the size of a chunk in bytes. Ignored with `pipeline=True`.
+        max_memory (float, optional): ceiling on the resident memory of a process, in megabytes of 1024 * 1024 bytes. If set, the tree of each file is torn down once its page is written, and files are streamed with the 'lxml-stream' engine while a process is above the ceiling, see `memory/memory.py`.
     Returns:
         None
     Modules: 
-        os, pathlib (Path), bs4 (BeautifulSoup), GDLC (query)
+        os, pathlib (Path), asyncio, bs4 (BeautifulSoup), concurrent.futures (ProcessPoolExecutor, wait), GDLC (query, index, timers, progress, chunk, memory)
     Functions: 
-        `main_loop_query()`, `get_head_from_soup()`, `make_dictionary()`, `debug.print_log_error()`
+        `main_loop_query()`, `get_loop_options()`, `main_loop_file()`, `main_loop_file_timed()`, `main_loop_pipeline()`, `chunk.submit_chunks()`, `chunk.write_chunks()`, `debug.print_log_error()`, `get_file_hash()`, `get_code_fingerprint()`, `get_options_fingerprint()`, `read_manifest()`, `write_manifest()`
+    Notes:
+        With `workers` set, each file is sent to a process pool and the pages are written in the order of `files`. With `chunks` set too, the chunks of each file are sent to the pool instead, and written back in order by the main process. The workers count their entries with a `SharedCounter`, read by the progress display of the main process.
+        The peak memory of the main process and of the workers is printed at the end of the run.
+        A build manifest is saved in the output directory after every run. With `incremental=True`, it is used to skip the files that are up to date: same input, same options, and same transform code, as with the entry cache.
     TO DO: 
         use **kwargs
     """ 
@@ -942,49 +1476,118 @@ def main_loop(files, dir=None, tags=[], protected=[], classes=[], clean=False, f
     dir = main_loop_query(dir, query)
     if not dir:  # at this point, user declined to proceed
         return None
+    dir = Path(dir).expanduser()
     # set up a container to hold a list of files that raise an error:
     errors = []
-    # set up tags to be processed / tags that are protected:
-    entry_tag_default = ['blockquote']
-    entry_class_default = ['calibre27']
-    protected_default = ['h1', 'h2', 'h3', 'h4', 'h5', '\n']
-    # ignore defaults if set by user
-    if not tags:
-        tags = entry_tag_default
-    if not classes:
-        classes = entry_class_default
-    if not protected:
-        protected = protected_default
-    # start the main loop:
+    # the options passed on to each file, with the default tags, classes and protected tags:
+    options = get_loop_options(tags=tags, protected=protected, classes=classes, clean=clean, features=features, engine=engine, cache=cache, progress=progress, verbose=verbose, inflections=inflections)
+    options['max_memory'] = max_memory
+    tags, protected, classes = options['tags'], options['protected'], options['classes']
+    # the build manifest records what each output file was made from:
+    manifest = read_manifest(dir)
+    fingerprint = get_options_fingerprint({'tags': tags, 'protected': protected, 'classes': classes, 'clean': clean, 'features': features, 'inflections': inflections})
+    builds = {}
     for file in files:
+        builds[file] = {'input': get_file_hash(file), 'version': __version__, 'code': get_code_fingerprint(), 'options': fingerprint} if Path(file).is_file() else None
+    # skip files that are up to date:
+    if incremental:
+        skipped = [file for file in files if builds[file] and manifest.get(Path(file).name) == builds[file] and dir.joinpath(Path(file).name).is_file()]
+        files = [file for file in files if file not in skipped]
+        print('\nSkipping', len(skipped), 'file(s) unchanged since the last run.')
+    # stage timers, merged from the workers if any:
+    timer = None
+    if timings:
+        from GDLC.timers.timers import StageTimer
+        timer = StageTimer()
+    # one progress display for all files, updated by the workers if any:
+    reporter = None
+    if progress:
+        from GDLC.progress.progress import Progress, SharedCounter, init_worker
+        sizes = {file: Path(file).stat().st_size if builds[file] else 0 for file in files}
+        reporter = Progress(total_files=len(files), total_bytes=sum(sizes.values()))
+        options['progress'] = SharedCounter() if workers or pipeline else reporter
+    # the headword index is written by the main process only:
+    if index:
+        from GDLC.index.index import HeadwordIndex
+        headwords = HeadwordIndex(index)
+    # read, process and write the files in overlapping stages:
+    if pipeline:
+        import asyncio
+        results = asyncio.run(main_loop_pipeline(files, dir, workers=workers, prefetch=prefetch, timer=timer, reporter=reporter, **options))
+    # send each file to a process pool, keeping the results in file order:
+    elif workers:
+        initializer, initargs = (init_worker, (reporter.get_counter(),)) if reporter else (None, ())
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+        if chunks:
+            # the chunks of all files are queued at once, missing files are reported in the loop:
+            from GDLC.chunk.chunk import submit_chunks, write_chunks
+            size = chunks if chunks is not True else None
+            pages = [submit_chunks(executor, file, size=size, workers=workers, timed=bool(timer), **options) if builds[file] else None for file in files]
+        else:
+            function = main_loop_file_timed if timer else main_loop_file
+            pages = [executor.submit(function, file, outfile=dir.joinpath(Path(file).name), **options) for file in files]
+    # start the main loop:
+    for i, file in enumerate(files):
         filepath = Path(file)
         # set up the full path to the output file:
         outfilename = dir.joinpath(filepath.name)
+        # forget the previous build until this one succeeds:
+        manifest.pop(filepath.name, None)
         # try to read input files and write to output files:
         try:
-            print('\n\nPROCESSING FILE', file, ':\n')
-            # open a source file to read the content and a destination file to save the output:
-            with open(file, encoding='utf8') as infile, open(outfilename, 'w') as outfile:
-                # convert document markup language to BeautifulSoup object:
-                soup = BeautifulSoup(infile, features=features)
-                # insert a <mbp:frameset> tag:
-                insert_frameset(soup)
-                # process the body to return formatted dictionary entries:
-                body = soup.find('body')  # returns a BeautifulSoup Tag
-                dico = make_dictionary(body, tags=tags, protected=protected, classes=classes, features=features, progress=progress, verbose=verbose)
-                body = '\n'.join(dico.values())
-                # create a dml page with <html> and <head> tags:
-                body = BeautifulSoup(body, features=features)
-                page = make_dml_from_soup(body, features=features)
-                # write to the file:
-                print(page, file=outfile)
+            if reporter is None and not pipeline:
+                print('\n\nPROCESSING FILE', file, ':\n')
+            # refresh the progress display while the workers run:
+            futures = (pages[i] or [] if chunks else [pages[i]]) if workers and not pipeline else []
+            while reporter and not all(future.done() for future in futures):
+                wait(futures, timeout=reporter.interval)
+                reporter.poll()
+            # the page is streamed to the file, inside the worker if any:
+            if pipeline:
+                if isinstance(results[i], Exception):
+                    raise results[i]
+            elif workers and chunks:
+                if pages[i] is None:
+                    raise FileNotFoundError('No such file: ' + repr(file))
+                write_chunks(pages[i], outfilename, timer=timer)
+            elif workers and timer:
+                _, worker_timer = pages[i].result()
+                timer.merge(worker_timer)
+            elif workers:
+                pages[i].result()
+            else:
+                main_loop_file(file, outfile=outfilename, timer=timer, **options)
+            manifest[filepath.name] = builds[file]
+            if index:
+                headwords.add_file(outfilename, source=file)
         # if something goes wrong, log the error:
         except Exception as error:
             if verbose:
                 from GDLC.debug.debug import print_log_error
                 print_log_error(item=file, error=error, record=errors)
             else:
-                print(str(error))
+                # print the error without breaking the progress line:
+                (reporter.write if reporter else print)(str(error))
+                errors.append(file)
+        # the pipeline counts the files as they are written:
+        if reporter and not pipeline:
+            reporter.update(files=1, bytes=sizes[file])
+    if reporter:
+        reporter.close()
+    if workers and not pipeline:
+        executor.shutdown()
+    if index:
+        headwords.close()
+    write_manifest(dir, manifest)
+    if timer:
+        timer.print_summary()
+        if not isinstance(timings, bool):
+            timer.write_json(timings)
+    # the workers have ended, so their peak is known too:
+    from GDLC.memory.memory import get_peak_string
+    peak = get_peak_string()
+    if peak:
+        print('\n' + peak)
     print('\n\nALL FILES PROCESSED: CHECK THE LOGS FOR ANY ERRORS.')
     if not errors:
         print('\nNO EXCEPTIONS WERE RECORDED!')
@@ -993,6 +1596,219 @@ def main_loop(files, dir=None, tags=[], protected=[], classes=[], clean=False, f
     return print('■')
 
 
+def main_loop_file(file, outfile=None, tags=[], protected=[], classes=[], clean=False, features='lxml', progress=True, verbose=False, engine='bs4', cache=None, timer=None, data=None, inflections=False, max_memory=None):
+    """
+    Process a single dictionary file. Called by `main_loop()`, possibly inside a worker process.
+
+    Args:
+        file (str): path to the file to be processed.
+        outfile (str, optional): path to the output file. If given, the page is streamed to the file by `write_page()`.
+        cache (str or EntryCache, optional): path to the cache database, or an open cache.
+        timer (StageTimer, optional): records the time spent in each stage, see `timers/timers.py`.
+        progress (bool or Progress, optional): as in `make_dictionary()`. In a worker process, a `SharedCounter`.
+        data (bytes, optional): content of the file, already read by `main_loop_pipeline()`. The file is then not opened.
+        inflections (bool, optional): if True, add the inflected forms of the headwords, see `inflect/inflect.py`.
+        max_memory (float, optional): ceiling on the resident memory of the process, in megabytes of 1024 * 1024 bytes. If set, the tree of the file is torn down once written, and above the ceiling the file is streamed with the 'lxml-stream' engine. See `memory/memory.py`.
+        Other arguments as in `main_loop()`.
+    Returns:
+        page (str): dml page with body, head, and root tags, or the path to the output file if `outfile` is given
+    Modules: 
+        io, os, gc, bs4 (BeautifulSoup), GDLC (cache, inflect, memory)
+    Functions: 
+        `iter_dictionary()`, `write_page()`, `inflect.inflect_entries()`
+    Notes:
+        The entries are written as they are formatted, so the 'make_dictionary' stage of the timer includes writing the page.
+    """
+    # each file, possibly in a worker process, opens its own connection to the cache:
+    if isinstance(cache, (str, Path)):
+        from GDLC.cache.cache import EntryCache
+        with EntryCache(cache) as entry_cache:
+            return main_loop_file(file, outfile=outfile, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress, verbose=verbose, engine=engine, cache=entry_cache, timer=timer, data=data, inflections=inflections, max_memory=max_memory)
+    if timer is not None:
+        timer.set_file(file)
+        start = timer.start()
+    # above the memory ceiling, stream the file instead of building its tree:
+    if max_memory is not None and engine != 'lxml-stream':
+        from GDLC.memory.memory import is_over
+        if is_over(max_memory):
+            engine = 'lxml-stream'
+    soup = None
+    if engine == 'lxml-stream':
+        # the file is streamed, no BeautifulSoup object is built for the source:
+        source = file if data is None else io.BytesIO(data)
+        entries = iter_dictionary(source, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress, verbose=verbose, engine=engine, cache=cache, timer=timer, source=Path(file).name)
+    else:
+        if data is not None:
+            # convert the content read ahead to BeautifulSoup object, with the newlines of a text file:
+            soup = BeautifulSoup(io.TextIOWrapper(io.BytesIO(data), encoding='utf8'), features=features)
+        else:
+            # open a source file to read the content:
+            with open(file, encoding='utf8') as infile:
+                # convert document markup language to BeautifulSoup object:
+                soup = BeautifulSoup(infile, features=features)
+        if timer is not None:
+            start = timer.add('parse', start)
+        # process the body to return formatted dictionary entries:
+        body = soup.find('body')  # returns a BeautifulSoup Tag
+        entries = iter_dictionary(body, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress, verbose=verbose, engine=engine, cache=cache, timer=timer, source=Path(file).name)
+    # the inflected forms are computed in batches of entries:
+    if inflections:
+        from GDLC.inflect.inflect import inflect_entries
+        entries = inflect_entries(entries)
+    # write the page around the entries, formatted one at a time as they are written:
+    if outfile is None:
+        page = io.StringIO()
+        write_page(page, entries)
+        result = page.getvalue()
+    else:
+        # write to a temporary file first, so a failed run leaves no partial page:
+        temp = Path(str(outfile) + '.tmp')
+        with open(temp, 'w', encoding='utf8') as stream:
+            write_page(stream, entries)
+        os.replace(temp, outfile)
+        result = outfile
+    # tear down the tree as soon as the page is written, rather than when the cycles of the tree are collected:
+    if max_memory is not None and soup is not None:
+        soup.decompose()
+        del soup, body, entries
+        gc.collect()
+    if timer is not None:
+        timer.add('make_dictionary', start)
+    # send the last entries counted to the progress display of the run:
+    if progress and progress is not True:
+        progress.flush()
+    return result
+
+
+def main_loop_file_timed(file, **kwargs):
+    """
+    Call `main_loop_file()` with a new stage timer. Used by `main_loop()` to send the timings of a worker process back to the parent.
+
+    Returns:
+        result, timer: the value returned by `main_loop_file()` and the StageTimer
+    Modules: 
+        GDLC (timers)
+    """
+    from GDLC.timers.timers import StageTimer
+    timer = StageTimer()
+    result = main_loop_file(file, timer=timer, **kwargs)
+    return result, timer
+
+
+async def main_loop_pipeline(files, dir, workers=None, prefetch=2, timer=None, reporter=None, **options) -> list:
+    """
+    Process files in three overlapping stages: an async reader, a pool of worker processes, and an async writer. Called by `main_loop()` with `pipeline=True`.
+
+    Args:
+        files ([str]): paths to the files to be processed
+        dir (Path): output directory
+        workers (int, optional): number of worker processes. Defaults to the number of CPUs.
+        prefetch (int, optional): capacity of the queues between the stages. At most `prefetch` files wait to be processed and at most `prefetch` pages wait to be written, which caps the memory used.
+        timer (StageTimer, optional): merges the timings of the workers, and records the time spent writing each page as 'flush'
+        reporter (Progress, optional): progress display of the run, see `progress/progress.py`
+        Other arguments as in `main_loop_file()`.
+    Returns:
+        results ([Path or Exception]): for each file, in order, the path to the output file or the exception raised
+    Modules:
+        asyncio, functools (partial), os, pathlib (Path), concurrent.futures (ProcessPoolExecutor), GDLC (progress)
+    Functions:
+        `main_loop_file()`, `main_loop_file_timed()`
+    Notes:
+        Files are read and pages are written in threads, with `loop.run_in_executor()` and the default thread pool, so the disk (or the network, for a mounted output directory) works while the workers use the CPU. A full queue blocks the stage before it, so a slow disk slows down the reader instead of filling the memory.
+    """
+    import asyncio
+    from functools import partial
+    loop = asyncio.get_running_loop()
+    workers = workers or os.cpu_count() or 1
+    read_queue = asyncio.Queue(maxsize=prefetch)
+    write_queue = asyncio.Queue(maxsize=prefetch)
+    results = [None] * len(files)
+    function = main_loop_file_timed if timer else main_loop_file
+
+    def read(file):
+        with open(file, 'rb') as f:
+            return f.read()
+
+    def write(outfile, page):
+        # write to a temporary file first, so a failed run leaves no partial page:
+        temp = Path(str(outfile) + '.tmp')
+        with open(temp, 'w', encoding='utf8') as stream:
+            stream.write(page)
+        os.replace(temp, outfile)
+
+    async def reader():
+        for i, file in enumerate(files):
+            try:
+                data = await loop.run_in_executor(None, read, file)
+            except Exception as error:
+                data = error
+            await read_queue.put((i, file, data))
+        # one stop signal per worker:
+        for _ in range(workers):
+            await read_queue.put(None)
+
+    async def worker(executor):
+        while True:
+            item = await read_queue.get()
+            if item is None:
+                break
+            i, file, data = item
+            if not isinstance(data, Exception):
+                if reporter is None:
+                    print('\n\nPROCESSING FILE', file, ':\n')
+                try:
+                    data = await loop.run_in_executor(executor, partial(function, file, data=data, **options))
+                except Exception as error:
+                    data = error
+            await write_queue.put((i, file, data))
+
+    async def writer():
+        # any error is recorded for its file and the queue is still drained, so the workers never block on a full queue:
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                break
+            i, file, page = item
+            try:
+                if timer and not isinstance(page, Exception):
+                    page, worker_timer = page
+                    timer.merge(worker_timer)
+                if not isinstance(page, Exception):
+                    outfile = dir.joinpath(Path(file).name)
+                    if timer:
+                        timer.set_file(file)
+                        start = timer.start()
+                    await loop.run_in_executor(None, write, outfile, page)
+                    page = outfile
+                    if timer:
+                        timer.add('flush', start)
+                if reporter:
+                    reporter.update(files=1, bytes=Path(file).stat().st_size if isinstance(page, Path) else 0)
+            except Exception as error:
+                page = error
+            results[i] = page
+
+    async def refresh():
+        while True:
+            await asyncio.sleep(reporter.interval)
+            reporter.poll()
+
+    # the workers count their entries in the shared count of the progress display:
+    initializer, initargs = None, ()
+    if reporter:
+        from GDLC.progress.progress import init_worker
+        initializer, initargs = init_worker, (reporter.get_counter(),)
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        writing = asyncio.create_task(writer())
+        refreshing = asyncio.create_task(refresh()) if reporter else None
+        await asyncio.gather(reader(), *[worker(executor) for _ in range(workers)])
+        await write_queue.put(None)
+        await writing
+        if refreshing:
+            refreshing.cancel()
+    return results
+
+
 def main_loop_query(dir, query=True):
     """
     Print warning and request user confirmation before proceeding.
@@ -1028,17 +1844,25 @@ def main_loop_query(dir, query=True):
     return dir
 
 
-def make_definition(soup:Tag, clean=False):
+def manifest_name() -> str:
+    """Returns the name of the build manifest file saved in the output directory."""
+    return '.GDLC_manifest.json'
+
+
+def make_definition(soup:Tag, clean=False, timer=None):
     """
     Extracts definition from dictionary entry.
 
     Args:
         soup (Tag): extracted portion of a word definition
+        timer (StageTimer, optional): records the 'make_definition' and 'serialize' stages, see `timers/timers.py`
     Returns:
         defn (str): word definition reformatted to conform to desired html styles
     Modules: bs4 (BeautifulSoup)
-    Functions: `get_body()`
+    Functions: `get_body_from_soup()`
     """
+    if timer is not None:
+        start = timer.start()
     # if definition inside <blockquote>, remove it:
     f = soup.find_all('blockquote')
     if f:
@@ -1060,10 +1884,44 @@ def make_definition(soup:Tag, clean=False):
         # clean all tags inside word definitions:
         for t in soup.find_all(class_=True):
             del t.attrs['class']
-    # get the content inside the <body> tag:
-    s = get_body(soup)
-    # remove excess blank lines, if any:
-    s = re.sub(r'\n+', '\n', s)
+    if timer is not None:
+        start = timer.add('make_definition', start)
+    # get the content inside the <body> tag, without parsing it again, blank lines and <xml> header removed:
+    s = get_body_from_soup(soup)
+    if not s:
+        s = 'Definition missing'
+    defn = '<div>'+s+'</div>'
+    if timer is not None:
+        timer.add('serialize', start)
+    return defn
+
+
+def make_definition_from_element(element):
+    """
+    Extracts definition from an lxml dictionary entry, as `make_definition()` does for BeautifulSoup.
+
+    Args:
+        element (lxml.etree._Element): extracted portion of a word definition
+    Returns:
+        defn (str): word definition reformatted to conform to desired html styles
+    Functions: 
+        `unwrap_element()`, `get_markup_from_element()`, `normalize_definition()`
+    """
+    # if definition inside <blockquote>, remove it:
+    for b in list(element.iterdescendants('blockquote')):
+        unwrap_element(b)
+    for p in list(element.iterdescendants('p')):
+        if set(p.get('class', '').split()) & {'ps', 'p', 'p1', 'pc', 'tc'}:
+            # wrap the paragraph content into <blockquote><span>:
+            b = p.makeelement('blockquote', {})
+            b.tail, p.tail = p.tail, None
+            p.addprevious(b)
+            b.append(p)
+            p.tag = 'span'
+            p.attrib.clear()
+    s = get_markup_from_element(element)
+    # remove excess blank lines and <xml> header, if any, in one pass:
+    s = normalize_definition(s)
     if not s:
         s = 'Definition missing'
     defn = '<div>'+s+'</div>'
@@ -1102,16 +1960,17 @@ def make_dml_from_soup(soup: BeautifulSoup, features='lxml'):
 
 
 # TO DO: UNDER CONSTRUCTION/REPAIR
-def make_entry(soup:BeautifulSoup, strip_tags=(), strip_attrs=None, strip_classes=None, strip_chars=None, strip_comments=True, verbose=False):
+def make_entry(soup:BeautifulSoup, strip_tags=(), strip_attrs=None, strip_classes=None, strip_chars=None, strip_comments=True, verbose=False, timer=None):
     """
     Takes a well-formed block of dml and formats it to conform with the Kindle dictionary structure. 
 
     Args:
-        soup (BeautifulSoup): complete dictionary entry
+        soup (BeautifulSoup, Tag): complete dictionary entry, edited in place
+        timer (StageTimer, optional): records the time spent in each stage, see `timers/timers.py`
     Returns:
         entry (str): refactored dictionary entry
     Functions: 
-        `strip_tags()`, `strip_attrs()`, `strip_classes()`, `strip_chars()`, `strip_comments()`, `split_entry()`, `make_label()`, `make_headword()`, `make_definition()`
+        `strip_tags()`, `strip_attrs()`, `strip_classes()`, `strip_chars()`, `strip_comments()`, `split_entry()`, `get_label()`, `get_headword()`, `make_definition()`, `template_entry()`
     Notes:
         UNDER REPAIR
     TO DO: 
@@ -1129,19 +1988,74 @@ def make_entry(soup:BeautifulSoup, strip_tags=(), strip_attrs=None, strip_classe
     #soup = strip_chars(soup, args=strip_chars)
     #if strip_comments:
     #    soup = strip_comments(soup)
+    if timer is not None:
+        start = timer.start()
     # Split dictionary entry into parts:
     s1, s2, s3 = split_entry(soup)
+    if timer is not None:
+        start = timer.add('split_entry', start)
     if verbose:  # print to debug:
         from GDLC.debug.debug import print_type
         print_type(s1, s2, s3)
     # Extract label value for dictionary entry:
-    s1 = make_label(s1)
+    label = get_label(s1)
+    if timer is not None:
+        start = timer.add('make_label', start)
     # Extract first word for word header:
-    s2 = make_headword(s2)
+    short, long = get_headword(s2)
+    if timer is not None:
+        start = timer.add('make_headword', start)
     # Extract the dictionary definition:
-    s3 = make_definition(s3)
+    s3 = make_definition(s3, timer=timer)
     # Concatenate label, word, definition, and tag group:
-    entry = make_entry_idx() + '\n' + s1 + s2 + s3 + '\n' + '</idx:entry>'
+    entry = template_entry(label, short, long, s3)
+    if verbose:  # print to debug:
+        from GDLC.debug.debug import print_output
+        print_output(entry)
+    return entry
+
+
+def make_entry_from_element(element, verbose=False, timer=None):
+    """
+    Takes an lxml dictionary entry and formats it to conform with the Kindle dictionary structure. 
+    Produces the same markup as `make_entry()` without building a BeautifulSoup object.
+
+    Args:
+        element (lxml.etree._Element): complete dictionary entry, edited in place
+        timer (StageTimer, optional): records the time spent in each stage, see `timers/timers.py`
+    Returns:
+        entry (str): refactored dictionary entry
+    Functions: 
+        `normalize_blank_strings()`, `split_element()`, `get_label()`, `get_text_from_element()`, `get_markup_from_element()`, `make_definition_from_element()`, `template_entry()`
+    """
+    if timer is not None:
+        start = timer.start()
+    # blank strings are reduced to a single space or newline, as BeautifulSoup does:
+    normalize_blank_strings(element)
+    # Split dictionary entry into parts:
+    s1, s2, s3 = split_element(element)
+    if timer is not None:
+        start = timer.add('split_entry', start)
+    # Extract label value for dictionary entry:
+    label = ''
+    if not isinstance(s1, str):
+        label = get_label(s1)
+    if timer is not None:
+        start = timer.add('make_label', start)
+    # Extract first word for word header:
+    short, long = '', ''
+    if not isinstance(s2, str):
+        short = get_text_from_element(s2).split(' ', 1)[0]
+        short = re.sub('[^a-zA-Z]', '', short).strip('■')
+        long = get_markup_from_element(s2, inner=True)
+    if timer is not None:
+        start = timer.add('make_headword', start)
+    # Extract the dictionary definition:
+    s3 = make_definition_from_element(s3)
+    if timer is not None:
+        timer.add('make_definition', start)
+    # Concatenate label, word, definition, and tag group:
+    entry = template_entry(label, short, long, s3)
     if verbose:  # print to debug:
         from GDLC.debug.debug import print_output
         print_output(entry)
@@ -1155,12 +2069,12 @@ def make_entry_idx(name='Catalan', scriptable='yes', spell='yes'):
         name (str), scriptable (str), spell (str): <idx:entry> attributes
     Returns:
         <idx:entry> tag with attributes.
+    Functions:
+        `Template`
     Notes:
-        A sequential 'id' attribute will be added separately to <idx:entry>.
+        A sequential 'id' attribute will be added separately to <idx:entry>. The tag with the default values is part of the template of `template_entry()`, so this is not called for each entry.
     """
-    attrs = [name, scriptable, spell]
-    entry = '<idx:entry name="{0}" scriptable="{1}" spell="{2}">'.format(*attrs)
-    return entry
+    return TEMPLATE_ENTRY_IDX(name=name, scriptable=scriptable, spell=spell)
 
 
 def make_headword(soup:Tag):
@@ -1174,17 +2088,12 @@ def make_headword(soup:Tag):
     Modules: 
         bs4 (BeautifulSoup)
     Functions: 
-        `get_headword()`
+        `get_headword()`, `template_headword()`
     """
     # split headword into short and long forms:
     short, long = get_headword(soup)
-    # Now substitute the words into:
-    s = """
-    <div><span><b>short</b></span></div><span>long.</span>
-    """
-    s = s.replace('short', short, 1)
-    s = s.replace('long', long, 1)
-    headword = s.strip()
+    # Now substitute the words into the template:
+    headword = template_headword(short, long)
     return headword
 
 
@@ -1197,24 +2106,180 @@ def make_label(soup:Tag):
     Returns:
         label (str): label used to identify the dictionary entry
     Modules: 
-        bs4 (BeautifulSoup)
+        bs4 (BeautifulSoup), re
+    Functions: 
+        `get_label()`, `template_label()`
     """
-    # extract tag content:
-    s = soup.get_text()
-    label = ''.join(re.findall('[^\W\d_]', s))
-    # Now substitute the label into:
-    s = """
-    <idx:orth value="label">
-      <idx:infl>
-        <idx:iform name="" value="label"/>
-      </idx:infl>
-    </idx:orth>
-    """
-    s = s.replace('label', label, 2)
-    label = str(s).strip()
+    # extract the letters of the tag content:
+    label = get_label(soup)
+    # Now substitute the label into the template:
+    label = template_label(label)
     return label
 
 
+def make_strip_pipeline(tags=(), attrs=(), classes=(), comments=False, anchor_ids=False, empty_tags=False, strip_lines=False, spaces=False):
+    """
+    Compile a selection of strip operations into a single function that cleans a soup in one tree walk.
+
+    Args:
+        tags ([str]): tags to be unwrapped, as in `strip_tags()`
+        attrs ([str]): attributes to be deleted, as in `strip_attrs()`
+        classes ([str]): tags to be unclassed, as in `strip_classes()`
+        comments (bool): remove comments, as in `strip_comments()`
+        anchor_ids (bool): remove id attributes, as in `strip_anchor_from_id()`
+        empty_tags (bool): remove tags without text, as in `strip_empty_tags()`
+        strip_lines (bool): passed down to `extract(strip=strip_lines)` when removing empty tags
+        spaces (bool): strip excess white spaces, as in `strip_spaces_from_soup()`
+    Returns:
+        strip (function): takes a BeautifulSoup object or Tag, edits it in place and returns it. The selected rules are kept in `strip.rules`.
+    Modules:
+        bs4 (BeautifulSoup, Tag, NavigableString, Comment, CData), re
+    Functions:
+        `patched extract()` from module GDLC
+    Notes:
+        The tree is visited in post-order, so that every node is seen after its children have been cleaned. On each node, the rules are applied in this order: comments, attributes, classes, tags, empty tags, spaces. This is the order in which the `strip_*` functions would be called one after another, each walking the whole tree.
+        As with `soup.find_all()`, the rules apply to the descendants of the soup, not to the soup itself.
+    """
+    tags, classes = frozenset(tags), frozenset(classes)
+    attrs = tuple(attrs) + (('id',) if anchor_ids and 'id' not in attrs else ())
+    rules = {'tags': tags, 'attrs': attrs, 'classes': classes, 'comments': comments, 'empty_tags': empty_tags, 'strip_lines': strip_lines, 'spaces': spaces}
+    _multiple_spaces = re.compile(r'\s+')
+    _space_dot = re.compile(' .')
+
+    def strip(soup):
+        # a tag has text if a descendant string, comments excluded, is not blank:
+        has_text = {}
+        stack = [(soup, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents) if isinstance(child, Tag))
+                continue
+            if comments:
+                for child in [c for c in node.contents if isinstance(c, Comment)]:
+                    child.extract(strip=True)
+            has_text[id(node)] = any(has_text.get(id(child), False) if isinstance(child, Tag)
+                                     else type(child) in (NavigableString, CData) and bool(child.strip())
+                                     for child in node.contents)
+            if node is soup:
+                break
+            for attr in attrs:
+                if attr in node.attrs:
+                    del node.attrs[attr]
+            if node.name in classes and 'class' in node.attrs:
+                del node.attrs['class']
+            if node.name in tags:
+                node.unwrap()
+                continue
+            if empty_tags and not has_text[id(node)]:
+                node.extract(strip=strip_lines)
+                continue
+            if spaces and len(node.contents) == 1 and isinstance(node.contents[0], NavigableString) and node.string:
+                string = _multiple_spaces.sub(' ', node.string.strip())
+                if _space_dot.search(string):
+                    string = string.strip(' .') + '.'
+                if string != node.string or type(node.string) is not NavigableString:
+                    node.string.replace_with(string)
+        return soup
+
+    strip.rules = rules
+    return strip
+
+
+class Normalizer:
+    """
+    Text normalizer compiled once from a list of rules, and applied to a string in a single scan.
+
+    Args:
+        literals ({str:str}, optional): literal strings and their replacements
+        patterns ([(str, str)], optional): regular expressions and their replacements. The replacements are plain strings, the patterns should not hold capturing groups.
+        ignorecase (bool, optional): if True, match regardless of case
+        strip (bool, optional): if True, strip leading and trailing white space from the result
+    Modules:
+        re
+    Notes:
+        All rules are joined into one alternation, compiled once. The literals come first, longest first, so that at each position the longest literal wins, as with an Aho-Corasick automaton, and the scan runs in the C regular expression engine. Each string is then read once, however many rules there are, where chained `str.replace()` and `re.sub()` calls read it once per rule.
+    Usage:
+        normalize = Normalizer({'->': '', '-&gt;': ''}, [(r'\n+', '\n')], strip=True)
+        normalize(text)
+    """
+    __slots__ = ('literals', 'replacements', 'ignorecase', 'pattern', 'strip', 'constant')
+
+    def __init__(self, literals=None, patterns=(), ignorecase=False, strip=False):
+        literals = dict(literals or {})
+        alternatives, self.replacements = [], {}
+        if literals:
+            alternatives.append('(?P<literal>' + '|'.join(re.escape(literal) for literal in sorted(literals, key=len, reverse=True)) + ')')
+        for i, (pattern, replacement) in enumerate(patterns):
+            alternatives.append('(?P<rule' + str(i) + '>' + pattern + ')')
+            self.replacements['rule' + str(i)] = replacement
+        self.literals = {(literal.lower() if ignorecase else literal): replacement for literal, replacement in literals.items()}
+        self.ignorecase = ignorecase
+        self.pattern = re.compile('|'.join(alternatives), flags=re.IGNORECASE if ignorecase else 0) if alternatives else None
+        self.strip = strip
+        # when all rules have the same replacement, e.g. removals, no Python call is made per match:
+        constants = set(self.literals.values()) | set(self.replacements.values())
+        self.constant = constants.pop().replace('\\', '\\\\') if len(constants) == 1 else None
+
+    def replace(self, match) -> str:
+        """Return the replacement of a match, from the rule that matched."""
+        if match.lastgroup == 'literal':
+            text = match.group()
+            return self.literals[text.lower() if self.ignorecase else text]
+        return self.replacements[match.lastgroup]
+
+    def __call__(self, text: str) -> str:
+        if self.pattern is not None:
+            text = self.pattern.sub(self.replace if self.constant is None else self.constant, text)
+        return text.strip() if self.strip else text
+
+
+# the normalizers used for every entry, compiled once:
+# the <xml> header, in case one was inserted by the parser, and excess blank lines of a definition, i.e. each newline followed by another:
+normalize_definition = Normalizer({'<?xml version="1.0" encoding="utf-8"?>': ''}, [(r'\n(?=\n)', '')], ignorecase=True, strip=True)
+normalize_arrows = Normalizer({'->': '', '-&gt;': ''})
+normalize_spaces = Normalizer(patterns=[(r'\s{2,}', ' ')])
+
+
+def normalize_blank_strings(element) -> None:
+    """
+    Reduce blank strings inside an lxml element to a single newline or space.
+    BeautifulSoup does this while parsing, so `make_entry_from_element()` needs it to match `make_entry()`.
+
+    Args:
+        element (lxml.etree._Element): element edited in place, tail excluded
+    """
+    blank = ' \t\n\r\f'
+    for item in element.iter():
+        if item.text and not item.text.strip(blank):
+            item.text = '\n' if '\n' in item.text else ' '
+        if item is not element and item.tail and not item.tail.strip(blank):
+            item.tail = '\n' if '\n' in item.tail else ' '
+    return None
+
+
+def read_manifest(dir) -> dict:
+    """
+    Read the build manifest saved by `main_loop()` in the output directory.
+
+    Args:
+        dir (str): path to output directory
+    Returns:
+        manifest ({str:{str:str}}): for each output file name, the input hash, GDLC version, code and options fingerprints. Empty if no manifest is found.
+    Modules: 
+        json, pathlib (Path)
+    """
+    file = Path(dir) / manifest_name()
+    if not file.is_file():
+        return {}
+    try:
+        with open(file, encoding='utf8') as infile:
+            return json.load(infile)
+    except ValueError:  # a corrupted manifest triggers a full rebuild
+        return {}
+
+
 def replace_strings(text:str, *args:str, replace=''):
     """
     Replaces all occurrences of the second argument in the first argument with the third. 
@@ -1226,18 +2291,83 @@ def replace_strings(text:str, *args:str, replace=''):
         *args (str): variable number of arguments
     Returns:
         text(str): string with given substrings(s) removed
+    Functions:
+        `get_normalizer()`
+    Notes:
+        All strings are replaced in a single scan of the text, the longest first where several match at the same position.
     """
-    for arg in args:
-        text = text.replace(arg, replace)
+    text = get_normalizer(args, replace)(text)
     return text
 
 
+def serialize_element(element, parts: list, void=()) -> None:
+    """
+    Append the markup of an lxml element to a list of strings, BeautifulSoup style. 
+    Called recursively by `get_markup_from_element()`, which joins the list once.
+
+    Args:
+        element (lxml.etree._Element): element to be serialized, tail excluded
+        parts ([str]): list of strings, extended in place
+        void ({str}): names of void tags, see `list_void_tags()`
+    Functions: 
+        `escape_text()`, `escape_attr()`
+    """
+    tag = element.tag
+    # comments and processing instructions have a callable tag:
+    if not isinstance(tag, str):
+        if element.text is not None and tag.__name__ == 'Comment':
+            parts.append('<!--' + element.text + '-->')
+        return None
+    parts.append('<' + tag)
+    for key, value in element.items():
+        if key == 'class':
+            value = ' '.join(value.split())
+        parts.append(' ' + key + '=' + escape_attr(value))
+    if tag in void and not element.text and not len(element):
+        parts.append('/>')
+        return None
+    parts.append('>')
+    if element.text:
+        parts.append(escape_text(element.text))
+    for child in element:
+        serialize_element(child, parts, void)
+        if child.tail:
+            parts.append(escape_text(child.tail))
+    parts.append('</' + tag + '>')
+    return None
+
+
+def split_element(element):
+    """
+    Splits an lxml dictionary entry into three parts, as `split_entry()` does for BeautifulSoup.
+
+    Args:
+        element (lxml.etree._Element): A complete dictionary definition
+    Returns:
+        s1, s2, s3: A 3-tuple of lxml elements. s1 and s2 are empty strings if missing.
+    Functions: 
+        `extract_element()`
+    """
+    s1, s2 = '', ''
+    # slice s1: word label for lookup
+    f = [p for p in element.iterdescendants('p') if 'rf' in p.get('class', '').split()]
+    for p in f:
+        s1 = extract_element(next(element.iterdescendants('p')), strip=True)
+    # slice s2: word long and short forms 
+    f = [p for p in element.iterdescendants('p') if 'df' in p.get('class', '').split()]
+    for p in f:
+        s2 = extract_element(next(element.iterdescendants('p')), strip=True)
+    # slice s3: word definition
+    s3 = element
+    return s1, s2, s3
+
+
 def split_entry(soup:BeautifulSoup):
     """
     Splits dictionary entry into three parts. 
 
     Args:
-        soup (BeautifulSoup): A complete dictionary definition
+        soup (BeautifulSoup, Tag): A complete dictionary definition
     Returns:
         s1, s2, s3: A 3-tuple of BeautifulSoup objects.
     Modules: 
@@ -1259,28 +2389,51 @@ def split_entry(soup:BeautifulSoup):
             s2 = soup.p.extract(strip=True)
     # slice s3: word definition
     # p tags with classes rf and df were removed above
-    # save the part enclosed in blockquotes
-    s3 = soup.find('blockquote')
+    # save the part enclosed in blockquotes, the entry itself if it is a blockquote
+    s3 = soup if soup.name == 'blockquote' else soup.find('blockquote')
     return s1, s2, s3
 
 
-def strip_anchor(soup: BeautifulSoup) -> BeautifulSoup:
+def strip_anchor(soup: BeautifulSoup, ids=None) -> BeautifulSoup:
     """
     Loop through every anchor and strip it, without editing content. 
 
     Args:
         soup (BeautifulSoup): A BeautifulSoup object
+        ids ({str} or {str:[str]}, optional): ids found in other files, e.g. the index returned by `get_id_index()`, to resolve cross-file anchors such as `part0017.xhtml#d00401`. Either a set of ids, or a mapping from id to the name of the file, or list of files, that contain it.
     Returns:
-        Wrapper around `strip_anchor_href()` and `strip_anchor_id()`
+        soup (BeautifulSoup): with resolved <a> tags unwrapped and id attributes removed
     Modules: 
-        bs4 (BeautifulSoup), re (compile)
-    """
-    # For each anchor found in "id", search the anchor in "href":
-    for tag_id in soup.find_all(attrs={'id':True}):
-        id = str(tag_id['id'])
-        for tag_a in soup.find_all('a', href=re.compile(id)):
-            tag_a.unwrap()
-        del tag_id['id']
+        bs4 (BeautifulSoup), pathlib (Path)
+    Notes:
+        The <a> tags are indexed by href fragment in a single pass, so each id is resolved with one lookup instead of a search of the whole document.
+        An anchor is resolved if its fragment is an id of the soup, or, with `ids` given as a mapping, if its fragment is an id of the file it points to.
+    """
+    # index <a> tags by the fragment of their href, and collect ids, in one pass:
+    anchors, tags_id = {}, []
+    for tag in soup.find_all(True):
+        if tag.name == 'a' and tag.has_attr('href'):
+            file, _, fragment = str(tag['href']).rpartition('#')
+            anchors.setdefault(fragment, []).append((Path(file).name, tag))
+        if tag.has_attr('id'):
+            tags_id.append(tag)
+    local = {str(tag['id']) for tag in tags_id}
+    for fragment, items in anchors.items():
+        if fragment in local:
+            targets = None  # any file
+        elif ids is not None and fragment in ids:
+            targets = ids[fragment] if isinstance(ids, dict) else None
+            if isinstance(targets, (str, Path)):
+                targets = [targets]
+            if targets is not None:
+                targets = {Path(target).name for target in targets}
+        else:
+            continue
+        for file, tag in items:
+            if targets is None or file in targets:
+                tag.unwrap()
+    for tag in tags_id:
+        del tag['id']
     return soup
 
 
@@ -1324,8 +2477,8 @@ def strip_arrows(text:str):
     Note: 
         Attempts two approaches found to work in different situtations.
     """
-    # not worth checking for existence before attempting to replace:
-    text = replace_strings(text, '->', '-&gt;', replace='')
+    # not worth checking for existence before attempting to replace, both in one pass:
+    text = normalize_arrows(text)
     return text
 
 
@@ -1430,18 +2583,17 @@ def strip_empty_tags(soup:BeautifulSoup, strip_lines=False):
 
 def strip_header(dml:str, header='<?xml version="1.0" encoding="utf-8"?>'):
     """
-    Remove <xml> header using the re module to make case-insensitive replacement.
+    Remove <xml> header with a case-insensitive `Normalizer`, compiled once for each header.
 
     Args: 
         xml (str): an xml page
         header (str): a header, defaults to standard <xml> header.
     Returns:
         xml (str): an xml page with xml header removed
-    Modules: 
-        re
+    Functions: 
+        `get_normalizer()`
     """
-    esc = re.escape(header) 
-    dml = re.sub(esc, '', dml, flags=re.IGNORECASE | re.MULTILINE).strip()
+    dml = get_normalizer((header,), '', ignorecase=True, strip=True)(dml)
     return dml
 
 
@@ -1499,7 +2651,7 @@ def strip_spaces_from_string(html):
     Note:
         Leaves undesired spaces in some cases. 
     """
-    html = re.sub('\s{2,}', ' ', html)
+    html = normalize_spaces(html)
     return html
 
 
@@ -1544,6 +2696,67 @@ def strip_tags(soup:BeautifulSoup, *args:str):
     return soup
 
 
+class Template:
+    """
+    A markup template parsed once into literal and slot segments.
+
+    Args:
+        text (str): the template, with slots written `{name}`. A slot may appear more than once.
+        raw (tuple, optional): names of the slots that take markup, inserted as is. The values of the other slots are escaped with `escape_xml()`.
+    Modules:
+        string
+    Notes:
+        Rendering copies the list of segments, fills in the slots and joins the list, so the template is never scanned again, and a value is never taken for a slot, as happens with chained `str.replace()` calls when a value holds the name of a later slot.
+    Usage:
+        template = Template('<b>{word}</b><span>{markup}</span>', raw=('markup',))
+        template(word='A&B', markup='<i>x</i>')  # '<b>A&amp;B</b><span><i>x</i></span>'
+    """
+    __slots__ = ('segments', 'slots')
+
+    def __init__(self, text, raw=()):
+        self.segments, self.slots = [], []
+        for literal, name, _, _ in string.Formatter().parse(text):
+            if literal:
+                self.segments.append(literal)
+            if name is not None:
+                self.slots.append((len(self.segments), name, name in raw))
+                self.segments.append('')
+
+    def __call__(self, **values) -> str:
+        segments = self.segments.copy()
+        for i, name, raw in self.slots:
+            segments[i] = values[name] if raw else escape_xml(values[name])
+        return ''.join(segments)
+
+
+# the markup of an entry, with the slots of `Template`:
+ENTRY_LABEL = '<idx:orth value="{label}">\n      <idx:infl>\n        <idx:iform name="" value="{label}"/>\n      </idx:infl>\n    </idx:orth>'
+ENTRY_HEADWORD = '<div><span><b>{short}</b></span></div><span>{long}.</span>'
+
+# the templates, compiled once:
+TEMPLATE_ENTRY_IDX = Template('<idx:entry name="{name}" scriptable="{scriptable}" spell="{spell}">')
+TEMPLATE_LABEL = Template(ENTRY_LABEL)
+TEMPLATE_HEADWORD = Template(ENTRY_HEADWORD, raw=('long',))
+TEMPLATE_ENTRY = Template(make_entry_idx() + '\n' + ENTRY_LABEL + ENTRY_HEADWORD + '{definition}\n</idx:entry>', raw=('long', 'definition'))
+
+
+def template_entry(label: str, short: str, long: str, definition: str) -> str:
+    """
+    Returns a whole <idx:entry>, assembled with a single join.
+
+    Args:
+        label (str): letters of the entry, escaped
+        short (str): short form of the headword, escaped
+        long (str): long form of the headword, as markup
+        definition (str): the definition, as markup
+    Returns:
+        entry (str): `make_entry_idx()`, `template_label()`, `template_headword()`, the definition and the closing tag
+    Functions:
+        `Template`
+    """
+    return TEMPLATE_ENTRY(label=label, short=short, long=long, definition=definition)
+
+
 def template_head() -> str:
     """Returns the default GDLC <head> tag and attributes."""
     return '''\
@@ -1553,6 +2766,26 @@ def template_head() -> str:
 <link href="../Styles/style0002.css" rel="stylesheet" type="text/css"/>'''
 
 
+def template_page() -> tuple:
+    """
+    Returns the text of a dictionary page before and after the entries.
+
+    Returns:
+        start, end (str): the <xml> declaration, the <html> tag with the Kindle namespaces, the <head>, and the opening <body> and <mbp:frameset> tags / the closing tags
+    Functions: 
+        `template_xml()`, `template_html()`, `template_head()`
+    """
+    html = template_html().replace('</html>', '').strip()
+    start = template_xml() + '\n' + html + '\n<head>\n' + template_head() + '\n</head>\n<body>\n<mbp:frameset>\n'
+    end = '</mbp:frameset>\n</body>\n</html>\n'
+    return start, end
+
+
+def template_headword(short: str, long: str) -> str:
+    """Returns the headword markup with short and long forms substituted. The short form is escaped, the long form is markup."""
+    return TEMPLATE_HEADWORD(short=short, long=long)
+
+
 def template_html() -> str:
     """Returns the default Amazon Kindle dictionary <root> tag"""
     return '''\
@@ -1587,11 +2820,48 @@ def template_html_insert(tag: Tag) -> Tag:
     return tag
 
 
+def template_label(label: str) -> str:
+    """Returns the <idx:orth> markup with the label substituted and escaped."""
+    return TEMPLATE_LABEL(label=label)
+
+
 def template_xml() -> str:
     """Returns an <xml> tag with attributes"""
     return '<?xml version="1.0" encoding="UTF-8"?>'
 
 
+def unwrap_element(element):
+    """
+    Replace an lxml element by its content, like the BeautifulSoup `.unwrap()` method.
+
+    Args:
+        element (lxml.etree._Element): element to be removed, its text and children are kept
+    Returns:
+        element (lxml.etree._Element): the element, emptied and no longer part of the tree
+    """
+    parent = element.getparent()
+    previous = element.getprevious()
+    text, tail = element.text or '', element.tail or ''
+    children = list(element)
+    # the element text goes to the previous sibling, or to the parent:
+    if previous is None:
+        parent.text = (parent.text or '') + text
+    else:
+        previous.tail = (previous.tail or '') + text
+    # the element tail goes to the last child, or after the text:
+    if children:
+        children[-1].tail = (children[-1].tail or '') + tail
+        for child in children:
+            element.addprevious(child)
+    elif previous is None:
+        parent.text = parent.text + tail
+    else:
+        previous.tail = previous.tail + tail
+    element.tail = None
+    parent.remove(element)
+    return element
+
+
 def validate_entry(soup:BeautifulSoup, verbose=False):
     """
     Removes invalid dictionary entries.
@@ -1627,3 +2897,40 @@ def version_check(raise_exception=True):
         if raise_exception:
             raise Exception('Aborting. This implementation of GDLC relies on the built-in ordering of ordinary dictionaries introduced in Python 3.6. In earlier versions of Python, dictionaries did not preserve order of insertion. For earlier versions of Python, an `OrderedDict` should be used instead. Changes to the code are required in `make_dictionary()`. Set `raise_exception=False` to proceed anyway.')
     return None
+
+
+def write_manifest(dir, manifest: dict) -> None:
+    """
+    Save the build manifest in the output directory. See `read_manifest()`.
+
+    Modules: 
+        json, os, pathlib (Path)
+    """
+    file = Path(dir) / manifest_name()
+    # write to a temporary file first, so an interrupted run leaves the old manifest intact:
+    temp = file.with_suffix('.tmp')
+    with open(temp, 'w', encoding='utf8') as outfile:
+        json.dump(manifest, outfile, indent=1, sort_keys=True)
+    os.replace(temp, file)
+    return None
+
+
+def write_page(stream, entries) -> None:
+    """
+    Write a dictionary page, streaming the entries one at a time.
+
+    Args:
+        stream (file): a text stream open for writing, e.g. an output file
+        entries ([str] or [Entry]): formatted entries, e.g. the records yielded by `iter_dictionary()`
+    Functions: 
+        `template_page()`
+    Notes:
+        The head of the page is written as precomputed text and the entries are written as they are, so the page is never parsed. Replaces `make_dml_from_soup()` in `main_loop()`.
+    """
+    start, end = template_page()
+    stream.write(start)
+    for entry in entries:
+        stream.write(str(entry))
+        stream.write('\n')
+    stream.write(end)
+    return None
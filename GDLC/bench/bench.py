@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC benchmarks
+
+Time the main functions of GDLC on fixed inputs: a bundled sample, and chosen part files of the dictionary if the source files are found. For each function and each input, report the time, entries/s, MB/s and the peak resident memory (RSS).
+
+Each benchmark runs in a fresh worker process, so that the peak memory of one benchmark does not hide that of the next. The inputs are prepared before the clock starts, e.g. files are read and parsed before timing `make_entry()`. The best of `repeat` runs is reported.
+
+Results are appended to a json history file. Two runs of the history may be compared, flagging the benchmarks that became slower than a threshold.
+
+Usage:
+    $ python -m GDLC.bench.bench run --history bench.json --label "before"
+    $ python -m GDLC.bench.bench run --history bench.json --label "after"
+    $ python -m GDLC.bench.bench compare --history bench.json --threshold 0.1
+
+    or from python:
+        results = run_benchmarks(history='bench.json')
+        regressions = compare_benchmarks('bench.json')
+
+Created 18 October 2026
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from GDLC import GDLC
+from GDLC.index.index import scan_blockquotes
+from GDLC.memory import memory
+
+# a small page with typical entries, always available:
+SAMPLE = '''\
+<?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+  <title>TITLE</title>
+  <meta content="text/html; charset=utf-8" http-equiv="Content-Type"/>
+  <link href="../Styles/style0001.css" rel="stylesheet" type="text/css"/>
+</head>
+<body>
+  <h2 class="centrat2" id="aid-F8901">A</h2>
+  <blockquote class="calibre27" id="d34421">
+    <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+    <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+    <p class="ps">Definition <em class="calibre24">here</em>.</p>
+    <p class="p">More details <span class="v1">here</span>.</p>
+    <p class="p">Even more details <a class="calibre17" href="part0120.xhtml#d34479">here</a>.</p>
+  </blockquote>
+  <blockquote class="calibre27" id="d34479">
+    <p class="rf">-&gt;dofí</p>
+    <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">dofí</strong></code></p>
+    <p class="ps"><em class="v">m</em> <strong class="n">1</strong> <span class="v1">ZOOL</span> Nom donat a diversos cetacis.</p>
+    <!-- comment -->
+    <p class="p"><span class="v1"> </span></p>
+  </blockquote>
+</body>
+</html>
+'''
+
+# part files timed by default, if found in the source directory:
+PARTS = ['part0017.xhtml', 'part0100.xhtml', 'part0156.xhtml']
+
+TAGS, CLASSES, PROTECTED = ['blockquote'], ['calibre27'], ['h1', 'h2', 'h3', 'h4', 'h5', '\n']
+
+
+def get_source_dir() -> Path:
+    """Returns the default directory of the source part files."""
+    return Path(__file__).resolve().parents[2] / 'source' / 'GDLC_unpacked' / 'mobi8' / 'OEBPS' / 'Text'
+
+
+def get_peak_rss() -> float:
+    """
+    Returns the peak resident memory of the current process in MB, or None if it cannot be measured.
+
+    Modules:
+        GDLC (memory)
+    Functions:
+        `memory.get_peak_rss()`
+    """
+    rss = memory.get_peak_rss()
+    return None if rss is None else rss / memory.MB
+
+
+def parse(file):
+    """Parse a file with BeautifulSoup."""
+    with open(file, encoding='utf8') as infile:
+        return GDLC.BeautifulSoup(infile, features='lxml')
+
+
+def list_benchmarks() -> dict:
+    """
+    Returns the benchmarks, each a pair of functions `(setup, run)`.
+
+    Notes:
+        `setup(file)` prepares the input and is not timed. `run(input)` is timed.
+    """
+    def entries(file):
+        return [child for child in parse(file).body.find_all(TAGS, recursive=False) if any(c in child.get('class', []) for c in CLASSES)]
+
+    def main_loop(file):
+        # a fresh output directory for each run, removed at once, so that no output is left behind:
+        with tempfile.TemporaryDirectory() as dir, contextlib.redirect_stdout(io.StringIO()):
+            GDLC.main_loop([file], dir=dir, tags=TAGS, classes=CLASSES, protected=PROTECTED, progress=False, query=False)
+
+    pipeline = GDLC.make_strip_pipeline(tags=['a', 'code'], attrs=['date', 'id'], classes=['em', 'strong', 'sup'], comments=True, empty_tags=True, spaces=True)
+    return {
+        'markup_handler': (lambda file: Path(file).read_text(encoding='utf8'), GDLC.markup_handler),
+        'make_entry': (entries, lambda children: [GDLC.make_entry(child) for child in children]),
+        'make_dictionary': (lambda file: parse(file).body, lambda body: GDLC.make_dictionary(body, tags=TAGS, classes=CLASSES, protected=PROTECTED, progress=False)),
+        'make_dictionary_stream': (lambda file: file, lambda file: GDLC.make_dictionary(file, tags=TAGS, classes=CLASSES, protected=PROTECTED, progress=False, engine='lxml-stream')),
+        'main_loop': (lambda file: file, main_loop),
+        'strip_attrs': (parse, lambda soup: GDLC.strip_attrs(soup, 'date', 'id')),
+        'strip_classes': (parse, GDLC.strip_classes),
+        'strip_tags': (parse, GDLC.strip_tags),
+        'strip_comments': (parse, GDLC.strip_comments),
+        'strip_empty_tags': (parse, GDLC.strip_empty_tags),
+        'strip_anchor': (parse, GDLC.strip_anchor),
+        'strip_spaces': (parse, GDLC.strip_spaces),
+        'make_strip_pipeline': (parse, pipeline),
+    }
+
+
+def run_benchmark(name, file, repeat=3) -> dict:
+    """
+    Time one benchmark on one file. Called by `run_benchmarks()` inside a worker process.
+
+    Args:
+        name (str): name of the benchmark, a key of `list_benchmarks()`
+        file (str): path to the input file
+        repeat (int): number of runs, the best time is kept
+    Returns:
+        result ({str:float}): seconds, entries/s, MB/s, peak RSS in MB, and the size of the input
+    Modules:
+        time, warnings
+    Functions:
+        `list_benchmarks()`, `get_peak_rss()`, `index.scan_blockquotes()`
+    """
+    import warnings
+    warnings.filterwarnings('ignore')
+    setup, run = list_benchmarks()[name]
+    size = Path(file).stat().st_size
+    with open(file, 'rb') as infile:
+        n = len(scan_blockquotes(infile.read()))
+    times = []
+    for _ in range(repeat):
+        data = setup(file)
+        start = time.perf_counter()
+        run(data)
+        times.append(time.perf_counter() - start)
+    seconds = min(times)
+    result = {
+        'seconds': seconds,
+        'entries': n,
+        'bytes': size,
+        'entries_per_s': n / seconds if seconds else None,
+        'mb_per_s': size / memory.MB / seconds if seconds else None,
+        'peak_rss_mb': get_peak_rss(),
+    }
+    return result
+
+
+def run_benchmarks(files=None, names=None, repeat=3, history=None, label=None, verbose=True) -> dict:
+    """
+    Run the benchmarks and optionally save the results.
+
+    Args:
+        files ([str], optional): input files. Defaults to the bundled sample and the part files in `PARTS`, if found.
+        names ([str], optional): benchmarks to run. Defaults to all of `list_benchmarks()`.
+        repeat (int): number of runs of each benchmark, the best time is kept
+        history (str, optional): path to a json history file, the results are appended to it
+        label (str, optional): a label saved with the results, e.g. a branch name
+    Returns:
+        record ({str:any}): date, label, GDLC version, and results keyed by 'benchmark file'
+    Modules:
+        concurrent.futures (ProcessPoolExecutor), json, tempfile
+    Functions:
+        `run_benchmark()`, `print_benchmarks()`
+    """
+    if names is None:
+        names = list(list_benchmarks())
+    results = {}
+    # the bundled sample is written to a temporary directory, removed after the run:
+    with tempfile.TemporaryDirectory() as tmp:
+        if files is None:
+            sample = Path(tmp) / 'sample.xhtml'
+            sample.write_text(SAMPLE, encoding='utf8')
+            files = [sample] + [get_source_dir() / part for part in PARTS if (get_source_dir() / part).is_file()]
+        for name in names:
+            for file in files:
+                # a fresh process for each benchmark, so that the peak memory is its own:
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    result = executor.submit(run_benchmark, name, str(file), repeat).result()
+                results[name + ' ' + Path(file).name] = result
+    record = {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'label': label, 'version': GDLC.__version__, 'results': results}
+    if verbose:
+        print_benchmarks(record)
+    if history:
+        records = read_history(history)
+        records.append(record)
+        Path(history).expanduser().write_text(json.dumps(records, indent=1), encoding='utf8')
+    return record
+
+
+def read_history(history) -> list:
+    """Returns the records saved in a json history file, oldest first, or an empty list."""
+    path = Path(history).expanduser()
+    if not path.is_file():
+        return []
+    return json.loads(path.read_text(encoding='utf8'))
+
+
+def print_benchmarks(record) -> None:
+    """Print the results of a run as a table."""
+    print('{:<45} {:>10} {:>12} {:>9} {:>10}'.format('benchmark', 'seconds', 'entries/s', 'MB/s', 'peak MB'))
+    for key, result in record['results'].items():
+        print('{:<45} {:>10.4f} {:>12.0f} {:>9.2f} {:>10}'.format(key, result['seconds'], result['entries_per_s'] or 0, result['mb_per_s'] or 0,
+            '{:.0f}'.format(result['peak_rss_mb']) if result['peak_rss_mb'] is not None else '-'))
+    return None
+
+
+def compare_benchmarks(history, base=-2, head=-1, threshold=0.1, verbose=True) -> dict:
+    """
+    Compare two runs saved in a history file and flag regressions.
+
+    Args:
+        history (str): path to a json history file
+        base, head (int): positions of the runs to compare in the history, defaults to the last two runs
+        threshold (float): relative slow-down above which a benchmark is flagged, e.g. 0.1 for 10%
+    Returns:
+        regressions ({str:float}): for each benchmark slower than the threshold, its relative change in time
+    """
+    records = read_history(history)
+    if len(records) < 2:
+        print('Nothing to compare: the history holds', len(records), 'run(s).')
+        return {}
+    base, head = records[base], records[head]
+    regressions = {}
+    if verbose:
+        print('{:<45} {:>10} {:>10} {:>8}'.format('benchmark', 'base', 'head', 'change'))
+    for key, result in head['results'].items():
+        if key not in base['results']:
+            continue
+        before, after = base['results'][key]['seconds'], result['seconds']
+        change = (after - before) / before if before else 0.0
+        flag = change > threshold
+        if flag:
+            regressions[key] = change
+        if verbose:
+            print('{:<45} {:>10.4f} {:>10.4f} {:>+7.0%}{}'.format(key, before, after, change, '  REGRESSION' if flag else ''))
+    return regressions
+
+
+def main(argv=None):
+    """Command line interface: `run` or `compare`. Returns 1 if regressions are found, 0 otherwise."""
+    parser = argparse.ArgumentParser(prog='python -m GDLC.bench.bench', description='Benchmark the GDLC functions.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='run the benchmarks')
+    run.add_argument('files', nargs='*', help='input files, defaults to the bundled sample and chosen part files')
+    run.add_argument('--names', nargs='*', help='benchmarks to run, defaults to all: ' + ', '.join(list_benchmarks()))
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--history', help='json file the results are appended to')
+    run.add_argument('--label')
+    compare = commands.add_parser('compare', help='compare two runs of the history')
+    compare.add_argument('--history', required=True)
+    compare.add_argument('--base', type=int, default=-2)
+    compare.add_argument('--head', type=int, default=-1)
+    compare.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run_benchmarks(files=args.files or None, names=args.names, repeat=args.repeat, history=args.history, label=args.label)
+        return 0
+    regressions = compare_benchmarks(args.history, base=args.base, head=args.head, threshold=args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
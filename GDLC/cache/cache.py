@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC entry cache
+
+On-disk cache of formatted dictionary entries, used by `make_dictionary()` to skip the `split_entry()`, `make_label()`, `make_headword()`, `make_definition()` pipeline for entries seen in a previous build. 
+
+The cache maps a digest of the raw markup of an entry and of the transform options to the finished <idx:entry> string. The options include `get_code_fingerprint()`, a digest of the source of the transform modules, `GDLC.py` and `inflect/inflect.py`: any change to the transform code gives new keys, so a rebuild after a code fix never serves entries formatted by the old code. The entries of the old keys are evicted in time. It is stored in a SQLite database and bounded in size: the least recently used entries are evicted when the cache is closed.
+
+Usage:
+    with EntryCache('~/GDLC/cache/entries.sqlite') as cache:
+        dico = make_dictionary(body, cache=cache)
+
+    or, for a whole run:
+        main_loop(files, dir, cache='~/GDLC/cache/entries.sqlite')
+
+Created 18 October 2026
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+
+def get_entry_key(markup: str, options=None) -> str:
+    """
+    Digest of the raw markup of an entry and of the options used to transform it.
+
+    Args:
+        markup (str): raw markup of the entry, before any transformation
+        options ({str:any}): transform options, e.g. version, code fingerprint, features
+    Returns:
+        key (str): hexadecimal digest
+    Modules: 
+        hashlib, json
+    """
+    h = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode('utf8'))
+    h.update(b'\0')
+    h.update(markup.encode('utf8'))
+    return h.hexdigest()
+
+
+class EntryCache:
+    """
+    Size-bounded, least-recently-used cache of formatted entries, stored in a SQLite database.
+
+    Args:
+        path (str): path to the database file, created if it does not exist
+        max_size (int): maximum size of the cached entries in bytes, defaults to 256 MB
+    Notes:
+        New entries and hits are kept in memory and written in a single transaction by `close()`, so several worker processes may share the same database.
+    """
+    def __init__(self, path, max_size=256*1024*1024):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits, self.misses = 0, 0
+        self.new, self.used = {}, set()
+        self.db = sqlite3.connect(str(self.path), timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, size INTEGER, used REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0] + len(self.new)
+
+    def get(self, key):
+        """Return the cached entry for `key`, or None."""
+        value = self.new.get(key)
+        if value is None:
+            row = self.db.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            value = row[0] if row else None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.used.add(key)
+        return value
+
+    def put(self, key, value):
+        """Store a formatted entry. Written to disk by `flush()` or `close()`."""
+        self.new[key] = value
+
+    def flush(self):
+        """Write new entries, mark hits as recently used, and evict the least recently used entries above `max_size`."""
+        now = time.time()
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                                ((k, v, len(v.encode('utf8')), now) for k, v in self.new.items()))
+            self.db.executemany('UPDATE entries SET used = ? WHERE key = ?', ((now, k) for k in self.used))
+            self.new, self.used = {}, set()
+            self.evict()
+        return None
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in `max_size`."""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_size:
+            return 0
+        keys = []
+        for key, size in self.db.execute('SELECT key, size FROM entries ORDER BY used'):
+            if total <= self.max_size:
+                break
+            keys.append((key,))
+            total -= size
+        self.db.executemany('DELETE FROM entries WHERE key = ?', keys)
+        return len(keys)
+
+    def close(self):
+        """Flush and close the database."""
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
+        return None
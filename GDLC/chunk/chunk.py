@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC chunks
+
+Format a single large file on several cores. Working file by file, one file uses one core, e.g. when one part file is rebuilt, or for a single concatenated file such as the mobi7 rawml.
+
+The body of the file is split into contiguous chunks of entries, at the start of a top-level <blockquote>, found with the byte scan of `index.scan_blockquotes()`, without parsing the file. Anything between two entries, e.g. the <h2> heading of a letter, stays in the chunk of the entry before it. Each worker reads its own chunk from the file, wrapped in the head and tail of the file, and formats it with `main_loop_file()`, so the entries are the same as when the whole file is formatted. The formatted chunks are written back in order, into one page.
+
+Only byte offsets are sent to the workers, and only the formatted entries are sent back.
+
+Usage:
+    chunk_loop(file, outfile, workers=4)  # a single large file
+
+    main_loop(files, dir, workers=4, chunks=True)  # every file, split into chunks
+
+Created 18 October 2026
+"""
+import contextlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, wait
+from pathlib import Path
+
+
+# smallest chunk, in bytes, so that small files are not split into chunks that cost more to send than to format:
+MIN_CHUNK_SIZE = 16384
+
+
+def get_body_offsets(data: bytes) -> tuple:
+    """
+    Return the byte offsets of the content of <body>: the end of the opening tag and the start of the closing tag.
+
+    Args:
+        data (bytes or mmap): content of a source file
+    Returns:
+        start, end (int, int): `data[start:end]` is the content of <body>. The whole of `data` if there is no <body> tag.
+    Modules:
+        re
+    """
+    match = re.search(rb'<body\b[^>]*>', data)
+    start = match.end() if match else 0
+    end = data.rfind(b'</body>')
+    return start, end if end >= start else len(data)
+
+
+def get_chunk_size(size: int, workers: int) -> int:
+    """Return a chunk size that gives each worker about four chunks of a file of `size` bytes, and at least `MIN_CHUNK_SIZE`."""
+    return max(size // (4 * max(workers or 1, 1)), MIN_CHUNK_SIZE)
+
+
+def get_chunk_offsets(data: bytes, size: int) -> list:
+    """
+    Split the content of <body> into contiguous chunks of whole entries.
+
+    Args:
+        data (bytes or mmap): content of a source file
+        size (int): size of a chunk, in bytes. A chunk ends at the first entry that starts `size` bytes or more after its own start.
+    Returns:
+        offsets ([(int, int)]): start and end offsets of each chunk, in order. The chunks cover the content of <body> from end to end.
+    Functions:
+        `get_body_offsets()`, `index.scan_blockquotes()`
+    """
+    from GDLC.index.index import scan_blockquotes
+    start, end = get_body_offsets(data)
+    offsets = []
+    for entry, _ in scan_blockquotes(data):
+        if start < entry < end and entry - start >= size:
+            offsets.append((start, entry))
+            start = entry
+    offsets.append((start, end))
+    return offsets
+
+
+def read_chunk(file, offsets: tuple, body: tuple) -> bytes:
+    """Return a chunk of a file, between the head of the file up to <body> and the tail from </body>, so that it parses as a page of its own."""
+    with open(file, 'rb') as f:
+        head = f.read(body[0])
+        f.seek(offsets[0])
+        chunk = f.read(offsets[1] - offsets[0])
+        f.seek(body[1])
+        tail = f.read()
+    return head + chunk + tail
+
+
+def format_chunk(file, offsets: tuple, body: tuple, timed=False, **options):
+    """
+    Format the entries of a chunk of a file. Called inside a worker process.
+
+    Args:
+        file (str): path to the source file
+        offsets (int, int): start and end of the chunk, from `get_chunk_offsets()`
+        body (int, int): start and end of the content of <body>, from `get_body_offsets()`
+        timed (bool, optional): if True, time the stages with a new StageTimer, sent back with the result
+        Other arguments as in `main_loop_file()`.
+    Returns:
+        text (str): the formatted entries, each followed by a newline, as written by `write_page()`. With `timed=True`, the text and the StageTimer.
+    Functions:
+        `read_chunk()`, GDLC `main_loop_file()`, `main_loop_file_timed()`, `template_page()`
+    """
+    from GDLC.GDLC import main_loop_file, main_loop_file_timed, template_page
+    data = read_chunk(file, offsets, body)
+    if timed:
+        page, timer = main_loop_file_timed(file, data=data, **options)
+    else:
+        page = main_loop_file(file, data=data, **options)
+    start, end = template_page()
+    text = page[len(start):len(page) - len(end)]
+    return (text, timer) if timed else text
+
+
+def submit_chunks(executor, file, size=None, workers=None, timed=False, **options) -> list:
+    """
+    Split a file into chunks and send them to a process pool.
+
+    Args:
+        executor (ProcessPoolExecutor): the process pool
+        file (str): path to the source file
+        size (int, optional): size of a chunk, in bytes. Defaults to `get_chunk_size()`.
+        workers (int, optional): number of worker processes, used for the default size
+        Other arguments as in `format_chunk()`.
+    Returns:
+        futures ([Future]): one future per chunk, in order
+    Functions:
+        `get_chunk_offsets()`, `get_body_offsets()`, `format_chunk()`
+    """
+    with open(file, 'rb') as f:
+        data = f.read()
+    size = size or get_chunk_size(len(data), workers)
+    body = get_body_offsets(data)
+    return [executor.submit(format_chunk, file, offsets, body, timed=timed, **options) for offsets in get_chunk_offsets(data, size)]
+
+
+def write_chunks(chunks, outfile, timer=None) -> Path:
+    """
+    Write the formatted chunks of a file into one page, in order.
+
+    Args:
+        chunks ([Future]): futures returned by `submit_chunks()`
+        outfile (str): path to the output file
+        timer (StageTimer, optional): if given, the timers sent back with the chunks are merged into it
+    Returns:
+        outfile (Path): path to the output file
+    Modules:
+        contextlib, os, pathlib (Path)
+    Functions:
+        GDLC `template_page()`
+    Notes:
+        The page is written to a temporary file first, so a failed chunk leaves no partial page.
+    """
+    from GDLC.GDLC import template_page
+    outfile = Path(outfile)
+    start, end = template_page()
+    temp = Path(str(outfile) + '.tmp')
+    try:
+        with open(temp, 'w', encoding='utf8') as stream:
+            stream.write(start)
+            for chunk in chunks:
+                text = chunk.result()
+                if timer is not None:
+                    text, worker_timer = text
+                    timer.merge(worker_timer)
+                stream.write(text)
+            stream.write(end)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            temp.unlink()
+        raise
+    os.replace(temp, outfile)
+    return outfile
+
+
+def chunk_loop(file, outfile, workers=None, size=None, timer=None, **options) -> Path:
+    """
+    Format a single file in chunks of entries, on several cores.
+
+    Args:
+        file (str): path to the source file
+        outfile (str): path to the output file
+        workers (int, optional): number of worker processes. Defaults to the number of cores.
+        size (int, optional): size of a chunk, in bytes. Defaults to `get_chunk_size()`.
+        timer (StageTimer, optional): records the time spent in each stage, merged from the workers
+        options: other arguments as in `main_loop()`, see `get_loop_options()`
+    Returns:
+        outfile (Path): path to the output file, the same page as written by `main_loop_file()`
+    Modules:
+        os, concurrent.futures (ProcessPoolExecutor, wait), GDLC (progress)
+    Functions:
+        GDLC `get_loop_options()`, `submit_chunks()`, `write_chunks()`
+    """
+    from GDLC.GDLC import get_loop_options
+    workers = workers or os.cpu_count()
+    options = get_loop_options(**options)
+    progress, options['progress'] = options['progress'], False
+    initializer, initargs, reporter = None, (), None
+    if progress:
+        from GDLC.progress.progress import Progress, SharedCounter, init_worker
+        reporter = Progress(total_files=1, total_bytes=Path(file).stat().st_size)
+        initializer, initargs = init_worker, (reporter.get_counter(),)
+        options['progress'] = SharedCounter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        chunks = submit_chunks(executor, file, size=size, workers=workers, timed=timer is not None, **options)
+        # refresh the progress display while the workers run:
+        while reporter and not all(chunk.done() for chunk in chunks):
+            wait(chunks, timeout=reporter.interval)
+            reporter.poll()
+        outfile = write_chunks(chunks, outfile, timer=timer)
+    if reporter:
+        reporter.update(files=1, bytes=Path(file).stat().st_size)
+        reporter.close()
+    return outfile
@@ -14,6 +14,30 @@ import logging
 import traceback
 import time
 
+def count_parser_calls(function, *args, **kwargs):
+    """
+    Count how many times BeautifulSoup parses a document while a function runs.
+
+    Args: 
+        function (callable): function to be called with `*args` and `**kwargs`
+    Returns: 
+        result, count: the value returned by the function and the number of parser invocations
+    Modules: 
+        bs4 (BeautifulSoup)
+    """
+    count = [0]
+    feed = BeautifulSoup._feed
+    def counted_feed(self, *a, **k):
+        count[0] += 1
+        return feed(self, *a, **k)
+    BeautifulSoup._feed = counted_feed
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        BeautifulSoup._feed = feed
+    return result, count[0]
+
+
 def print_children(soup: BeautifulSoup) -> None:
     """
     Print information about all children and descendents.
@@ -60,6 +84,29 @@ def print_child_info(child: Tag) -> None:
     return None
 
 
+def print_parser_calls(soup: BeautifulSoup, tags=['blockquote'], classes=['calibre27']) -> None:
+    """
+    Print the number of parser invocations per dictionary entry in `make_entry()` and `make_dictionary()`.
+
+    Args: 
+        soup (BeautifulSoup): body of a dictionary page
+    Functions: 
+        `count_parser_calls()`, GDLC `make_entry()`, GDLC `make_dictionary()`
+    """
+    from GDLC.GDLC import make_entry, make_dictionary
+    import copy
+    children = [c for c in soup.findChildren(recursive=False) if c.name in tags]
+    n = max(len(children), 1)
+    calls = [count_parser_calls(make_entry, copy.copy(c))[1] for c in children]
+    dico, total = count_parser_calls(make_dictionary, copy.copy(soup), tags=tags, classes=classes, progress=False)
+    print('\n')
+    print('Number of entries:', len(children))
+    print('Parser invocations per entry in make_entry():     ', sum(calls)/n)
+    print('Parser invocations per entry in make_dictionary():', total/n)
+    print('\n')
+    return None
+
+
 def print_counter(i: int) -> None:
     """Print a counter. 
     """
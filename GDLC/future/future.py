@@ -231,15 +231,6 @@ def make_entry_id_from_name(soup: BeautifulSoup) -> BeautifulSoup:
 
 
 
-# IN PROGRESS:
-def make_kindle():
-    """ 
-    Invoke kindlegen to build ebook from files.
-
-    /Users/patricktoche/kindlegen/KindleGen_Mac_i386_v2_9/kindlegen 
-    """ 
-
-
 # IN PROGRESS:
 
 def strip_spacing_from_soup(soup: BeautifulSoup, strip=False, verbose=None) -> BeautifulSoup:
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC headword index
+
+SQLite index of the headwords of the dictionary, built by `main_loop()` as the output files are written. Each row records the headword, the label (the value of <idx:orth>), the short and long forms of the headword, the source file, the output file, and the byte offset, length and number of the entry in the output file.
+
+A headword is then found in well under a millisecond, and its entry is read straight from disk with a single seek, instead of searching the 68 MB of source files.
+
+Headwords are also completed from a prefix, e.g. 'hepat', with `PrefixIndex`: a sorted array of normalized keys, read from a memory map and searched by bisection, so that it opens in well under a millisecond and answers in microseconds.
+
+The source files are indexed too: `scan_blockquotes()` records the start and end byte offsets of every <blockquote> entry without parsing the file, and `read_entry()` / `iter_entries()` parse only the requested entries, sliced from a memory map of the file.
+
+Usage:
+    main_loop(files, dir, index='~/GDLC/index/headwords.sqlite')
+
+    lookup('dofí', '~/GDLC/index/headwords.sqlite')
+
+    entry = read_entry('part0100.xhtml', 42)
+    print(make_entry(entry))
+
+    build_prefix_index(files, '~/GDLC/index/prefixes.bin')
+    complete('hepat', '~/GDLC/index/prefixes.bin', k=10)
+
+Created 18 October 2026
+"""
+import html
+import json
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import unicodedata
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+
+def get_entry_fields(entry: str) -> dict:
+    """
+    Read the label, the short and long forms and the headword from a formatted <idx:entry>.
+
+    Args:
+        entry (str): an <idx:entry> as written in an output file
+    Returns:
+        fields ({str:str}): headword, label, short, long, definition
+    Modules:
+        html, re
+    Notes:
+        The label and the short and long forms are the values substituted into `template_label()` and `template_headword()` by `make_label()` and `make_headword()`. The headword is the text of the long form. The definition is the markup that follows the headword, as returned by `make_definition()`.
+    """
+    label = re.search(r'<idx:orth value="([^"]*)"', entry)
+    label = html.unescape(label.group(1)) if label else ''
+    word = re.search(r'<div><span><b>(.*?)</b></span></div>\s*<span>(.*?)\.</span>(?=\s*(?:<div>|</idx:entry>))', entry, flags=re.S)
+    if word is None:
+        word = re.search(r'<div><span><b>(.*?)</b></span></div>\s*<span>(.*?)\.</span>', entry, flags=re.S)
+    short, long = (html.unescape(word.group(1)), word.group(2)) if word else ('', '')
+    headword = html.unescape(re.sub(r'<[^>]*>', '', long)).replace('■', '')
+    headword = ' '.join(headword.split())
+    definition = entry[word.end():] if word else ''
+    definition = definition.rsplit('</idx:entry>', 1)[0].strip()
+    return {'headword': headword, 'label': label, 'short': short, 'long': long, 'definition': definition}
+
+
+def scan_entries(data: bytes):
+    """
+    Yield the byte offset, length and markup of each <idx:entry> in an output file, without parsing it.
+
+    Args:
+        data (bytes): content of an output file
+    Returns:
+        (offset, length, entry) (int, int, str): one tuple per entry, in order
+    Modules:
+        re
+    """
+    for match in re.finditer(rb'<idx:entry[\s>].*?</idx:entry>', data, flags=re.S):
+        yield match.start(), match.end() - match.start(), match.group().decode('utf8')
+
+
+class HeadwordIndex:
+    """
+    Index of headwords to the entries of the output files, stored in a SQLite database.
+
+    Args:
+        path (str): path to the database file, created if it does not exist
+    """
+    def __init__(self, path):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS entries (headword TEXT, label TEXT, short TEXT, long TEXT, source TEXT, file TEXT, offset INTEGER, length INTEGER, n INTEGER)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_headword ON entries (headword)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_label ON entries (label)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_file ON entries (file)')
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def add_file(self, file, source=None):
+        """Index the entries of an output file, replacing any previous rows for that file. Returns the number of entries."""
+        file = Path(file).expanduser().resolve()
+        with open(file, 'rb') as f:
+            data = f.read()
+        rows = []
+        for n, (offset, length, entry) in enumerate(scan_entries(data)):
+            fields = get_entry_fields(entry)
+            rows.append((fields['headword'], fields['label'], fields['short'], fields['long'], str(source) if source else None, str(file), offset, length, n))
+        with self.db:
+            self.db.execute('DELETE FROM entries WHERE file = ?', (str(file),))
+            self.db.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def find(self, word):
+        """Return the rows whose headword or label is `word`, as dictionaries, in file order."""
+        cursor = self.db.execute('SELECT * FROM entries WHERE headword = ? UNION SELECT * FROM entries WHERE label = ? ORDER BY file, n', (word, word))
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def lookup(self, word):
+        """Return the entries whose headword or label is `word`, read from the output files at the stored offsets."""
+        entries = []
+        for row in self.find(word):
+            with open(row['file'], 'rb') as f:
+                f.seek(row['offset'])
+                entries.append(f.read(row['length']).decode('utf8'))
+        return entries
+
+    def close(self):
+        """Close the database."""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        return None
+
+
+def build_index(files, path, sources=None):
+    """
+    Index existing output files.
+
+    Args:
+        files ([str]): paths to output files
+        path (str): path to the database file
+        sources ([str], optional): paths to the source files, in the same order as `files`
+    Returns:
+        n (int): number of entries indexed
+    """
+    sources = sources or [None] * len(files)
+    with HeadwordIndex(path) as index:
+        n = sum(index.add_file(file, source=source) for file, source in zip(files, sources))
+    return n
+
+
+def lookup(word, path):
+    """
+    Read the entries of a headword from disk.
+
+    Args:
+        word (str): headword or label, e.g. 'dofí'
+        path (str): path to the database file
+    Returns:
+        entries ([str]): the <idx:entry> markup of each matching entry
+    """
+    with HeadwordIndex(path) as index:
+        entries = index.lookup(word)
+    return entries
+
+
+def scan_blockquotes(data: bytes) -> list:
+    """
+    Find the start and end byte offsets of the top-level <blockquote> entries of a source file, without parsing it.
+
+    Args:
+        data (bytes or mmap): content of a source file
+    Returns:
+        offsets ([(int, int)]): start and end offsets of each entry, in order. `data[start:end]` is the markup of the entry.
+    Modules:
+        re
+    Notes:
+        Nested blockquotes are counted, so that an entry ends with its own closing tag.
+    """
+    offsets, depth, start = [], 0, 0
+    for match in re.finditer(rb'<(/?)blockquote\b[^>]*>', data):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                offsets.append((start, match.end()))
+            depth = max(depth, 0)
+        elif not match.group().endswith(b'/>'):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+    return offsets
+
+
+def get_entry_offsets(file) -> list:
+    """Return the start and end byte offsets of the entries of a source file, see `scan_blockquotes()`."""
+    with open(file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets = scan_blockquotes(data)
+    return offsets
+
+
+def index_entries(files, path) -> dict:
+    """
+    Save the byte offsets of the entries of several source files.
+
+    Args:
+        files ([str]): paths to the source files
+        path (str): path to the json file where offsets are saved
+    Returns:
+        offsets ({str:[(int, int)]}): for each file name, the offsets of its entries
+    Modules:
+        json, pathlib (Path)
+    """
+    offsets = {Path(file).name: get_entry_offsets(file) for file in files}
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(offsets), encoding='utf8')
+    return offsets
+
+
+def read_entry_offsets(path, file) -> list:
+    """Return the offsets of the entries of `file` saved by `index_entries()`, or None if the file was not indexed."""
+    offsets = json.loads(Path(path).expanduser().read_text(encoding='utf8'))
+    offsets = offsets.get(Path(file).name)
+    return [tuple(offset) for offset in offsets] if offsets is not None else None
+
+
+def iter_entries(file, start=0, stop=None, offsets=None, features='lxml'):
+    """
+    Parse entries `start` to `stop` of a source file, without parsing the rest of the file.
+
+    Args:
+        file (str): path to a source file
+        start, stop (int, optional): range of entries, as in `range(start, stop)`
+        offsets ([(int, int)], optional): offsets of the entries, from `index_entries()`. The file is scanned if they are not given.
+    Returns:
+        entry (Tag): one <blockquote> Tag per entry, in order
+    Modules:
+        mmap, bs4 (BeautifulSoup)
+    """
+    if offsets is None:
+        offsets = get_entry_offsets(file)
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for a, b in offsets[start:stop]:
+            soup = BeautifulSoup(data[a:b].decode('utf8'), features=features)
+            yield soup.find('blockquote')
+
+
+def read_entry(file, n, offsets=None, features='lxml'):
+    """
+    Parse the n-th entry of a source file.
+
+    Args:
+        file (str): path to a source file
+        n (int): number of the entry, starting at 0
+        offsets ([(int, int)], optional): offsets of the entries, from `index_entries()`
+    Returns:
+        entry (Tag): the <blockquote> Tag of the entry, ready for `make_entry()`
+    Functions:
+        `iter_entries()`
+    """
+    if offsets is None:
+        offsets = get_entry_offsets(file)
+    if not -len(offsets) <= n < len(offsets):
+        raise IndexError('entry ' + str(n) + ' not found in ' + str(file) + ', which has ' + str(len(offsets)) + ' entries')
+    n = n % len(offsets)
+    entry = next(iter_entries(file, n, n+1, offsets=offsets, features=features))
+    return entry
+
+
+# layout of the prefix index: magic, number of records, sizes of the key and headword pools:
+PREFIX_MAGIC = b'GDLCPFX1'
+PREFIX_HEADER = struct.Struct('<8sIII')
+# one record per key: offset and length of the key, offset and length of the headword:
+PREFIX_RECORD = struct.Struct('<IIII')
+
+
+def normalize_key(word: str) -> str:
+    """
+    Normalize a word for prefix completion: lower case, without accents, single spaces.
+
+    Args:
+        word (str): e.g. 'Hepàtic'
+    Returns:
+        key (str): e.g. 'hepatic'
+    Modules:
+        unicodedata
+    """
+    key = unicodedata.normalize('NFKD', word.casefold())
+    key = ''.join(char for char in key if not unicodedata.combining(char))
+    return ' '.join(key.split())
+
+
+def build_prefix_index(files, path) -> int:
+    """
+    Save a sorted array of the normalized headwords and labels of the output files, for prefix completion.
+
+    Args:
+        files ([str]): paths to output files
+        path (str): path to the index file
+    Returns:
+        n (int): number of keys
+    Modules:
+        os, struct, pathlib (Path)
+    Functions:
+        `scan_entries()`, `get_entry_fields()`, `normalize_key()`
+    Notes:
+        The file holds a header, an array of fixed-size records sorted by key, and two pools of utf8 strings: the keys and the headwords. Each record gives the offset and length of its key and of its headword in the pools. Each headword is stored once, however many keys point to it. See `PrefixIndex` for the layout.
+    """
+    pairs, words = set(), {}
+    for file in files:
+        with open(file, 'rb') as f:
+            data = f.read()
+        for offset, length, entry in scan_entries(data):
+            fields = get_entry_fields(entry)
+            word = fields['headword'] or fields['label']
+            if not word:
+                continue
+            for key in {normalize_key(fields['headword']), normalize_key(fields['label'])}:
+                if key:
+                    pairs.add((key.encode('utf8'), word))
+    keys, records = bytearray(), bytearray()
+    pool = bytearray()
+    for key, word in sorted(pairs):
+        if word not in words:
+            words[word] = (len(pool), len(word.encode('utf8')))
+            pool += word.encode('utf8')
+        records += PREFIX_RECORD.pack(len(keys), len(key), *words[word])
+        keys += key
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = Path(str(path) + '.tmp')
+    with open(temp, 'wb') as f:
+        f.write(PREFIX_HEADER.pack(PREFIX_MAGIC, len(pairs), len(keys), len(pool)))
+        f.write(records)
+        f.write(keys)
+        f.write(pool)
+    os.replace(temp, path)
+    return len(pairs)
+
+
+class PrefixIndex:
+    """
+    Prefix completion of headwords, read from a memory map of the file saved by `build_prefix_index()`.
+
+    Args:
+        path (str): path to the index file
+    Notes:
+        Nothing is loaded but the header: `complete()` finds the first matching key by binary search over the records, then reads the following records until the keys stop matching. No Python object is built for the keys that are not returned.
+    """
+    def __init__(self, path):
+        self.file = open(Path(path).expanduser(), 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, key_size, pool_size = PREFIX_HEADER.unpack_from(self.data, 0)
+        if magic != PREFIX_MAGIC:
+            self.close()
+            raise ValueError('not a prefix index: ' + str(path))
+        self.records = PREFIX_HEADER.size
+        self.keys = self.records + self.n * PREFIX_RECORD.size
+        self.pool = self.keys + key_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.n
+
+    def get_key(self, i) -> bytes:
+        """Return the key of the i-th record."""
+        offset, length, _, _ = PREFIX_RECORD.unpack_from(self.data, self.records + i * PREFIX_RECORD.size)
+        return self.data[self.keys + offset:self.keys + offset + length]
+
+    def get_word(self, i) -> str:
+        """Return the headword of the i-th record."""
+        _, _, offset, length = PREFIX_RECORD.unpack_from(self.data, self.records + i * PREFIX_RECORD.size)
+        return self.data[self.pool + offset:self.pool + offset + length].decode('utf8')
+
+    def complete(self, prefix, k=10) -> list:
+        """
+        Return up to `k` headwords whose headword or label starts with `prefix`, accents and case aside, in the order of their keys.
+
+        Args:
+            prefix (str): e.g. 'hepat'
+            k (int, optional): maximum number of headwords
+        Returns:
+            words ([str]): distinct headwords, e.g. ['hepàtic -a', 'hepatitis', ...]
+        Functions:
+            `normalize_key()`
+        """
+        prefix = normalize_key(prefix).encode('utf8')
+        # binary search of the first key not less than the prefix:
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        words = []
+        for i in range(lo, self.n):
+            if len(words) >= k or not self.get_key(i).startswith(prefix):
+                break
+            word = self.get_word(i)
+            if word not in words:
+                words.append(word)
+        return words
+
+    def close(self):
+        """Close the memory map and the file."""
+        if self.data is not None:
+            self.data.close()
+            self.file.close()
+            self.data = None
+        return None
+
+
+def complete(prefix, path, k=10) -> list:
+    """
+    Return up to `k` headwords that start with `prefix`, see `PrefixIndex.complete()`.
+
+    Args:
+        prefix (str): e.g. 'hepat'
+        path (str): path to the index file saved by `build_prefix_index()`
+    """
+    with PrefixIndex(path) as index:
+        words = index.complete(prefix, k=k)
+    return words
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC inflections
+
+Inflected forms of the headwords, written as <idx:iform> tags inside <idx:infl>, so that a lookup of a feminine or plural form, e.g. 'hepàtica' or 'hepàtics', finds the entry of 'hepàtic'.
+
+The df line of an entry gives the masculine form and the feminine ending in the suffix notation of the dictionary, e.g. 'hepàtic -a', 'endossatari -ària', 'actor -triu'. The feminine is made by replacing the end of the masculine from the last letter that matches the first letter of the suffix. Plurals are then made from a table of Catalan endings, compiled once into a single regular expression.
+
+The forms are computed in batches, each distinct headword once, after the entries are formatted: the per-entry pipeline of `make_entry()` is unchanged.
+
+Usage:
+    main_loop(files, dir, inflections=True)
+
+    get_forms('hepàtic -a')  # ['hepàtic', 'hepàtica', 'hepàtics', 'hepàtiques']
+
+Created 18 October 2026
+"""
+import html
+import re
+import unicodedata
+
+
+# plural endings, tried from the longest: (ending of the singular, ending of the plural)
+PLURAL_RULES = [
+    ('qua', 'qües'), ('gua', 'gües'),
+    ('ca', 'ques'), ('ga', 'gues'), ('ça', 'ces'), ('ja', 'ges'), ('a', 'es'),
+    ('às', 'asos'), ('ès', 'esos'), ('és', 'esos'), ('ís', 'isos'), ('òs', 'osos'), ('ós', 'osos'), ('ús', 'usos'),
+    ('à', 'ans'), ('é', 'ens'), ('è', 'ens'), ('í', 'ins'), ('ó', 'ons'), ('ò', 'ons'), ('ú', 'uns'),
+    ('sc', 'scs'), ('st', 'sts'), ('xt', 'xts'),
+    ('ç', 'ços'), ('x', 'xos'),
+]
+
+# all endings in one alternation, the name of the matching group gives the rule:
+PLURAL_PATTERN = re.compile('|'.join('(?P<r{}>{})$'.format(i, re.escape(ending)) for i, (ending, _) in enumerate(PLURAL_RULES)))
+
+# a word of the dictionary: letters, the middle dot of 'l·l' and apostrophes:
+WORD_PATTERN = re.compile(r"^[^\W\d_](?:[^\W\d_]|[·'’-])*$")
+
+
+def fold(char: str) -> str:
+    """Return a character lower case and without accent, e.g. 'a' for 'À'."""
+    return unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii').lower() or char
+
+
+def get_plural(word: str) -> str:
+    """
+    Return the plural of a Catalan noun or adjective.
+
+    Args:
+        word (str): singular, masculine or feminine, e.g. 'hepàtic', 'hepàtica', 'camió'
+    Returns:
+        plural (str): e.g. 'hepàtics', 'hepàtiques', 'camions'
+    Modules:
+        re
+    Notes:
+        Words ending in an unstressed -s are invariable when they have more than one syllable ('llapis'), and take -os otherwise ('gas'). Irregular plurals are not covered.
+    """
+    match = PLURAL_PATTERN.search(word)
+    if match:
+        ending, plural = PLURAL_RULES[int(match.lastgroup[1:])]
+        return word[:-len(ending)] + plural
+    if word.endswith('s'):
+        syllables = len(re.findall('[aeiouàèéíïòóúü]+', word.lower()))
+        return word if syllables > 1 else word + 'os'
+    return word + 's'
+
+
+def get_feminine(word: str, suffix: str) -> str:
+    """
+    Return the feminine of a word from the suffix notation of the dictionary.
+
+    Args:
+        word (str): masculine, e.g. 'endossatari'
+        suffix (str): feminine ending, without the hyphen, e.g. 'ària'
+    Returns:
+        feminine (str): e.g. 'endossatària'
+    Notes:
+        '-a' is appended ('hepàtic -a'). A longer suffix replaces the end of the word from the last letter that matches its first letter, accents aside ('actor -triu', 'francès -esa'), and is appended if no letter matches ('abat -essa'). After a final -u, a suffix in v- replaces the u ('blau -va').
+    """
+    if suffix == 'a':
+        return word + suffix
+    first = fold(suffix[0])
+    for i in range(len(word) - 1, -1, -1):
+        if fold(word[i]) == first:
+            return word[:i] + suffix
+    if first == 'v' and word.endswith('u'):
+        return word[:-1] + suffix
+    return word + suffix
+
+
+def parse_headword(headword: str) -> tuple:
+    """
+    Split the df line of an entry into the masculine form and the feminine suffixes.
+
+    Args:
+        headword (str): text of the df line, e.g. 'hepàtic -a', 'electromotor -motriu [o -motora]'
+    Returns:
+        word, suffixes (str, [str]): e.g. ('hepàtic', ['a']). `word` is empty if the headword is not a single word, e.g. an affix or a phrase.
+    Modules:
+        re
+    """
+    # brackets hold variants, e.g. '[o -motora]', or a pronunciation, which is dropped:
+    headword = re.sub(r'\[(?!o\s)[^\]]*\]', ' ', headword)
+    tokens = re.sub(r'[\[\]()]', ' ', headword).split()
+    # homograph numbers follow the words, e.g. 'dor1':
+    tokens = [token.rstrip('0123456789*,') for token in tokens]
+    if not tokens or not WORD_PATTERN.match(tokens[0]):
+        return '', []
+    suffixes = [token[1:] for token in tokens[1:] if token.startswith('-') and WORD_PATTERN.match(token[1:])]
+    # anything but suffixes and 'o', e.g. 'etanoic, àcid', is a phrase:
+    if any(token != 'o' and not token.startswith('-') for token in tokens[1:]):
+        return '', []
+    return tokens[0], suffixes
+
+
+def get_forms(headword: str) -> list:
+    """
+    Return the inflected forms of a headword: masculine and feminine, singular and plural.
+
+    Args:
+        headword (str): text of the df line, e.g. 'hepàtic -a'
+    Returns:
+        forms ([str]): distinct forms, in order, e.g. ['hepàtic', 'hepàtica', 'hepàtics', 'hepàtiques']. Empty if the headword is not a single word.
+    Functions:
+        `parse_headword()`, `get_feminine()`, `get_plural()`
+    """
+    word, suffixes = parse_headword(headword)
+    if not word:
+        return []
+    singulars = [word] + [get_feminine(word, suffix) for suffix in suffixes]
+    forms = singulars + [get_plural(singular) for singular in singulars]
+    return list(dict.fromkeys(forms))
+
+
+def get_inflections(headwords) -> dict:
+    """
+    Return the inflected forms of a batch of headwords, each distinct headword computed once.
+
+    Args:
+        headwords ([str]): texts of the df lines
+    Returns:
+        inflections ({str:[str]}): the forms of each headword, see `get_forms()`
+    """
+    return {headword: get_forms(headword) for headword in set(headwords)}
+
+
+def insert_iforms(markup: str, forms) -> str:
+    """
+    Add an <idx:iform> tag for each form inside the <idx:infl> tag of a formatted entry. Forms already listed are skipped.
+
+    Args:
+        markup (str): a formatted <idx:entry>
+        forms ([str]): inflected forms
+    Returns:
+        markup (str): the entry with the new forms
+    Modules:
+        html, re
+    """
+    listed = set(html.unescape(value) for value in re.findall(r'<idx:iform [^>]*value="([^"]*)"', markup))
+    iforms = ''.join('  <idx:iform name="" value="{}"/>\n      '.format(html.escape(form)) for form in forms if form not in listed)
+    if not iforms:
+        return markup
+    return markup.replace('</idx:infl>', iforms + '</idx:infl>', 1)
+
+
+def inflect_batch(entries) -> list:
+    """Add the inflected forms to a list of entries, see `inflect_entries()`."""
+    inflections = get_inflections(entry.headword for entry in entries if not entry.protected)
+    for entry in entries:
+        if not entry.protected:
+            forms = inflections[entry.headword]
+            if forms:
+                entry.markup = insert_iforms(entry.markup, forms)
+    return entries
+
+
+def inflect_entries(entries, batch=1000):
+    """
+    Add the inflected forms of the headwords to a stream of entries.
+
+    Args:
+        entries ([Entry]): records yielded by `iter_dictionary()`
+        batch (int, optional): number of entries whose forms are computed together
+    Returns:
+        entry (Entry): the same records, in order, with the forms added to their markup
+    Functions:
+        `get_inflections()`, `insert_iforms()`
+    Notes:
+        Protected tags are passed through. Entries are held back by at most `batch` records.
+    """
+    pending = []
+    for entry in entries:
+        pending.append(entry)
+        if len(pending) >= batch:
+            yield from inflect_batch(pending)
+            pending = []
+    yield from inflect_batch(pending)
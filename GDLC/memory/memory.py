@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC memory
+
+Bounded memory for long sessions, e.g. repeated runs of `main_loop()` from `run.py` in Spyder, where the memory of the process grows from file to file.
+
+With `main_loop(max_memory=...)`, the BeautifulSoup tree of each file is torn down with `decompose()` as soon as its page is written, and the garbage collector is run, so the tree of a file is never alive at the same time as the tree of the next one. Before each file, the resident memory (RSS) of the process is read: above the ceiling, the file is streamed with the 'lxml-stream' engine, which holds one entry at a time, instead of being parsed whole. With worker processes, each worker reads its own memory.
+
+The peak memory of the main process and of the workers is reported at the end of every run of `main_loop()`, with or without a ceiling. `bench.get_peak_rss()` reads the same peak. A megabyte is `MB`, 1024 * 1024 bytes, everywhere in the package.
+
+The resident memory is read from `/proc/self/statm`, on Linux only: elsewhere the ceiling is not checked, but trees are still torn down. The peak is read with the `resource` module, on Linux and macOS, and is not reported on Windows.
+
+Usage:
+    main_loop(files, dir, max_memory=500)  # megabytes
+
+Created 18 October 2026
+"""
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# bytes in a megabyte, for all the sizes of the package: `max_memory`, the peak memory, the MB/s of the progress display and of the benchmarks:
+MB = 1024 ** 2
+
+
+def get_rss():
+    """Return the resident memory of the process, in bytes, or None if it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def get_peak_rss(children=False):
+    """
+    Return the peak resident memory, in bytes, or None if it cannot be read.
+
+    Args:
+        children (bool, optional): if True, the largest peak of the child processes that have ended, e.g. the workers of a process pool after `shutdown()`. Otherwise the peak of the process itself.
+    Modules:
+        resource, sys
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # kilobytes on Linux, bytes on macOS:
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+
+def is_over(max_memory) -> bool:
+    """Return True if the resident memory of the process is above `max_memory` megabytes. False if it cannot be read."""
+    rss = get_rss()
+    return rss is not None and rss > max_memory * MB
+
+
+def get_peak_string() -> str:
+    """Return the peak memory of the process and of its ended child processes, as a line of text. Empty if it cannot be read."""
+    peak = get_peak_rss()
+    if peak is None:
+        return ''
+    line = 'PEAK MEMORY: {:.1f} MB'.format(peak / MB)
+    workers = get_peak_rss(children=True)
+    if workers:
+        line += ', workers {:.1f} MB'.format(workers / MB)
+    return line
@@ -0,0 +1,951 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC mobi reader and writer
+
+Read the text of a Kindle book, e.g. `source/*.azw`, without unpacking it first with the KindleUnpack plugin of calibre.
+
+A Kindle book is a Palm database: a header, a table of record offsets, and the records. Record 0 holds the PalmDOC header, the MOBI header and the EXTH metadata. The text follows in records of 4096 bytes, compressed with PalmDOC (LZ77) or HUFF/CDIC (Huffman codes of phrases), each followed by trailing entries that are not part of the text.
+
+A KF8 book, or the KF8 half of a combined mobi7/KF8 file, holds the xhtml files of the book as skeletons, with fragments to insert into them: the positions are listed in a skeleton index and a fragment index, and the text is split into flows by the FDST record. `iter_parts()` puts each xhtml file back together and yields it, one at a time. A mobi7 book is a single html text, yielded whole.
+
+The file is read through a memory map, and the text records are decompressed one at a time, by `iter_text()`, into a single buffer of the length of the text: the text of a 4.6 MB book is held in memory once, never twice, and never copied to disk. The flows of a KF8 book are views of that buffer. `mobi_loop()` sends each part to `main_loop_file()` as it is rebuilt, from the purchased book to the output files in one call.
+
+Encrypted books cannot be read.
+
+The writer goes the other way, from the formatted entries to a Kindle dictionary, without KindleGen: a mobi7 book with the text in PalmDOC records and an orthographic index of INDX records, built from the values of <idx:orth> and <idx:iform>. `make_kindle()` streams the entries of the source files into `MobiWriter`, which compresses each record of text as soon as it is full, so only the keys of the index are held in memory. The keys are sorted by their UTF-8 bytes, and inflected forms are listed in the orthographic index next to the headwords, each pointing to the text of its entry.
+
+Usage:
+    mobi_loop('~/GDLC/source/GDLC.azw', '~/GDLC/output')
+
+    with MobiReader('~/GDLC/source/GDLC.azw') as book:
+        for name, data in book.iter_parts():
+            print(name, len(data))
+
+    make_kindle(files, '~/GDLC/output/GDLC.mobi', opf='~/GDLC/source/content.opf')
+
+Created 18 October 2026
+"""
+import contextlib
+import html
+import mmap
+import os
+import re
+import shutil
+import struct
+import zlib
+from pathlib import Path
+
+
+# the header of the Palm database: name, attributes, dates, ..., type and creator, ..., number of records:
+PALMDB_HEADER = struct.Struct('>32sHHIIIIII4s4sIIH')
+# text encodings of the MOBI header:
+ENCODINGS = {1252: 'cp1252', 65001: 'utf8'}
+# no record, in the MOBI and KF8 headers:
+NULL_INDEX = 0xFFFFFFFF
+# a run of literal bytes in PalmDOC:
+LITERALS = re.compile(rb'[\x00\x09-\x7f]+')
+# bytes of text per record:
+RECORD_SIZE = 4096
+# the text of a written book, around the entries:
+TEXT_START = b'<html><head><guide></guide></head><body>'
+TEXT_END = b'</body></html>'
+# length of the MOBI header of a written book, from the 'MOBI' identifier:
+MOBI_HEADER_LENGTH = 0xE8
+# length of the header of an INDX record, and largest size of its entries:
+INDX_HEADER_LENGTH = 192
+INDEX_RECORD_SIZE = 0x8000
+# tags of the entries of the orthographic index: position (1) and length (2) of the text of the entry, one value each, then the end of the control byte:
+ORTH_TAGS = ((1, 1, 0x01, 0), (2, 1, 0x02, 0), (0, 0, 0, 1))
+# the keys of an entry, and the tags moved from the text to the index:
+INDEX_VALUES = re.compile(r'<idx:(?:orth|iform)\b[^>]*?\bvalue="([^"]*)"')
+INDEX_TAGS = re.compile(r'<idx:orth\b.*?</idx:orth>|<idx:orth\b[^>]*/>|</?idx:entry\b[^>]*>', re.S)
+# Windows language codes of the MOBI header:
+LANGUAGES = {'ca': 0x03, 'de': 0x07, 'en': 0x09, 'es': 0x0A, 'fr': 0x0C, 'it': 0x10, 'pt': 0x16}
+
+
+def palmdoc_decompress(data: bytes) -> bytes:
+    """
+    Decompress a PalmDOC (LZ77) text record.
+
+    Args:
+        data (bytes): a compressed record, without its trailing entries
+    Returns:
+        text (bytes): the decompressed record
+    Modules:
+        re
+    Notes:
+        A byte 0x01-0x08 is followed by as many literal bytes, 0x00 and 0x09-0x7f are literal, 0xc0-0xff is a space followed by a character, and 0x80-0xbf starts a two-byte back reference: an 11-bit distance and a 3-bit length. Runs of literal bytes, most of the text of a dictionary, are copied at once.
+    """
+    out = bytearray()
+    i, n = 0, len(data)
+    literals = LITERALS.match
+    while i < n:
+        run = literals(data, i)
+        if run:
+            out += run.group()
+            i = run.end()
+            continue
+        c = data[i]
+        i += 1
+        if c <= 8:
+            out += data[i:i + c]
+            i += c
+        elif c >= 0xC0:
+            out.append(0x20)
+            out.append(c ^ 0x80)
+        elif i < n:
+            c = (c << 8) | data[i]
+            i += 1
+            distance, length = (c >> 3) & 0x07FF, (c & 7) + 3
+            if distance > length:
+                out += out[-distance:len(out) - distance + length]
+            else:
+                # the copy overlaps the bytes it writes:
+                for _ in range(length):
+                    out.append(out[-distance])
+    return bytes(out)
+
+
+def get_trailing_size(record: bytes, flags: int) -> int:
+    """
+    Return the size of the trailing entries at the end of a text record.
+
+    Args:
+        record (bytes): a text record
+        flags (int): the extra data flags of the MOBI header
+    Returns:
+        size (int): number of bytes to remove from the end of the record
+    Notes:
+        Each bit of `flags` above the lowest marks an entry whose size is a backward variable-width integer at the end of the entry. The lowest bit marks the multibyte bytes, the bytes of a character split across two records, counted by the two low bits of the last byte.
+    """
+    size = 0
+    bits = flags >> 1
+    while bits:
+        if bits & 1:
+            end = len(record) - size
+            value, shift, i = 0, 0, end
+            while i > 0:
+                i -= 1
+                byte = record[i]
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if byte & 0x80 or shift >= 28:
+                    break
+            size += value
+        bits >>= 1
+    if flags & 1:
+        size += (record[len(record) - size - 1] & 0x3) + 1
+    return size
+
+
+def get_value(data: bytes, offset: int) -> tuple:
+    """Return the size and value of a forward variable-width integer, whose last byte has the high bit set."""
+    value, i = 0, offset
+    while True:
+        byte = data[i]
+        i += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte & 0x80:
+            return i - offset, value
+
+
+class HuffCdic:
+    """
+    Decompress HUFF/CDIC text records.
+
+    Args:
+        huff (bytes): the HUFF record: the code tables
+        cdics ([bytes]): the CDIC records: the phrases
+    Notes:
+        The text is a string of Huffman codes, each the number of a phrase of the dictionary. A phrase is itself compressed, unless its flag is set, and is decompressed the first time it is used.
+    """
+    def __init__(self, huff, cdics):
+        if huff[:8] != b'HUFF\x00\x00\x00\x18':
+            raise ValueError('invalid HUFF record')
+        table1, table2 = struct.unpack_from('>II', huff, 8)
+        # the code length, terminal flag and largest code of each first byte:
+        self.table = []
+        for value in struct.unpack_from('>256I', huff, table1):
+            length, term, maxcode = value & 0x1F, value & 0x80, value >> 8
+            self.table.append((length, term, ((maxcode + 1) << (32 - length)) - 1))
+        # the smallest and largest code of each length:
+        bounds = struct.unpack_from('>64I', huff, table2)
+        self.mincode = [0] + [code << (32 - length) for length, code in enumerate(bounds[0::2], 1)]
+        self.maxcode = [0] + [((code + 1) << (32 - length)) - 1 for length, code in enumerate(bounds[1::2], 1)]
+        self.phrases = []
+        for cdic in cdics:
+            if cdic[:8] != b'CDIC\x00\x00\x00\x10':
+                raise ValueError('invalid CDIC record')
+            count, bits = struct.unpack_from('>II', cdic, 8)
+            n = min(1 << bits, count - len(self.phrases))
+            for offset in struct.unpack_from('>{}H'.format(n), cdic, 16):
+                size, = struct.unpack_from('>H', cdic, 16 + offset)
+                self.phrases.append((cdic[18 + offset:18 + offset + (size & 0x7FFF)], size & 0x8000))
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress a text record, without its trailing entries."""
+        left = len(data) * 8
+        data = bytes(data) + b'\x00' * 8
+        pos, n = 0, 32
+        x, = struct.unpack_from('>Q', data, pos)
+        out = []
+        while True:
+            if n <= 0:
+                pos += 4
+                x, = struct.unpack_from('>Q', data, pos)
+                n += 32
+            code = (x >> n) & 0xFFFFFFFF
+            length, term, maxcode = self.table[code >> 24]
+            if not term:
+                while code < self.mincode[length]:
+                    length += 1
+                maxcode = self.maxcode[length]
+            n -= length
+            left -= length
+            if left < 0:
+                break
+            i = (maxcode - code) >> (32 - length)
+            phrase, flag = self.phrases[i]
+            if not flag:
+                # a phrase is decompressed once, the first time it is used:
+                self.phrases[i] = (b'', 0x8000)
+                phrase = self.decompress(phrase)
+                self.phrases[i] = (phrase, 0x8000)
+            out.append(phrase)
+        return b''.join(out)
+
+
+def get_mobi_header(record: bytes) -> dict:
+    """
+    Read the PalmDOC and MOBI headers of record 0.
+
+    Args:
+        record (bytes): record 0 of the book, or the first record of its KF8 half
+    Returns:
+        header ({str:int}): compression, text length, record count, encryption, encoding, version, orthographic index, HUFF record and count, extra data flags, and for KF8 the FDST, skeleton and fragment index records. Missing records are `NULL_INDEX`.
+    Modules:
+        struct
+    """
+    compression, _, length, count, size, encryption = struct.unpack_from('>HHIHHH', record, 0)
+    header = {'compression': compression, 'text_length': length, 'text_records': count, 'record_size': size, 'encryption': encryption}
+    if record[16:20] != b'MOBI':
+        raise ValueError('no MOBI header')
+    header_length, mobi_type, encoding, _, version = struct.unpack_from('>IIIII', record, 20)
+    header.update({'header_length': header_length, 'type': mobi_type, 'encoding': encoding, 'version': version})
+    header['orth_index'], = struct.unpack_from('>I', record, 0x28)
+    header['huff'], header['huff_count'] = struct.unpack_from('>II', record, 0x70)
+    header['exth'] = bool(struct.unpack_from('>I', record, 0x80)[0] & 0x40)
+    header['extra_flags'] = struct.unpack_from('>H', record, 0xF2)[0] if header_length >= 0xE4 else 0
+    for name, offset in (('fdst', 0xC0), ('fragment_index', 0xF8), ('skeleton_index', 0xFC)):
+        header[name] = struct.unpack_from('>I', record, offset)[0] if version >= 8 and len(record) >= offset + 4 else NULL_INDEX
+    return header
+
+
+def get_exth(record: bytes, header: dict) -> dict:
+    """Return the EXTH metadata of record 0, as {type: [bytes]}. Empty if there is none."""
+    exth = {}
+    offset = 16 + header['header_length']
+    if not header['exth'] or record[offset:offset + 4] != b'EXTH':
+        return exth
+    count, = struct.unpack_from('>I', record, offset + 8)
+    offset += 12
+    for _ in range(count):
+        kind, size = struct.unpack_from('>II', record, offset)
+        exth.setdefault(kind, []).append(bytes(record[offset + 8:offset + size]))
+        offset += size
+    return exth
+
+
+class MobiReader:
+    """
+    Read the text of a Kindle book (azw, azw3, mobi) through a memory map.
+
+    Args:
+        path (str): path to the book
+    Notes:
+        `header` and `exth` are those of record 0. For a combined file, `start` is the first record of the KF8 half, and `kf8` its header, read in place of the mobi7 half. Records are numbered from the start of the half that is read.
+    """
+    def __init__(self, path):
+        self.path = Path(path).expanduser()
+        self.file = open(self.path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = PALMDB_HEADER.unpack_from(self.data, 0)
+        self.name = fields[0].rstrip(b'\x00').decode('latin-1')
+        if fields[9] + fields[10] not in (b'BOOKMOBI', b'TEXtREAd'):
+            self.close()
+            raise ValueError('not a Kindle book: ' + str(path))
+        count = fields[-1]
+        offsets = struct.unpack_from('>' + 'II' * count, self.data, PALMDB_HEADER.size)[0::2]
+        self.offsets = list(offsets) + [len(self.data)]
+        self.header = get_mobi_header(self.get_record(0, absolute=True))
+        self.exth = get_exth(self.get_record(0, absolute=True), self.header)
+        if self.header['encryption']:
+            self.close()
+            raise ValueError('encrypted book: ' + str(path))
+        # the KF8 half of a combined file starts after its boundary record:
+        self.start, self.kf8 = 0, None
+        if self.header['version'] >= 8:
+            self.kf8 = self.header
+        elif 121 in self.exth:
+            boundary, = struct.unpack('>I', self.exth[121][0])
+            if boundary != NULL_INDEX and boundary < len(self.offsets) - 1:
+                if self.get_record(boundary, absolute=True)[:8] == b'BOUNDARY':
+                    boundary += 1
+                self.start = boundary
+                self.kf8 = get_mobi_header(self.get_record(0))
+        self.huffcdic = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def get_record(self, i, absolute=False) -> bytes:
+        """Return record `i`, counted from the start of the half that is read, or of the file if `absolute=True`."""
+        i = i if absolute else i + self.start
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def iter_text(self):
+        """
+        Yield the text of the book, one decompressed record at a time, up to the text length of the header.
+
+        Returns:
+            text (bytes): the text of a record, without its trailing entries
+        Functions:
+            `get_trailing_size()`, `decompress()`
+        """
+        header = self.kf8 or self.header
+        left = header['text_length']
+        for i in range(1, header['text_records'] + 1):
+            if left <= 0:
+                break
+            record = self.get_record(i)
+            record = record[:len(record) - get_trailing_size(record, header['extra_flags'])]
+            text = self.decompress(record, header)[:left]
+            left -= len(text)
+            yield text
+
+    def get_text(self) -> bytearray:
+        """
+        Return the whole text of the book, decompressed.
+
+        Returns:
+            text (bytearray): for a KF8 book, all the flows, see `get_flows()`. For a mobi7 book, the html text.
+        Functions:
+            `iter_text()`
+        Notes:
+            The records are copied into a buffer of the length of the text as they are decompressed, so the text is never held twice.
+        """
+        text = bytearray((self.kf8 or self.header)['text_length'])
+        end = 0
+        for record in self.iter_text():
+            text[end:end + len(record)] = record
+            end += len(record)
+        del text[end:]
+        return text
+
+    def decompress(self, record: bytes, header: dict) -> bytes:
+        """Decompress a text record, without its trailing entries, with the compression of `header`."""
+        if header['compression'] == 1:
+            return record
+        if header['compression'] == 2:
+            return palmdoc_decompress(record)
+        if header['compression'] == 17480:  # 'DH'
+            if self.huffcdic is None:
+                huff = header['huff']
+                self.huffcdic = HuffCdic(self.get_record(huff), [self.get_record(huff + j) for j in range(1, header['huff_count'])])
+            return self.huffcdic.decompress(record)
+        raise ValueError('unknown compression: ' + str(header['compression']))
+
+    def get_flows(self, text: bytes) -> list:
+        """Split the text of a KF8 book into its flows, from the FDST record: the xhtml text first, then css and svg. The whole text if there is no FDST. The flows are views of the text, not copies."""
+        fdst = self.kf8['fdst'] if self.kf8 else NULL_INDEX
+        if fdst == NULL_INDEX:
+            return [text]
+        record = self.get_record(fdst)
+        if record[:4] != b'FDST':
+            return [text]
+        count, = struct.unpack_from('>I', record, 8)
+        bounds = struct.unpack_from('>{}I'.format(2 * count), record, 12)
+        view = memoryview(text)
+        return [view[start:end] for start, end in zip(bounds[0::2], bounds[1::2])]
+
+    def get_index(self, i) -> list:
+        """
+        Read an INDX index: a header record, followed by records of entries and by CNCX records of strings.
+
+        Args:
+            i (int): the header record of the index
+        Returns:
+            entries ([(bytes, {int:[int]}, {int:bytes})]): the text of each entry, its tag values, and the strings of the CNCX records by offset
+        Functions:
+            `get_index_header()`, `get_tag_table()`, `get_tag_values()`, `get_value()`
+        """
+        record = self.get_record(i)
+        header = get_index_header(record)
+        control_bytes, tags = get_tag_table(record, header['length'])
+        # the strings of the index, numbered by their offset in the CNCX records:
+        strings = {}
+        for j in range(header['cncx']):
+            cncx = self.get_record(i + header['count'] + 1 + j)
+            offset = 0
+            while offset < len(cncx) and cncx[offset] != 0:
+                size, length = get_value(cncx, offset)
+                strings[offset + 0x10000 * j] = cncx[offset + size:offset + size + length]
+                offset += size + length
+        entries = []
+        for j in range(i + 1, i + 1 + header['count']):
+            record = self.get_record(j)
+            block = get_index_header(record)
+            idxt = block['start']
+            positions = list(struct.unpack_from('>{}H'.format(block['count']), record, idxt + 4)) + [idxt]
+            for start, end in zip(positions, positions[1:]):
+                length = record[start]
+                text = record[start + 1:start + 1 + length]
+                entries.append((text, get_tag_values(record, control_bytes, tags, start + 1 + length, end)))
+        return entries, strings
+
+    def get_orth(self) -> dict:
+        """
+        Read the orthographic index of a dictionary.
+
+        Returns:
+            keys ({str:[(int, int)]}): the position and length in the text of the entries of each headword or inflected form. Empty if the book is not a dictionary.
+        Functions:
+            `get_index()`
+        """
+        keys = {}
+        if self.header['orth_index'] == NULL_INDEX:
+            return keys
+        entries, _ = self.get_index(self.header['orth_index'])
+        encoding = ENCODINGS.get(self.header['encoding'], 'utf8')
+        for text, values in entries:
+            keys.setdefault(text.decode(encoding), []).append((values[1][0], values[2][0]))
+        return keys
+
+    def iter_parts(self):
+        """
+        Yield the xhtml files of the book, one at a time.
+
+        Returns:
+            name, data (str, bytes): the name of the file, e.g. 'part0100.xhtml', and its markup, in utf8
+        Functions:
+            `get_text()`, `get_flows()`, `get_index()`
+        Notes:
+            Each skeleton of a KF8 book is filled with its fragments, at the insert positions of the fragment index, and named after the file number of its first fragment, as KindleUnpack does. A mobi7 book is yielded as a single file, 'book.html', converted to utf8 if needed.
+        """
+        text = self.get_text()
+        if not self.kf8 or self.kf8['skeleton_index'] == NULL_INDEX:
+            encoding = ENCODINGS.get(self.header['encoding'], 'utf8')
+            yield 'book.html', text if encoding == 'utf8' else text.decode(encoding).encode('utf8')
+            return
+        text = self.get_flows(text)[0]
+        skeletons, _ = self.get_index(self.kf8['skeleton_index'])
+        fragments, strings = self.get_index(self.kf8['fragment_index'])
+        j = 0
+        for _, tags in skeletons:
+            count, (start, length) = tags[1][0], tags[6][:2]
+            base = start + length
+            skeleton = bytes(text[start:base])
+            name = None
+            for _ in range(count):
+                position, tags = fragments[j]
+                position = int(position) - start
+                if name is None:
+                    name = 'part{:04d}.xhtml'.format(tags[3][0])
+                size = tags[6][1]
+                skeleton = skeleton[:position] + text[base:base + size] + skeleton[position:]
+                base += size
+                j += 1
+            yield name or 'part{:04d}.xhtml'.format(j), skeleton
+
+    def close(self) -> None:
+        """Close the memory map and the file."""
+        self.data.close()
+        self.file.close()
+        return None
+
+
+def get_index_header(record: bytes) -> dict:
+    """Read the header of an INDX record: its length, the offset of its IDXT table, its number of records or entries, and its number of CNCX records."""
+    if record[:4] != b'INDX':
+        raise ValueError('invalid INDX record')
+    values = struct.unpack_from('>13I', record, 4)
+    return {'length': values[0], 'start': values[4], 'count': values[5], 'cncx': values[12]}
+
+
+def get_tag_table(record: bytes, offset: int) -> tuple:
+    """Read the TAGX table of an index: the number of control bytes, and for each tag its number, number of values, mask and end flag."""
+    if record[offset:offset + 4] != b'TAGX':
+        return 0, []
+    size, control_bytes = struct.unpack_from('>II', record, offset + 4)
+    tags = [tuple(record[offset + i:offset + i + 4]) for i in range(12, size, 4)]
+    return control_bytes, tags
+
+
+def get_tag_values(record: bytes, control_bytes: int, tags: list, start: int, end: int) -> dict:
+    """
+    Read the tag values of an index entry.
+
+    Args:
+        record (bytes): a record of the index
+        control_bytes (int), tags ([(int, int, int, int)]): as returned by `get_tag_table()`
+        start, end (int): the offsets of the entry, after its text
+    Returns:
+        values ({int:[int]}): the values of each tag of the entry
+    Functions:
+        `get_value()`
+    Notes:
+        The bits of the control bytes, under the mask of a tag, give its number of values. When all the bits of a mask of more than one bit are set, the number of bytes of the values follows instead.
+    """
+    found, i = [], 0
+    offset = start + control_bytes
+    for tag, per_entry, mask, end_flag in tags:
+        if end_flag == 1:
+            i += 1
+            continue
+        value = record[start + i] & mask
+        if not value:
+            continue
+        if value == mask and bin(mask).count('1') > 1:
+            size, value = get_value(record, offset)
+            offset += size
+            found.append((tag, None, value, per_entry))
+        else:
+            while not mask & 1:
+                mask >>= 1
+                value >>= 1
+            found.append((tag, value, None, per_entry))
+    values = {}
+    for tag, count, size, per_entry in found:
+        values[tag] = []
+        if count is not None:
+            for _ in range(count * per_entry):
+                used, value = get_value(record, offset)
+                offset += used
+                values[tag].append(value)
+        else:
+            used = 0
+            while used < size:
+                n, value = get_value(record, offset)
+                offset += n
+                used += n
+                values[tag].append(value)
+    return values
+
+
+def mobi_loop(path, dir, **options) -> list:
+    """
+    Process the text of a Kindle book, from the book itself, without unpacking it to disk first.
+
+    Args:
+        path (str): path to the book, e.g. '~/GDLC/source/GDLC.azw'
+        dir (str): output directory
+        options: other arguments as in `main_loop()`, see `get_loop_options()`
+    Returns:
+        files ([Path]): paths to the output files, one per part of the book
+    Modules:
+        pathlib (Path), GDLC (progress)
+    Functions:
+        `MobiReader.iter_parts()`, GDLC `get_loop_options()`, `main_loop_file()`
+    Notes:
+        The parts are sent to `main_loop_file()` as they are rebuilt, with the `data` argument, so no intermediate file is written.
+    """
+    from GDLC.GDLC import get_loop_options, main_loop_file
+    dir = Path(dir).expanduser()
+    dir.mkdir(parents=True, exist_ok=True)
+    options = get_loop_options(**options)
+    reporter = None
+    if options['progress']:
+        from GDLC.progress.progress import Progress
+        reporter = Progress()
+    files = []
+    with MobiReader(path) as book:
+        for name, data in book.iter_parts():
+            outfile = dir / name
+            main_loop_file(name, outfile=outfile, data=data, **{**options, 'progress': reporter or False})
+            files.append(outfile)
+            if reporter:
+                reporter.update(files=1, bytes=len(data))
+    if reporter:
+        reporter.close()
+    return files
+
+
+def palmdoc_compress(data: bytes) -> bytes:
+    """
+    Compress a text record with PalmDOC (LZ77), the counterpart of `palmdoc_decompress()`.
+
+    Args:
+        data (bytes): at most 4096 bytes of text
+    Returns:
+        record (bytes): the compressed record
+    Modules:
+        struct
+    Notes:
+        At each position, the nearest earlier copy of 3 bytes, extended up to 10 bytes and at most 2047 bytes back, is written as a back reference. Otherwise a space followed by a character in 0x40-0x7f is written as one byte, other bytes in 0x80-0xff are written in runs of at most 8 behind their count, and the rest as is.
+    """
+    out = bytearray()
+    i, n = 0, len(data)
+    while i < n:
+        if n - i >= 3:
+            start = max(0, i - 2047)
+            j = data.rfind(data[i:i + 3], start, i)
+            if j >= 0:
+                length = 3
+                for size in range(4, min(10, n - i) + 1):
+                    k = data.rfind(data[i:i + size], start, i)
+                    if k < 0:
+                        break
+                    j, length = k, size
+                out += struct.pack('>H', 0x8000 | ((i - j) << 3) | (length - 3))
+                i += length
+                continue
+        c = data[i]
+        if c == 0x20 and i + 1 < n and 0x40 <= data[i + 1] < 0x80:
+            out.append(data[i + 1] ^ 0x80)
+            i += 2
+        elif c == 0 or 9 <= c < 0x80:
+            out.append(c)
+            i += 1
+        else:
+            j = i + 1
+            while j < n and j - i < 8 and not (data[j] == 0 or 9 <= data[j] < 0x80):
+                j += 1
+            out.append(j - i)
+            out += data[i:j]
+            i = j
+    return bytes(out)
+
+
+def encode_value(value: int) -> bytes:
+    """Return a forward variable-width integer, the counterpart of `get_value()`: 7 bits per byte, the last byte with the high bit set."""
+    out = bytearray([0x80 | (value & 0x7F)])
+    value >>= 7
+    while value:
+        out.insert(0, value & 0x7F)
+        value >>= 7
+    return bytes(out)
+
+
+def get_entry_keys(markup: str) -> list:
+    """Return the keys of a formatted <idx:entry>: the value of <idx:orth>, then the values of its <idx:iform> tags, each once."""
+    keys = [html.unescape(value) for value in INDEX_VALUES.findall(markup)]
+    return list(dict.fromkeys(key for key in keys if key))
+
+
+def strip_index_tags(markup: str) -> str:
+    """Remove the <idx:entry> tags and the <idx:orth> block of a formatted entry, which are moved to the orthographic index, and leave the text that is shown."""
+    return INDEX_TAGS.sub('', markup).strip()
+
+
+def get_metadata(opf) -> dict:
+    """
+    Read the metadata of a book from its `content.opf` file.
+
+    Args:
+        opf (str): path to the `content.opf` file
+    Returns:
+        metadata ({str:str}): title, creator, publisher and language, and the input and output languages of the dictionary if they are given
+    Modules:
+        bs4 (BeautifulSoup)
+    Functions:
+        GDLC `get_meta_opf_from_soup()`
+    """
+    from bs4 import BeautifulSoup
+    from GDLC.GDLC import get_meta_opf_from_soup
+    with open(Path(opf).expanduser(), encoding='utf8') as infile:
+        soup = BeautifulSoup(infile, features='xml')
+    metadata = {key: str(value).strip() for key, value in get_meta_opf_from_soup(soup, tags=['title', 'creator', 'publisher', 'language']).items()}
+    for key in ('DictionaryInLanguage', 'DictionaryOutLanguage'):
+        tag = soup.find(key)
+        if tag:
+            metadata[key] = tag.get_text().strip()
+    return metadata
+
+
+class MobiWriter:
+    """
+    Write a Kindle dictionary in the MOBI format, from a stream of formatted entries.
+
+    Args:
+        path (str): path to the book, e.g. '~/GDLC/output/GDLC.mobi'
+        metadata ({str:str}, optional): as returned by `get_metadata()`. The input and output languages of the dictionary default to the language of the book.
+        compression (int, optional): 2 for PalmDOC, 1 for no compression, faster to write
+        timestamp (int, optional): creation date written in the Palm database header. The same entries, metadata and timestamp make the same file.
+    Notes:
+        The text is cut into records of 4096 bytes, compressed and written to a temporary file as the entries are added: only the keys of the index are kept in memory. The <idx:entry> and <idx:orth> tags are removed from the text. Each key, the value of <idx:orth> and of each <idx:iform>, is written to the orthographic index with the position and length of its entry in the text, so that an inflected form finds its entry directly. A character split between two records is copied after the first as a multibyte trailing entry.
+    Usage:
+        with MobiWriter('GDLC.mobi', metadata=get_metadata('content.opf')) as book:
+            for entry in entries:
+                book.add(entry)
+    """
+    def __init__(self, path, metadata=None, compression=2, timestamp=0):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.metadata = dict(metadata or {})
+        for key in ('DictionaryInLanguage', 'DictionaryOutLanguage'):
+            self.metadata.setdefault(key, self.metadata.get('language', ''))
+        self.compression = compression
+        self.timestamp = timestamp
+        self.spool = open(str(self.path) + '.records', 'w+b')
+        self.sizes = []
+        self.keys = []
+        self.buffer = bytearray()
+        self.length = 0
+        self.write(TEXT_START)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, *exc):
+        if kind is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+    def write(self, data: bytes) -> None:
+        """Add bytes to the text, and write the records that are full."""
+        self.buffer += data
+        self.length += len(data)
+        while len(self.buffer) > RECORD_SIZE:
+            self.write_record()
+        return None
+
+    def write_record(self) -> None:
+        """Compress the next 4096 bytes of text, or the rest of the text, and write them as a record."""
+        chunk = bytes(self.buffer[:RECORD_SIZE])
+        # the continuation bytes of a character split at the end of the record:
+        n = 0
+        while n < 3 and RECORD_SIZE + n < len(self.buffer) and 0x80 <= self.buffer[RECORD_SIZE + n] < 0xC0:
+            n += 1
+        record = palmdoc_compress(chunk) if self.compression == 2 else chunk
+        record += bytes(self.buffer[RECORD_SIZE:RECORD_SIZE + n]) + bytes([n])
+        self.spool.write(record)
+        self.sizes.append(len(record))
+        del self.buffer[:RECORD_SIZE]
+        return None
+
+    def add(self, entry) -> None:
+        """
+        Add an entry to the book.
+
+        Args:
+            entry (Entry or str): a formatted <idx:entry>, or a protected tag, e.g. a heading, written as is
+        Functions:
+            `get_entry_keys()`, `strip_index_tags()`
+        """
+        markup = str(entry)
+        if getattr(entry, 'protected', False) or '<idx:entry' not in markup:
+            self.write(markup.encode('utf8') + b'\n')
+            return None
+        text = strip_index_tags(markup).encode('utf8')
+        for key in get_entry_keys(markup):
+            # at most 255 bytes, without a split character:
+            key = key.encode('utf8')[:255].decode('utf8', 'ignore').encode('utf8')
+            self.keys.append((key, self.length, len(text)))
+        self.write(text + b'\n')
+        return None
+
+    def get_index_records(self, language: int) -> list:
+        """
+        Return the records of the orthographic index: a header record, followed by records of entries sorted by key.
+
+        Args:
+            language (int): language code of the keys
+        Returns:
+            records ([bytes]): the INDX records
+        Functions:
+            `encode_value()`, `get_indx_record()`
+        Notes:
+            Each entry is its key, a control byte, and the position (tag 1) and length (tag 2) of the text of the entry. The header record lists the last key and the number of entries of each record, so that a reader finds the record of a key without reading the others.
+        """
+        blocks, block, size = [], [], 0
+        for key, start, length in sorted(self.keys):
+            entry = bytes([len(key)]) + key + b'\x03' + encode_value(start) + encode_value(length)
+            if block and size + len(entry) + 2 * (len(block) + 1) > INDEX_RECORD_SIZE:
+                blocks.append(block)
+                block, size = [], 0
+            block.append((key, entry))
+            size += len(entry)
+        if block:
+            blocks.append(block)
+        tagx = b'TAGX' + struct.pack('>II', 12 + 4 * len(ORTH_TAGS), 1) + b''.join(bytes(tag) for tag in ORTH_TAGS)
+        geometry = [bytes([len(block[-1][0])]) + block[-1][0] + struct.pack('>H', len(block)) for block in blocks]
+        records = [get_indx_record(geometry, kind=0, count=len(blocks), language=language, total=len(self.keys), tagx=tagx)]
+        records += [get_indx_record([entry for _, entry in block], kind=1, count=len(block)) for block in blocks]
+        return records
+
+    def get_header(self, index: int, language: int) -> bytes:
+        """
+        Return record 0: the PalmDOC header, the MOBI header, the EXTH metadata and the full title.
+
+        Args:
+            index (int): number of the header record of the orthographic index
+            language (int): language code of the book
+        Modules:
+            struct, zlib
+        """
+        title = self.metadata.get('title', self.path.stem).encode('utf8')
+        exth = b''
+        records = [(100, 'creator'), (101, 'publisher'), (503, 'title'), (524, 'language'), (531, 'DictionaryInLanguage'), (532, 'DictionaryOutLanguage')]
+        count = 0
+        for kind, key in records:
+            if self.metadata.get(key):
+                value = self.metadata[key].encode('utf8')
+                exth += struct.pack('>II', kind, 8 + len(value)) + value
+                count += 1
+        exth = b'EXTH' + struct.pack('>II', 12 + len(exth), count) + exth
+        exth += b'\x00' * (-len(exth) % 4)
+        header = bytearray(16 + MOBI_HEADER_LENGTH)
+        struct.pack_into('>HHIHHHH', header, 0, self.compression, 0, self.length, len(self.sizes), RECORD_SIZE, 0, 0)
+        header[0x10:0x14] = b'MOBI'
+        struct.pack_into('>IIIII', header, 0x14, MOBI_HEADER_LENGTH, 2, 65001, zlib.crc32(title), 6)
+        struct.pack_into('>I', header, 0x28, index)
+        for offset in range(0x2C, 0x50, 4):
+            struct.pack_into('>I', header, offset, NULL_INDEX)
+        struct.pack_into('>IIIIIIII', header, 0x50, len(self.sizes) + 1, len(header) + len(exth), len(title), language, language, LANGUAGES.get(self.metadata.get('DictionaryOutLanguage', '')[:2].lower(), 0), 6, NULL_INDEX)
+        struct.pack_into('>I', header, 0x80, 0x50)
+        for offset in (0xA4, 0xA8, 0xC8, 0xD0, 0xE0, 0xE8, 0xEC, 0xF4):
+            struct.pack_into('>I', header, offset, NULL_INDEX)
+        struct.pack_into('>HHI', header, 0xC0, 1, len(self.sizes), 1)
+        struct.pack_into('>I', header, 0xF0, 1)
+        record = bytes(header) + exth + title + b'\x00\x00'
+        return record + b'\x00' * (-len(record) % 4)
+
+    def close(self) -> Path:
+        """
+        Write the last text record, the index, record 0 and the Palm database header, and move the book into place.
+
+        Returns:
+            path (Path): path to the book
+        Modules:
+            os, shutil, struct
+        Functions:
+            `get_index_records()`, `get_header()`
+        """
+        self.write(TEXT_END)
+        while self.buffer:
+            self.write_record()
+        language = LANGUAGES.get(self.metadata.get('language', '')[:2].lower(), 0)
+        index = len(self.sizes) + 1
+        records = self.get_index_records(language) + [b'\xe9\x8e\r\n']
+        header = self.get_header(index, language)
+        sizes = [len(header)] + self.sizes + [len(record) for record in records]
+        name = re.sub(rb'[^A-Za-z0-9]+', b'_', self.metadata.get('title', self.path.stem).encode('ascii', 'ignore'))[:31]
+        temp = Path(str(self.path) + '.tmp')
+        with open(temp, 'wb') as f:
+            f.write(PALMDB_HEADER.pack(name, 0, 0, self.timestamp, self.timestamp, 0, 0, 0, 0, b'BOOK', b'MOBI', 2 * len(sizes) - 1, 0, len(sizes)))
+            offset = PALMDB_HEADER.size + 8 * len(sizes) + 2
+            for i, size in enumerate(sizes):
+                f.write(struct.pack('>II', offset, 2 * i))
+                offset += size
+            f.write(b'\x00\x00')
+            f.write(header)
+            self.spool.seek(0)
+            shutil.copyfileobj(self.spool, f)
+            for record in records:
+                f.write(record)
+        self.discard()
+        os.replace(temp, self.path)
+        return self.path
+
+    def discard(self) -> None:
+        """Close and remove the temporary file of the text records."""
+        self.spool.close()
+        with contextlib.suppress(FileNotFoundError):
+            Path(self.spool.name).unlink()
+        return None
+
+
+def get_indx_record(entries, kind=1, count=0, language=0, total=0, tagx=b'') -> bytes:
+    """
+    Return an INDX record: the header, the TAGX table for the header record, the entries, and the IDXT table of their offsets.
+
+    Args:
+        entries ([bytes]): the entries of the record
+        kind (int, optional): 0 for the header record of an index, 1 for a record of entries
+        count (int, optional): number of records of entries for the header record, number of entries otherwise
+        language (int), total (int): language code and total number of entries, for the header record
+        tagx (bytes, optional): the TAGX table, for the header record
+    Modules:
+        struct
+    """
+    header = bytearray(INDX_HEADER_LENGTH)
+    body = bytearray(tagx)
+    offsets = []
+    for entry in entries:
+        offsets.append(INDX_HEADER_LENGTH + len(body))
+        body += entry
+    body += b'\x00' * (-len(body) % 4)
+    start = INDX_HEADER_LENGTH + len(body)
+    header[0:4] = b'INDX'
+    struct.pack_into('>13I', header, 4, INDX_HEADER_LENGTH, 0, kind, 0, start, count, 65001 if kind == 0 else NULL_INDEX, language, total, 0, 0, 0, 0)
+    idxt = b'IDXT' + struct.pack('>{}H'.format(len(offsets)), *offsets)
+    idxt += b'\x00' * (-len(idxt) % 4)
+    return bytes(header) + bytes(body) + idxt
+
+
+def write_mobi(entries, path, opf=None, metadata=None, compression=2, timestamp=0) -> Path:
+    """
+    Write a Kindle dictionary from a stream of formatted entries.
+
+    Args:
+        entries ([Entry] or [str]): e.g. the records yielded by `iter_dictionary()` or `shard.iter_files()`
+        path (str): path to the book
+        opf (str, optional): path to the `content.opf` file of the source, read for the metadata
+        metadata ({str:str}, optional): metadata of the book, in place of or on top of those of `opf`
+        compression, timestamp: see `MobiWriter`
+    Returns:
+        path (Path): path to the book
+    Functions:
+        `get_metadata()`, `MobiWriter`
+    """
+    metadata = {**(get_metadata(opf) if opf else {}), **(metadata or {})}
+    with MobiWriter(path, metadata=metadata, compression=compression, timestamp=timestamp) as book:
+        for entry in entries:
+            book.add(entry)
+    return book.path
+
+
+def make_kindle(files, path, opf=None, metadata=None, compression=2, **options) -> Path:
+    """
+    Process the source files and write the Kindle dictionary in one pass, without KindleGen.
+
+    Args:
+        files ([str]): paths to the source files, in order
+        path (str): path to the book, e.g. '~/GDLC/output/GDLC.mobi'
+        opf, metadata, compression: see `write_mobi()`
+        options: other arguments as in `main_loop()`, see `get_loop_options()`
+    Returns:
+        path (Path): path to the book
+    Modules:
+        pathlib (Path), GDLC (cache, progress, shard, inflect)
+    Functions:
+        GDLC `get_loop_options()`, `shard.iter_files()`, `inflect.inflect_entries()`, `write_mobi()`
+    Notes:
+        The entries are formatted and written one at a time: neither the output files nor the whole book are ever held in memory.
+    """
+    from GDLC.GDLC import get_loop_options
+    options = get_loop_options(**options)
+    if isinstance(options['cache'], (str, Path)):
+        from GDLC.cache.cache import EntryCache
+        with EntryCache(options['cache']) as entry_cache:
+            return make_kindle(files, path, opf=opf, metadata=metadata, compression=compression, **{**options, 'cache': entry_cache})
+    from GDLC.shard.shard import iter_files
+    progress, inflections = options.pop('progress'), options.pop('inflections')
+    reporter = None
+    if progress:
+        from GDLC.progress.progress import Progress
+        reporter = Progress(total_files=len(files), total_bytes=sum(Path(file).stat().st_size for file in files))
+    entries = iter_files(files, progress=reporter, **options)
+    if inflections:
+        from GDLC.inflect.inflect import inflect_entries
+        entries = inflect_entries(entries)
+    path = write_mobi(entries, path, opf=opf, metadata=metadata, compression=compression)
+    if reporter:
+        reporter.close()
+    return path
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC progress display
+
+One progress display for a whole run: files done, entries processed, entries per second, megabytes per second and the estimated time left. The display is refreshed at a throttled rate, so reporting an entry costs a few additions and a clock read.
+
+On a terminal, the display is a single line rewritten in place. When the output is not a terminal, e.g. redirected to a log file, a line is printed every `log_interval` seconds instead.
+
+Worker processes report to the parent through a `SharedCounter`: entries are counted locally and added to a shared integer in batches, and the parent reads the shared integer when it refreshes the display.
+
+Usage:
+    main_loop(files, dir, progress=True)  # one display for all files, with or without workers
+
+    or for a single file:
+        progress = Progress(total_entries=len(body.contents))
+        make_dictionary(body, progress=progress)
+        progress.close()
+
+Created 18 October 2026
+"""
+import multiprocessing
+import sys
+from time import perf_counter
+
+from GDLC.memory.memory import MB
+
+
+# shared count of entries, set in each worker process by `init_worker()`:
+_counter = None
+
+
+def init_worker(counter) -> None:
+    """Set the shared count of entries in a worker process. Passed as `initializer` to the process pool."""
+    global _counter
+    _counter = counter
+    return None
+
+
+def get_time_string(seconds) -> str:
+    """Format a number of seconds as H:MM:SS, or '--:--:--' if unknown."""
+    if seconds is None:
+        return '--:--:--'
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+
+
+class Progress:
+    """
+    Progress display for a run of several files.
+
+    Args:
+        total_files (int, optional): number of files in the run
+        total_bytes (int, optional): total size of the files, used for MB/s and the ETA
+        total_entries (int, optional): number of entries, used for the ETA when the size is unknown
+        interval (float, optional): seconds between two refreshes on a terminal
+        log_interval (float, optional): seconds between two log lines when the output is not a terminal
+        stream (file, optional): where the display is written. Defaults to `sys.stdout`.
+    Notes:
+        `update()` is called in the hot loop, once per entry. It only reads the clock and returns, unless `interval` seconds have passed since the last refresh.
+    """
+    def __init__(self, total_files=0, total_bytes=0, total_entries=0, interval=0.5, log_interval=10.0, stream=None):
+        self.stream = sys.stdout if stream is None else stream
+        isatty = getattr(self.stream, 'isatty', None)
+        self.tty = bool(isatty and isatty())
+        self.interval = interval if self.tty else log_interval
+        self.total_files, self.total_bytes, self.total_entries = total_files, total_bytes, total_entries
+        self.files, self.bytes, self.entries = 0, 0, 0
+        self.counter = None
+        self.started = self.last = perf_counter()
+        self.width = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def get_counter(self):
+        """Return the shared count of entries, created on first use, to be passed to `init_worker()`."""
+        if self.counter is None:
+            self.counter = multiprocessing.Value('q', 0)
+        return self.counter
+
+    def get_entries(self) -> int:
+        """Return the number of entries counted here and by the workers."""
+        return self.entries + (self.counter.value if self.counter is not None else 0)
+
+    def get_eta(self, elapsed):
+        """Return the estimated number of seconds left, from the bytes, entries or files done, or None if unknown."""
+        for done, total in ((self.bytes, self.total_bytes), (self.get_entries(), self.total_entries), (self.files, self.total_files)):
+            if total:
+                if not done:
+                    return None
+                return max(elapsed * (total - done) / done, 0.0)
+        return None
+
+    def get_line(self, now=None) -> str:
+        """Return the progress line: files done, entries, entries/s, MB/s and ETA."""
+        elapsed = (perf_counter() if now is None else now) - self.started
+        entries = self.get_entries()
+        rate = entries / elapsed if elapsed > 0 else 0.0
+        speed = self.bytes / elapsed / MB if elapsed > 0 else 0.0
+        parts = []
+        if self.total_files:
+            parts.append('files {}/{}'.format(self.files, self.total_files))
+        parts.append('{} entries'.format(entries))
+        parts.append('{:.0f} entries/s'.format(rate))
+        if self.total_bytes:
+            parts.append('{:.2f} MB/s'.format(speed))
+        parts.append('elapsed ' + get_time_string(elapsed))
+        parts.append('ETA ' + get_time_string(self.get_eta(elapsed)))
+        return ' | '.join(parts)
+
+    def update(self, entries=0, files=0, bytes=0) -> None:
+        """Add to the counts, and refresh the display if `interval` seconds have passed."""
+        self.entries += entries
+        self.files += files
+        self.bytes += bytes
+        now = perf_counter()
+        if now - self.last >= self.interval:
+            self.refresh(now)
+        return None
+
+    def refresh(self, now=None) -> None:
+        """Write the progress line, in place on a terminal, as a new line otherwise."""
+        self.last = perf_counter() if now is None else now
+        line = self.get_line(self.last)
+        if self.tty:
+            self.stream.write('\r' + line.ljust(self.width))
+            self.width = len(line)
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
+        return None
+
+    def poll(self) -> None:
+        """Refresh the display if `interval` seconds have passed, e.g. while waiting for the workers."""
+        if perf_counter() - self.last >= self.interval:
+            self.refresh()
+        return None
+
+    def flush(self) -> None:
+        """Nothing to send: the counts of the main process are read directly. See `SharedCounter.flush()`."""
+        return None
+
+    def write(self, message) -> None:
+        """Print a message without breaking the progress line."""
+        if self.tty and self.width:
+            self.stream.write('\r' + ' ' * self.width + '\r')
+            self.width = 0
+        self.stream.write(str(message) + '\n')
+        self.stream.flush()
+        return None
+
+    def close(self) -> None:
+        """Write the final progress line."""
+        self.refresh()
+        if self.tty:
+            self.stream.write('\n')
+            self.width = 0
+        return None
+
+
+class SharedCounter:
+    """
+    Count entries in a worker process, and add them to the count of the parent in batches.
+
+    Args:
+        batch (int, optional): number of entries counted locally before they are added to the shared count
+    Notes:
+        The shared count is a `multiprocessing.Value` set by `init_worker()` when the worker starts. The counter itself only holds plain numbers, so it is sent to the workers with the other arguments of `main_loop_file()`. Without a shared count, e.g. outside a process pool, entries are dropped.
+    """
+    def __init__(self, batch=100):
+        self.batch = batch
+        self.pending = 0
+
+    def update(self, entries=0, files=0, bytes=0) -> None:
+        """Count entries. Files and bytes are counted by the parent."""
+        self.pending += entries
+        if self.pending >= self.batch:
+            self.flush()
+        return None
+
+    def flush(self) -> None:
+        """Add the entries counted so far to the shared count."""
+        if self.pending and _counter is not None:
+            with _counter.get_lock():
+                _counter.value += self.pending
+        self.pending = 0
+        return None
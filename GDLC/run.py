@@ -20,8 +20,7 @@ Install the dependencies, including: beautifulsoup4, lxml, html5lib. For instanc
     conda install -n sp lxml
     conda install -n sp html5lib
 
-Install the progress bar (used in the main loop, can be turned off):
-    pip install progressbar2
+The progress display of the main loop is built in, no extra package is needed.
 
 Created 9 May 2020
 
@@ -159,6 +158,12 @@ files[0], files[-1]  # check first and last
 # To loop, state explicit full path to source file (with extension), and full path to output directory (not files)
 main_loop(files=files, dir='/Users/PatrickToche/GDLC/output/GDLC_processed/mobi8/OEBPS/Text')
 
+# Stream the files with lxml instead of building a BeautifulSoup object for each file:
+main_loop(files=files, dir='/Users/PatrickToche/GDLC/output/GDLC_processed/mobi8/OEBPS/Text', engine='lxml-stream')
+
+# Or send the files to a pool of worker processes (one per core):
+main_loop(files=files, dir='/Users/PatrickToche/GDLC/output/GDLC_processed/mobi8/OEBPS/Text', workers=os.cpu_count())
+
 # Copy files 000-015 and 276-277 from source
 files= infilelist[0:16] + infilelist[276:278]
 import shutil
@@ -166,6 +171,7 @@ for file in files:
     shutil.copy(file, outdir)
 
 
-## SECTION V: Make Kindle with Kindlegen
-# TO DO!
-make_kindle()
+## SECTION V: Make Kindle without Kindlegen
+from GDLC.mobi.mobi import make_kindle
+# Format the source files and write the dictionary, with an orthographic index of the headwords:
+make_kindle(files=infilelist[16:277], path='/Users/PatrickToche/GDLC/output/GDLC.mobi', opf='/Users/PatrickToche/GDLC/source/GDLC_unpacked/mobi8/OEBPS/content.opf')
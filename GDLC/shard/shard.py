@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC output shards
+
+Repack the entries of the dictionary into output files of a chosen size, instead of one output file per source file. The source files follow the ~290 KB split of KindleUnpack, so the number of entries per file varies a lot, while the time and memory used by KindleGen depend on the number and size of the files it compiles.
+
+The entries of all source files are streamed in order, with `iter_dictionary()`, and written to shard files of at most `max_entries` entries or `max_bytes` bytes. With `letters=True`, a new shard is also started where the first letter of the headwords changes. A shard is written as soon as it is full, so only the entries of the current shard are in memory.
+
+Links between entries point to the source files, e.g. `part0016.xhtml#d00269`. Once the shards are written, each link is pointed to the shard that holds the id. The manifest, spine and guide of `content.opf` are updated to list the shards in place of the source files.
+
+Usage:
+    shard_loop(files, dir, max_bytes=500000, letters=True, opf='~/GDLC/source/GDLC_unpacked/mobi8/OEBPS/content.opf')
+
+Created 18 October 2026
+"""
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+
+def get_letter(label: str) -> str:
+    """Return the first letter of a label, lower case and without accent, e.g. 'a' for 'Àbac'. Empty if the label does not start with a letter."""
+    letter = unicodedata.normalize('NFKD', label[:1]).encode('ascii', 'ignore').decode('ascii').lower()
+    return letter if letter.isalpha() else ''
+
+
+def iter_files(files, tags=[], protected=[], classes=[], clean=False, features='lxml', engine='bs4', cache=None, progress=None, verbose=False):
+    """
+    Yield the entries of several source files, in order, as `Entry` records.
+
+    Args:
+        files ([str]): paths to the source files
+        progress (Progress, optional): progress display, updated with the entries, files and bytes done
+        Other arguments as in `main_loop()`, with `cache` an open EntryCache.
+    Returns:
+        entry (Entry): one record per formatted entry or protected tag
+    Modules:
+        pathlib (Path), bs4 (BeautifulSoup)
+    Functions:
+        GDLC `iter_dictionary()`
+    """
+    from GDLC.GDLC import iter_dictionary
+    for file in files:
+        if engine == 'lxml-stream':
+            source = file
+        else:
+            with open(file, encoding='utf8') as infile:
+                source = BeautifulSoup(infile, features=features).find('body')
+        yield from iter_dictionary(source, tags=tags, protected=protected, classes=classes, clean=clean, features=features, progress=progress or False, verbose=verbose, engine=engine, cache=cache, source=Path(file).name)
+        if progress:
+            progress.update(files=1, bytes=Path(file).stat().st_size)
+
+
+def write_shards(entries, dir, max_entries=None, max_bytes=300000, letters=False, name='shard{:04d}.xhtml'):
+    """
+    Write a stream of entries to shard files of bounded size.
+
+    Args:
+        entries ([Entry]): records yielded by `iter_dictionary()` or `iter_files()`
+        dir (str): output directory
+        max_entries (int, optional): maximum number of entries per shard
+        max_bytes (int, optional): maximum size of the entries of a shard, in bytes. A single larger entry makes a shard of its own.
+        letters (bool, optional): if True, start a new shard where the first letter of the headwords changes
+        name (str, optional): pattern of the shard file names, numbered from 0
+    Returns:
+        shards ([str]): names of the shard files, in order
+        ids ({(str, str):str}): for each source file and id found in its entries, the name of the shard
+        sources ({str:str}): for each source file, the name of the shard that holds its first entry
+    Modules:
+        os, re, pathlib (Path)
+    Functions:
+        `get_letter()`, GDLC `template_page()`
+    Notes:
+        Protected tags, e.g. the <h2> heading of a letter, are kept with the entry that follows them.
+    """
+    from GDLC.GDLC import template_page
+    dir = Path(dir).expanduser()
+    start, end = template_page()
+    shards, ids, sources = [], {}, {}
+    stream, count, size, letter = None, 0, 0, None
+    pending = []
+
+    def write(stream, items):
+        for item in items:
+            stream.write(item.markup)
+            stream.write('\n')
+            for id in re.findall(r'\sid="([^"]+)"', item.markup):
+                ids.setdefault((item.source, id), shards[-1])
+            sources.setdefault(item.source, shards[-1])
+
+    def close(stream):
+        stream.write(end)
+        stream.close()
+        temp = dir.joinpath(shards[-1] + '.tmp')
+        os.replace(temp, dir.joinpath(shards[-1]))
+
+    for entry in entries:
+        pending.append(entry)
+        if entry.protected:
+            continue
+        new_letter = get_letter(entry.label) if letters else None
+        new_size = sum(len(item.markup.encode('utf8')) + 1 for item in pending)
+        # start a new shard when the current one is full, or at a new letter:
+        if stream is None or (max_entries and count >= max_entries) or (max_bytes and size + new_size > max_bytes) or (letters and new_letter != letter):
+            if stream is not None:
+                close(stream)
+            shards.append(name.format(len(shards)))
+            stream = open(dir.joinpath(shards[-1] + '.tmp'), 'w', encoding='utf8')
+            stream.write(start)
+            count, size, letter = 0, 0, new_letter
+        write(stream, pending)
+        count += 1
+        size += new_size
+        pending = []
+    # protected tags after the last entry end the last shard:
+    if pending:
+        if stream is None:
+            shards.append(name.format(len(shards)))
+            stream = open(dir.joinpath(shards[-1] + '.tmp'), 'w', encoding='utf8')
+            stream.write(start)
+        write(stream, pending)
+    if stream is not None:
+        close(stream)
+    return shards, ids, sources
+
+
+def get_link(href: str, ids: dict, sources: dict) -> str:
+    """Return the link `href` pointed to the shard that holds its id, or to the first shard of its source file. Other links are returned unchanged."""
+    file, _, fragment = href.partition('#')
+    prefix, _, name = file.rpartition('/')
+    if name not in sources:
+        return href
+    shard = ids.get((name, fragment)) or sources[name]
+    return (prefix + '/' if prefix else '') + shard + ('#' + fragment if fragment else '')
+
+
+def relink_shards(dir, shards, ids, sources) -> int:
+    """
+    Point the links between entries to the shards that now hold their target.
+
+    Args:
+        dir (str): output directory
+        shards ([str]), ids ({str:str}), sources ({str:str}): as returned by `write_shards()`
+    Returns:
+        n (int): number of links changed
+    Modules:
+        os, re, pathlib (Path)
+    Functions:
+        `get_link()`
+    """
+    dir = Path(dir).expanduser()
+    n = 0
+    for shard in shards:
+        file = dir.joinpath(shard)
+        text = file.read_text(encoding='utf8')
+        changed = 0
+
+        def replace(match):
+            nonlocal changed
+            href = get_link(match.group(2), ids, sources)
+            changed += href != match.group(2)
+            return match.group(1) + href + '"'
+
+        text = re.sub(r'(<a\s[^>]*?href=")([^"]*)"', replace, text)
+        if changed:
+            temp = Path(str(file) + '.tmp')
+            temp.write_text(text, encoding='utf8')
+            os.replace(temp, file)
+            n += changed
+    return n
+
+
+def update_opf(opf, shards, ids, sources, outfile=None, prefix='Text/') -> Path:
+    """
+    List the shards in the manifest and spine of a `content.opf` file, in place of the source files.
+
+    Args:
+        opf (str): path to the `content.opf` file of the source
+        shards ([str]), ids ({str:str}), sources ({str:str}): as returned by `write_shards()`
+        outfile (str, optional): path to the updated file. Defaults to `opf`, which is overwritten.
+        prefix (str, optional): directory of the text files, relative to `content.opf`
+    Returns:
+        outfile (Path): path to the updated file
+    Modules:
+        os, re, pathlib (Path)
+    Functions:
+        `get_link()`
+    Notes:
+        The shards take the place of the first source file in the manifest and in the spine, and the other source files are removed. The guide references are pointed to the shards with `get_link()`. The rest of the file is left untouched.
+    """
+    opf = Path(opf).expanduser()
+    outfile = Path(outfile).expanduser() if outfile else opf
+    text = opf.read_text(encoding='utf8')
+    # manifest: replace the items of the source files by the items of the shards:
+    removed = set()
+    items = '\n'.join('<item id="{}" media-type="application/xhtml+xml" href="{}" />'.format(Path(shard).stem, prefix + shard) for shard in shards)
+
+    def replace_item(match):
+        href = re.search(r'\shref="([^"]*)"', match.group(1))
+        if href is None or not href.group(1).startswith(prefix) or href.group(1)[len(prefix):] not in sources:
+            return match.group(0)
+        removed.add(re.search(r'\sid="([^"]*)"', match.group(1)).group(1))
+        return items + '\n' if len(removed) == 1 else ''
+
+    text = re.sub(r'(<item\s[^>]*>)\n?', replace_item, text)
+    # spine: the same, in reading order:
+    itemrefs = '\n'.join('<itemref idref="{}"/>'.format(Path(shard).stem) for shard in shards)
+    done = False
+
+    def replace_itemref(match):
+        nonlocal done
+        if match.group(2) not in removed:
+            return match.group(0)
+        if done:
+            return ''
+        done = True
+        return itemrefs + '\n'
+
+    text = re.sub(r'(<itemref\s[^>]*?idref="([^"]*)"[^>]*>)\n?', replace_itemref, text)
+    # guide: point the references to the shards:
+    text = re.sub(r'(<reference\s[^>]*?href=")([^"]*)"', lambda match: match.group(1) + get_link(match.group(2), ids, sources) + '"', text)
+    outfile.parent.mkdir(parents=True, exist_ok=True)
+    temp = Path(str(outfile) + '.tmp')
+    temp.write_text(text, encoding='utf8')
+    os.replace(temp, outfile)
+    return outfile
+
+
+def shard_loop(files, dir, max_entries=None, max_bytes=300000, letters=False, opf=None, **options):
+    """
+    Process source files and write their entries to shards of bounded size, instead of one output file per source file.
+
+    Args:
+        files ([str]): paths to the source files, in order
+        dir (str): output directory
+        max_entries, max_bytes, letters: size of the shards, see `write_shards()`
+        opf (str, optional): path to the `content.opf` file of the source. If given, an updated copy is saved as `content.opf` in `dir`.
+        options: other arguments as in `main_loop()`, see `get_loop_options()`
+    Returns:
+        shards ([Path]): paths to the shard files
+    Modules:
+        pathlib (Path), GDLC (cache, progress, inflect)
+    Functions:
+        GDLC `get_loop_options()`, `iter_files()`, `write_shards()`, `relink_shards()`, `update_opf()`, `inflect.inflect_entries()`
+    """
+    from GDLC.GDLC import get_loop_options
+    options = get_loop_options(**options)
+    if isinstance(options['cache'], (str, Path)):
+        from GDLC.cache.cache import EntryCache
+        with EntryCache(options['cache']) as entry_cache:
+            return shard_loop(files, dir, max_entries=max_entries, max_bytes=max_bytes, letters=letters, opf=opf, **{**options, 'cache': entry_cache})
+    dir = Path(dir).expanduser()
+    dir.mkdir(parents=True, exist_ok=True)
+    progress, inflections = options.pop('progress'), options.pop('inflections')
+    reporter = None
+    if progress:
+        from GDLC.progress.progress import Progress
+        reporter = Progress(total_files=len(files), total_bytes=sum(Path(file).stat().st_size for file in files))
+    entries = iter_files(files, progress=reporter, **options)
+    if inflections:
+        from GDLC.inflect.inflect import inflect_entries
+        entries = inflect_entries(entries)
+    shards, ids, sources = write_shards(entries, dir, max_entries=max_entries, max_bytes=max_bytes, letters=letters)
+    if reporter:
+        reporter.close()
+    relink_shards(dir, shards, ids, sources)
+    if opf:
+        update_opf(opf, shards, ids, sources, outfile=dir / 'content.opf')
+    return [dir / shard for shard in shards]
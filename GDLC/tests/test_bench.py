@@ -0,0 +1,41 @@
+""" 
+Time GDLC functions on fixed inputs and flag regressions between runs.
+
+>>> from GDLC.bench.bench import *
+>>> import tempfile
+>>> tmp = Path(tempfile.mkdtemp())
+>>> sample = tmp / 'sample.xhtml'
+>>> _ = sample.write_text(SAMPLE, encoding='utf8')
+>>> history = tmp / 'bench.json'
+
+>>> 'make_entry' in list_benchmarks(), 'main_loop' in list_benchmarks()
+(True, True)
+>>> record = run_benchmarks(files=[sample], names=['make_entry', 'make_strip_pipeline'], repeat=1, history=history, label='base', verbose=False)
+>>> sorted(record['results'])
+['make_entry sample.xhtml', 'make_strip_pipeline sample.xhtml']
+>>> result = record['results']['make_entry sample.xhtml']
+>>> sorted(result)
+['bytes', 'entries', 'entries_per_s', 'mb_per_s', 'peak_rss_mb', 'seconds']
+>>> result['entries']
+2
+
+Runs are appended to the history:
+>>> _ = run_benchmarks(files=[sample], names=['make_entry', 'make_strip_pipeline'], repeat=1, history=history, label='head', verbose=False)
+>>> [record['label'] for record in read_history(history)]
+['base', 'head']
+
+A benchmark slower than the threshold is flagged:
+>>> records = read_history(history)
+>>> records[-1]['results']['make_entry sample.xhtml']['seconds'] = 2 * records[-2]['results']['make_entry sample.xhtml']['seconds']
+>>> records[-1]['results']['make_strip_pipeline sample.xhtml']['seconds'] = records[-2]['results']['make_strip_pipeline sample.xhtml']['seconds']
+>>> _ = history.write_text(json.dumps(records), encoding='utf8')
+>>> regressions = compare_benchmarks(history, threshold=0.5, verbose=False)
+>>> {key: round(change, 2) for key, change in regressions.items()}
+{'make_entry sample.xhtml': 1.0}
+>>> main(['compare', '--history', str(history), '--threshold', '0.5'])  # doctest: +ELLIPSIS
+benchmark ...
+make_entry sample.xhtml ...REGRESSION
+...
+1
+
+"""
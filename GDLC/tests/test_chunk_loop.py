@@ -0,0 +1,37 @@
+""" 
+Split a source file into chunks of entries at the top-level <blockquote> tags, format the chunks in worker processes, and write them back in order.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.chunk.chunk import chunk_loop, get_body_offsets, get_chunk_offsets
+>>> import tempfile
+
+>>> entries = ''.join('''
+...   <blockquote class="calibre27" id="d{0}">
+...     <p class="rf">-&gt;{0}</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">{0}</strong></code></p>
+...     <p class="ps">Definició de {0}, amb <blockquote>una cita</blockquote>.</p>
+...   </blockquote>'''.format(word) for word in ['abac', 'abat', 'abet', 'beta', 'cap'])
+>>> dml = '<?xml version="1.0" encoding="UTF-8"?><html><body><h2 class="centrat2" id="aid-A">A</h2>' + entries + '</body></html>'
+>>> data = dml.encode('utf8')
+
+The chunks cover the body from end to end, and start at an entry, never at a nested blockquote:
+>>> start, end = get_body_offsets(data)
+>>> data[start:start+4], data[end:]
+(b'<h2 ', b'</body></html>')
+>>> offsets = get_chunk_offsets(data, 300)
+>>> len(offsets)
+3
+>>> offsets[0][0] == start and offsets[-1][1] == end and all(a[1] == b[0] for a, b in zip(offsets, offsets[1:]))
+True
+>>> [data[a:a+30] for a, b in offsets[1:]]
+[b'<blockquote class="calibre27" ', b'<blockquote class="calibre27" ']
+
+The page is the same as when the file is formatted in one piece:
+>>> tmp = Path(tempfile.mkdtemp())
+>>> file = tmp / 'part0001.xhtml'
+>>> _ = file.write_bytes(data)
+>>> outfile = chunk_loop(file, tmp / 'out.xhtml', workers=2, size=300, progress=False)
+>>> outfile.read_text(encoding='utf8') == main_loop_file(file, tags=['blockquote'], protected=['h2'], classes=['calibre27'], progress=False)
+True
+
+"""
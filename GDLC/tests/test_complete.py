@@ -0,0 +1,39 @@
+""" 
+Complete a prefix from a sorted, memory-mapped array of the headwords.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.index.index import PrefixIndex, build_prefix_index, complete, normalize_key
+>>> import tempfile
+
+>>> normalize_key(' Hepàtic  -a'), normalize_key('COL·LEGA')
+('hepatic -a', 'col·lega')
+
+>>> def make_entry_dml(word):
+...     return '''
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;{0}</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">{0}</strong></code></p>
+...     <p class="ps">Definició.</p>
+...   </blockquote>'''.format(word)
+>>> words = ['hepàtic -a', 'hepatitis', 'hepatòcit', 'heptà', 'dofí', 'Hèrcules']
+>>> dml = '<?xml version="1.0" encoding="UTF-8"?><html><body>' + ''.join(make_entry_dml(word) for word in words) + '</body></html>'
+>>> tmp = Path(tempfile.mkdtemp())
+>>> source = tmp / 'part0001.xhtml'
+>>> _ = source.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+>>> main_loop([source], dir=outdir, query=False, progress=False)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...■
+
+Each headword is found from its normalized headword and from its label:
+>>> path = tmp / 'prefixes.bin'
+>>> build_prefix_index([outdir / 'part0001.xhtml'], path)
+7
+>>> with PrefixIndex(path) as index:
+...     len(index), index.complete('hepat'), index.complete('HEPÀ', k=2), index.complete('her'), index.complete('x')
+(7, ['hepàtic -a', 'hepatitis', 'hepatòcit'], ['hepàtic -a', 'hepatitis'], ['Hèrcules'], [])
+>>> complete('d', path)
+['dofí']
+
+"""
@@ -0,0 +1,46 @@
+""" 
+Count the parser invocations needed to process a dictionary entry. 
+Each entry used to cost two parses: one in `make_dictionary()`, one more in `make_definition()`. 
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.debug.debug import count_parser_calls, print_parser_calls
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27" id="d34421">
+...     <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+...     <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+...     <p class="ps">Definition <em class="calibre24">here</em>.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+
+Parsing the page is one invocation:
+>>> soup, n = count_parser_calls(BeautifulSoup, dml, features='lxml')
+>>> n
+1
+
+Making the entry costs no further invocation:
+>>> entry, n = count_parser_calls(make_entry, soup)
+>>> n
+0
+
+>>> soup = BeautifulSoup(dml, features='lxml')
+>>> dico, n = count_parser_calls(make_dictionary, soup.body, tags=['blockquote'], classes=['calibre27'], progress=False)
+>>> n
+0
+
+>>> print_parser_calls(BeautifulSoup(dml, features='lxml').body)
+<BLANKLINE>
+<BLANKLINE>
+Number of entries: 1
+Parser invocations per entry in make_entry():      0.0
+Parser invocations per entry in make_dictionary(): 0.0
+<BLANKLINE>
+<BLANKLINE>
+
+"""
@@ -0,0 +1,75 @@
+""" 
+Cache formatted entries on disk, so that unchanged entries are not processed again.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.cache.cache import EntryCache, get_entry_key
+>>> import tempfile
+>>> import GDLC.GDLC
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;ABC</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">ABC</strong></code></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> path = tmp / 'entries.sqlite'
+>>> options = dict(tags=['blockquote'], classes=['calibre27'], protected=['\\n'], progress=False)
+
+Keys depend on the markup and on the options:
+>>> get_entry_key('<p>ABC</p>', {'clean': False}) == get_entry_key('<p>ABC</p>', {'clean': False})
+True
+>>> get_entry_key('<p>ABC</p>', {'clean': False}) == get_entry_key('<p>ABC</p>', {'clean': True})
+False
+
+The first pass misses and fills the cache, the second pass hits:
+>>> with EntryCache(path) as cache:
+...     dico = make_dictionary(BeautifulSoup(dml, 'lxml').find('body'), cache=cache, **options)
+...     (cache.hits, cache.misses)
+(0, 1)
+>>> with EntryCache(path) as cache:
+...     cached = make_dictionary(BeautifulSoup(dml, 'lxml').find('body'), cache=cache, **options)
+...     (cache.hits, cache.misses, len(cache))
+(1, 0, 1)
+>>> cached == dico
+True
+
+Both engines share the same keys:
+>>> source = tmp / 'part0001.xhtml'
+>>> _ = source.write_text(dml, encoding='utf8')
+>>> with EntryCache(path) as cache:
+...     streamed = make_dictionary(source, cache=cache, engine='lxml-stream', **options)
+...     (cache.hits, cache.misses)
+(1, 0)
+>>> streamed == dico
+True
+
+The keys include a digest of the transform code, so that a change to the code gives new keys:
+>>> package = Path(GDLC.GDLC.__file__).parent
+>>> get_code_fingerprint() == get_files_hash([package / 'GDLC.py', package / 'inflect' / 'inflect.py'])
+True
+
+The least recently used entries are evicted above `max_size`:
+>>> import time
+>>> with EntryCache(tmp / 'small.sqlite', max_size=10) as cache:
+...     cache.put('a', '12345')
+...     cache.flush()
+...     time.sleep(0.01)
+...     cache.put('b', '12345')
+...     cache.flush()
+...     time.sleep(0.01)
+...     cache.get('a')
+...     cache.put('c', '12345')
+...     cache.flush()
+...     (cache.get('a'), cache.get('b'), cache.get('c'), len(cache))
+'12345'
+('12345', None, '12345', 2)
+
+"""
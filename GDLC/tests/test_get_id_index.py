@@ -0,0 +1,30 @@
+""" 
+Index the ids defined across several files and report the ids found in more than one file.
+
+>>> from GDLC.GDLC import *
+>>> import tempfile
+>>> tmp = Path(tempfile.mkdtemp())
+>>> files = [tmp / 'part0001.xhtml', tmp / 'part0002.xhtml']
+>>> _ = files[0].write_text('<body><blockquote id="d1"><p>See <a href="part0002.xhtml#d2">id="d9"</a></p></blockquote><p id="d3"></p></body>', encoding='utf8')
+>>> _ = files[1].write_text('<body><blockquote id="d2"></blockquote><blockquote id="d3"></blockquote></body>', encoding='utf8')
+
+Ids are read from tags only:
+>>> get_id_from_file(files[0])
+['d1', 'd3']
+
+>>> index, collisions = get_id_index(files)
+>>> index
+{'d1': ['part0001.xhtml'], 'd3': ['part0001.xhtml', 'part0002.xhtml'], 'd2': ['part0002.xhtml']}
+>>> collisions
+{'d3': ['part0001.xhtml', 'part0002.xhtml']}
+
+Files may be scanned by a pool of worker processes:
+>>> get_id_index(files, workers=2) == (index, collisions)
+True
+
+The index resolves anchors to other files:
+>>> soup = BeautifulSoup(files[0].read_text(encoding='utf8'), features='lxml')
+>>> print(strip_anchor(soup.body, ids=index))
+<body><blockquote><p>See id="d9"</p></blockquote><p></p></body>
+
+"""
@@ -0,0 +1,46 @@
+""" 
+Add the feminine and plural forms of the headwords to <idx:infl>.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.inflect.inflect import get_forms, get_feminine, get_plural, parse_headword, insert_iforms, inflect_entries
+
+The df line gives the masculine form and the feminine suffix:
+>>> parse_headword('hepàtic -a'), parse_headword('electromotor -motriu [o -motora]'), parse_headword('-dor1 -dora'), parse_headword('etanoic, àcid')
+(('hepàtic', ['a']), ('electromotor', ['motriu', 'motora']), ('', []), ('', []))
+>>> [get_feminine(word, suffix) for word, suffix in [('hepàtic', 'a'), ('endossatari', 'ària'), ('actor', 'triu'), ('francès', 'esa'), ('abat', 'essa'), ('blau', 'va')]]
+['hepàtica', 'endossatària', 'actriu', 'francesa', 'abatessa', 'blava']
+>>> [get_plural(word) for word in ['hepàtica', 'amiga', 'llengua', 'camió', 'francès', 'feliç', 'llapis', 'gas', 'bosc', 'gat']]
+['hepàtiques', 'amigues', 'llengües', 'camions', 'francesos', 'feliços', 'llapis', 'gasos', 'boscs', 'gats']
+>>> get_forms('hepàtic -a')
+['hepàtic', 'hepàtica', 'hepàtics', 'hepàtiques']
+>>> get_forms('escondich* [əskondítʃ]')
+['escondich', 'escondichs']
+
+The forms are added to the <idx:infl> tag of the formatted entries, in batches:
+>>> dml = '''\
+... <body>
+...   <h2 class="centrat2">H</h2>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;hepàtic</p>
+...     <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">hepàtic</strong> <strong class="calibre13">-a</strong></code></p>
+...     <p class="ps">Relatiu o pertanyent al fetge.</p>
+...   </blockquote>
+... </body>'''
+>>> entries = iter_dictionary(BeautifulSoup(dml, 'lxml').body, tags=['blockquote'], classes=['calibre27'], protected=['h2'], progress=False)
+>>> heading, entry = inflect_entries(entries, batch=1)
+>>> heading.markup
+'<h2 class="centrat2">H</h2>'
+>>> print(entry.markup[:entry.markup.index('</idx:orth>')])
+<idx:entry name="Catalan" scriptable="yes" spell="yes">
+<idx:orth value="hepàtic">
+      <idx:infl>
+        <idx:iform name="" value="hepàtic"/>
+        <idx:iform name="" value="hepàtica"/>
+        <idx:iform name="" value="hepàtics"/>
+        <idx:iform name="" value="hepàtiques"/>
+      </idx:infl>
+<BLANKLINE>
+>>> insert_iforms(entry.markup, ['hepàtica']) == entry.markup
+True
+
+"""
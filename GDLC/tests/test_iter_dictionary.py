@@ -0,0 +1,57 @@
+""" 
+Yield the entries of a dictionary file one at a time, as compact `Entry` records.
+
+>>> from GDLC.GDLC import *
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html><body>
+...   <h2 class="centrat2">A</h2>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+...     <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+...   <p class="calibre1">Dropped.</p>
+... </body></html>'''
+>>> options = dict(tags=['blockquote'], classes=['calibre27'], protected=['h2'], progress=False)
+
+The entries are formatted only when they are requested:
+>>> entries = iter_dictionary(BeautifulSoup(dml, 'lxml').body, source='part0001.xhtml', **options)
+>>> heading = next(entries)
+>>> heading
+Entry(1, '<h2 class="centrat2">A</h2>')
+>>> heading.protected, heading.label
+(True, '')
+>>> entry = next(entries)
+>>> entry
+Entry(2, 'ABC -xy1')
+>>> entry.n, entry.source, entry.label, entry.short
+(2, 'part0001.xhtml', 'ABC', 'ABC')
+>>> entry.long
+'<code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup>'
+>>> print(entry.definition)
+<div><blockquote class="calibre27">
+<blockquote><span>Definition here.</span></blockquote>
+</blockquote></div>
+>>> str(entry) == entry.markup
+True
+>>> list(entries)
+[]
+
+A record has no instance dictionary:
+>>> hasattr(entry, '__dict__')
+False
+
+The records of the stream engine are the same, and `make_dictionary()` keeps their markup:
+>>> streamed = list(iter_dictionary(io.BytesIO(dml.encode('utf8')), engine='lxml-stream', **options))
+>>> [(e.n, e.markup) for e in streamed] == [(heading.n, heading.markup), (entry.n, entry.markup)]
+True
+>>> make_dictionary(BeautifulSoup(dml, 'lxml').body, **options) == {'1': heading.markup, '2': entry.markup}
+True
+
+`write_page()` consumes the records as they are yielded:
+>>> page = io.StringIO()
+>>> write_page(page, iter_dictionary(BeautifulSoup(dml, 'lxml').body, **options))
+>>> entry.markup in page.getvalue()
+True
+
+"""
@@ -0,0 +1,58 @@
+""" 
+Index the headwords of the output files and read an entry straight from disk.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.index.index import HeadwordIndex, lookup
+>>> import tempfile
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;dofí</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">dofí</strong></code></p>
+...     <p class="ps">Cetaci.</p>
+...   </blockquote>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;abrasiu</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">abrasiu -iva</strong></code></p>
+...     <p class="ps">Que abrasa.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> source = tmp / 'part0001.xhtml'
+>>> _ = source.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+>>> path = tmp / 'headwords.sqlite'
+>>> main_loop([source], dir=outdir, query=False, progress=False, index=path)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...■
+
+Each entry is indexed with its label, short and long forms, files and byte offset:
+>>> with HeadwordIndex(path) as index:
+...     rows = index.find('abrasiu -iva')
+>>> [(row['headword'], row['label'], row['short'], Path(row['file']).name, row['n']) for row in rows]
+[('abrasiu -iva', 'abrasiu', 'abrasiu', 'part0001.xhtml', 1)]
+>>> rows[0]['source'] == str(source)
+True
+
+Lookup by headword or label reads the entry from the output file:
+>>> entries = lookup('dofí', path)
+>>> len(entries)
+1
+>>> print(entries[0])  # doctest: +ELLIPSIS
+<idx:entry name="Catalan" scriptable="yes" spell="yes">
+<idx:orth value="dofí">
+...Cetaci...
+</idx:entry>
+>>> lookup('abrasiu', path) == lookup('abrasiu -iva', path)
+True
+>>> lookup('missing', path)
+[]
+
+"""
@@ -0,0 +1,52 @@
+""" 
+Process dictionary files, one at a time or in a pool of worker processes.
+
+>>> from GDLC.GDLC import *
+>>> import tempfile
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <h2 class="centrat2" id="aid-F8901">A</h2>
+...   <blockquote class="calibre27" id="d34421">
+...     <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+...     <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> files = [tmp / 'part0001.xhtml', tmp / 'part0002.xhtml']
+>>> for file in files:
+...     _ = file.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+
+>>> main_loop(files, dir=outdir, query=False, progress=False, workers=2)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...NO EXCEPTIONS WERE RECORDED!
+■
+
+>>> page = (outdir / 'part0002.xhtml').read_text(encoding='utf8')
+>>> '<idx:orth value="ABC">' in page, '<h2 class="centrat2" id="aid-F8901">A</h2>' in page
+(True, True)
+
+A missing file is recorded as an error, the other files are still written:
+>>> main_loop([tmp / 'missing.xhtml'] + files, dir=outdir, query=False, progress=False, workers=2)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...The following files raised an exception: [PosixPath('.../missing.xhtml')]
+■
+
+The defaults of the options are shared by all the loops, `shard_loop()`, `chunk_loop()`, `mobi_loop()` and `make_kindle()`:
+>>> options = get_loop_options(classes=['salt10p'])
+>>> options['tags'], options['classes'], options['protected']
+(['blockquote'], ['salt10p'], ['h1', 'h2', 'h3', 'h4', 'h5', '\n'])
+>>> get_loop_options(clases=['salt10p'])
+Traceback (most recent call last):
+...
+TypeError: get_loop_options() got an unexpected keyword argument 'clases'
+
+"""
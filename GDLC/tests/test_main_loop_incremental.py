@@ -0,0 +1,88 @@
+""" 
+Rebuild only the dictionary files that changed since the last run.
+
+>>> from GDLC.GDLC import *
+>>> import tempfile
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;ABC</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">ABC</strong></code></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> files = [tmp / 'part0001.xhtml', tmp / 'part0002.xhtml']
+>>> for file in files:
+...     _ = file.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+
+The first run builds every file and saves a manifest in the output directory:
+>>> main_loop(files, dir=outdir, query=False, progress=False, incremental=True)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...Skipping 0 file(s) unchanged since the last run...
+>>> manifest = read_manifest(outdir)
+>>> sorted(manifest)
+['part0001.xhtml', 'part0002.xhtml']
+>>> sorted(manifest['part0001.xhtml'])
+['code', 'input', 'options', 'version']
+>>> manifest['part0001.xhtml']['input'] == get_file_hash(files[0])
+True
+
+Only the edited file is processed again:
+>>> _ = files[1].write_text(dml.replace('Definition here', 'New definition'), encoding='utf8')
+>>> main_loop(files, dir=outdir, query=False, progress=False, incremental=True)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...Skipping 1 file(s) unchanged since the last run...PROCESSING FILE .../part0002.xhtml :...
+>>> 'New definition' in (outdir / 'part0002.xhtml').read_text(encoding='utf8')
+True
+
+A change to the transform code rebuilds everything, even with the same version:
+>>> manifest['part0001.xhtml']['code'] == get_code_fingerprint()
+True
+>>> manifest = read_manifest(outdir)
+>>> for record in manifest.values():
+...     record['code'] = 'old'
+>>> write_manifest(outdir, manifest)
+>>> main_loop(files, dir=outdir, query=False, progress=False, incremental=True)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...Skipping 0 file(s) unchanged since the last run...
+
+So does a change to the inflection rules, in `inflect/inflect.py`. Here the modules are copied and a rule is added to the copy:
+>>> import shutil
+>>> import GDLC.GDLC
+>>> package = Path(GDLC.GDLC.__file__).parent
+>>> copies = tmp / 'code'
+>>> (copies / 'inflect').mkdir(parents=True)
+>>> modules = [copies / name for name in TRANSFORM_MODULES]
+>>> for name in TRANSFORM_MODULES:
+...     _ = shutil.copy(package / name, copies / name)
+>>> get_files_hash(modules) == get_code_fingerprint()
+True
+>>> with open(copies / 'inflect' / 'inflect.py', 'a', encoding='utf8') as f:
+...     _ = f.write("PLURAL_RULES = PLURAL_RULES + [('ix', 'ixos')]\n")
+>>> changed = get_files_hash(modules)
+>>> changed == get_code_fingerprint()
+False
+>>> main_loop(files, dir=outdir, query=False, progress=False, incremental=True)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...Skipping 2 file(s) unchanged since the last run...
+>>> fingerprint, GDLC.GDLC.get_code_fingerprint = GDLC.GDLC.get_code_fingerprint, lambda: changed
+>>> main_loop(files, dir=outdir, query=False, progress=False, incremental=True)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...Skipping 0 file(s) unchanged since the last run...
+>>> GDLC.GDLC.get_code_fingerprint = fingerprint
+
+Changing an option rebuilds everything:
+>>> main_loop(files, dir=outdir, query=False, progress=False, incremental=True, classes=['calibre27', 'salt10p'])  # doctest: +ELLIPSIS
+<BLANKLINE>
+...Skipping 0 file(s) unchanged since the last run...
+
+"""
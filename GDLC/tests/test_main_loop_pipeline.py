@@ -0,0 +1,66 @@
+""" 
+Read, process and write files in overlapping stages, with bounded queues between the stages.
+
+>>> from GDLC.GDLC import *
+>>> import tempfile
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <h2 class="centrat2" id="aid-F8901">A</h2>
+...   <blockquote class="calibre27" id="d34421">
+...     <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+...     <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> files = [tmp / ('part000' + str(i) + '.xhtml') for i in range(1, 5)]
+>>> for file in files:
+...     _ = file.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+
+The pages are the same as those written one file at a time:
+>>> main_loop(files, dir=outdir, query=False, progress=False, workers=2, pipeline=True, prefetch=1)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...NO EXCEPTIONS WERE RECORDED!
+■
+>>> page = main_loop_file(files[0], clean=False, progress=False, tags=['blockquote'], classes=['calibre27'], protected=['h1', 'h2', 'h3', 'h4', 'h5', '\n'])
+>>> all((outdir / file.name).read_text(encoding='utf8') == page for file in files)
+True
+>>> sorted(path.name for path in outdir.iterdir())
+['.GDLC_manifest.json', 'part0001.xhtml', 'part0002.xhtml', 'part0003.xhtml', 'part0004.xhtml']
+
+The coroutine returns the output file, or the exception raised, for each file in order:
+>>> import asyncio
+>>> results = asyncio.run(main_loop_pipeline([files[0], tmp / 'missing.xhtml'], outdir, workers=1, engine='lxml-stream', progress=False, tags=['blockquote'], classes=['calibre27'], protected=['h2']))  # doctest: +ELLIPSIS
+<BLANKLINE>
+<BLANKLINE>
+PROCESSING FILE .../part0001.xhtml :
+<BLANKLINE>
+>>> results[0] == outdir / 'part0001.xhtml', type(results[1]).__name__
+(True, 'FileNotFoundError')
+
+An error in the writer, e.g. while merging the timings, is recorded for its file, and the other files go through:
+>>> from GDLC.timers.timers import StageTimer
+>>> class BrokenTimer(StageTimer):
+...     def merge(self, other):
+...         raise RuntimeError('merge')
+>>> results = asyncio.run(main_loop_pipeline(files, outdir, workers=1, prefetch=1, timer=BrokenTimer(), engine='lxml-stream', progress=False, tags=['blockquote'], classes=['calibre27'], protected=['h2']))  # doctest: +ELLIPSIS
+<BLANKLINE>
+...
+>>> [type(result).__name__ for result in results]
+['RuntimeError', 'RuntimeError', 'RuntimeError', 'RuntimeError']
+
+A missing file is recorded as an error, the other files are still written:
+>>> main_loop([tmp / 'missing.xhtml'] + files, dir=outdir, query=False, progress=False, workers=2, pipeline=True)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...The following files raised an exception: [PosixPath('.../missing.xhtml')]
+■
+
+"""
@@ -0,0 +1,44 @@
+""" 
+Process a dictionary by streaming the document markup language with lxml.
+
+>>> from GDLC.GDLC import *
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <h2 class="centrat2" id="aid-F8901">A</h2>
+...   <blockquote class="salt10p" id="aid-4F1KC1"><p class="rf">-&gt;A</p></blockquote>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;ABC</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">ABC</strong></code></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> tags, classes, protected = ['blockquote'], ['calibre27'], ['h2']
+>>> dico = make_dictionary(io.BytesIO(dml.encode('utf8')), tags=tags, classes=classes, protected=protected, progress=False, engine='lxml-stream')
+>>> list(dico)
+['1', '3']
+>>> print(dico['1'])
+<h2 class="centrat2" id="aid-F8901">A</h2>
+>>> print(dico['3'])
+<idx:entry name="Catalan" scriptable="yes" spell="yes">
+<idx:orth value="ABC">
+      <idx:infl>
+        <idx:iform name="" value="ABC"/>
+      </idx:infl>
+    </idx:orth><div><span><b>ABC</b></span></div><span><code class="calibre22"><strong class="calibre13">ABC</strong></code>.</span><div><blockquote class="calibre27">
+<blockquote><span>Definition here.</span></blockquote>
+</blockquote></div>
+</idx:entry>
+<BLANKLINE>
+
+The BeautifulSoup engine returns the same dictionary:
+>>> soup = BeautifulSoup(dml, features='lxml')
+>>> make_dictionary(soup.body, tags=tags, classes=classes, protected=protected, progress=False) == dico
+True
+
+"""
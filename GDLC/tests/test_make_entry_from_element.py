@@ -0,0 +1,42 @@
+""" 
+Turn a mobi dictionary entry parsed by lxml into a lookup dictionary entry.
+
+>>> from GDLC.GDLC import *
+>>> from lxml import etree
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27" id="d34421">
+...     <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+...     <p class="df"><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+...     <p class="ps">Definition <em class="calibre24">here</em>.</p>
+...     <p class="p">More details <span class="v1">here</span>.</p>
+...     <p class="p">Even more details <a class="calibre17" href="part0120.xhtml#d34479">here</a>.<br/></p>
+...   </blockquote>
+... </body>
+... </html>
+... '''
+>>> element = etree.HTML(dml.encode('utf8')).find('.//blockquote')
+
+>>> print(make_entry_from_element(element))
+<idx:entry name="Catalan" scriptable="yes" spell="yes">
+<idx:orth value="ABC">
+      <idx:infl>
+        <idx:iform name="" value="ABC"/>
+      </idx:infl>
+    </idx:orth><div><span><b>ABC</b></span></div><span><code class="calibre22"><sup class="calibre23">■</sup><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup>.</span><div><blockquote class="calibre27" id="d34421">
+<blockquote><span>Definition <em class="calibre24">here</em>.</span></blockquote>
+<blockquote><span>More details <span class="v1">here</span>.</span></blockquote>
+<blockquote><span>Even more details <a class="calibre17" href="part0120.xhtml#d34479">here</a>.<br/></span></blockquote>
+</blockquote></div>
+</idx:entry>
+
+The output is the same as with BeautifulSoup:
+>>> soup = BeautifulSoup(dml, features='lxml')
+>>> make_entry(soup) == make_entry_from_element(etree.HTML(dml.encode('utf8')).find('.//blockquote'))
+True
+
+"""
@@ -0,0 +1,55 @@
+""" 
+Compile several strip operations into a single tree walk:
+
+>>> from GDLC.GDLC import *
+>>> dml = '''\
+... <html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27" id="d34421">
+...     <p class="rf">-&gt;ABC<sup class="calibre32">1</sup></p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">ABC -xy</strong></code><sup class="calibre23">1</sup></p>
+...     <!-- COMMENT -->
+...     <p class="ps">Definition   <em class="calibre24">  here </em>.</p>
+...     <p class="p"><span class="v1"> </span></p>
+...     <p class="p">Even more details <a class="calibre17" href="part0120.xhtml#d34479">here</a>.</p>
+...   </blockquote>
+... </body>
+... </html>'''
+>>> strip = make_strip_pipeline(tags=['a', 'code'], classes=['em', 'strong', 'sup'], comments=True, anchor_ids=True, empty_tags=True, strip_lines=True)
+>>> sorted(strip.rules)
+['attrs', 'classes', 'comments', 'empty_tags', 'spaces', 'strip_lines', 'tags']
+
+>>> soup = BeautifulSoup(dml, features='lxml')
+>>> print(strip(soup))
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+<title>TITLE</title>
+</head>
+<body>
+<blockquote class="calibre27">
+<p class="rf">-&gt;ABC<sup>1</sup></p>
+<p class="df"><strong>ABC -xy</strong><sup>1</sup></p>
+<BLANKLINE>
+<p class="ps">Definition   <em>  here </em>.</p>
+<BLANKLINE>
+<p class="p">Even more details here.</p>
+</blockquote>
+</body>
+</html>
+
+The result is the same, white spaces included, as calling the `strip_*` functions one after another:
+>>> soup = BeautifulSoup(dml, features='lxml')
+>>> soup = strip_comments(soup)
+>>> soup = strip_anchor_from_id(soup)
+>>> soup = strip_classes(soup, 'em', 'strong', 'sup')
+>>> soup = strip_tags(soup, 'a', 'code')
+>>> soup = strip_empty_tags(soup, strip_lines=True)
+>>> soup = strip_spaces_from_soup(soup)
+>>> strip = make_strip_pipeline(tags=['a', 'code'], classes=['em', 'strong', 'sup'], comments=True, anchor_ids=True, empty_tags=True, strip_lines=True, spaces=True)
+>>> str(soup) == str(strip(BeautifulSoup(dml, features='lxml')))
+True
+
+"""
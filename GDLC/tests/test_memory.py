@@ -0,0 +1,41 @@
+""" 
+Bound the memory of a run: tear down the tree of each file once written, stream files above a memory ceiling, and report the peak memory.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.memory.memory import get_rss, get_peak_rss, is_over, get_peak_string
+>>> import tempfile
+
+>>> get_rss() > 0, get_peak_rss() > 0
+(True, True)
+>>> is_over(1), is_over(1e9)
+(True, False)
+>>> get_peak_string()  # doctest: +ELLIPSIS
+'PEAK MEMORY: ... MB...'
+
+>>> dml = '''<?xml version="1.0" encoding="UTF-8"?><html><body>
+... <h2 class="centrat2" id="aid-A">A</h2>
+... <blockquote class="calibre27" id="d00001">
+...   <p class="rf">-&gt;ABC</p>
+...   <p class="df"><code class="calibre22"><strong class="calibre13">ABC -xy</strong></code></p>
+...   <p class="ps">Definició.</p>
+... </blockquote>
+... </body></html>'''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> file = tmp / 'part0001.xhtml'
+>>> _ = file.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+>>> options = dict(tags=['blockquote'], protected=['h2'], classes=['calibre27'], progress=False)
+
+Below the ceiling, the file is parsed whole and its tree torn down, above it the file is streamed. The page is the same:
+>>> page = main_loop_file(file, **options)
+>>> main_loop_file(file, max_memory=1e9, **options) == page, main_loop_file(file, max_memory=1, **options) == page
+(True, True)
+
+The peak memory is printed at the end of the run:
+>>> main_loop([file], dir=outdir, query=False, progress=False, max_memory=1)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...PEAK MEMORY: ... MB...NO EXCEPTIONS WERE RECORDED!
+■
+
+"""
@@ -0,0 +1,76 @@
+""" 
+Read the text of a Kindle book without unpacking it first.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.mobi.mobi import MobiReader, HuffCdic, palmdoc_decompress, get_trailing_size, get_value
+>>> import struct
+>>> import GDLC.GDLC
+
+PalmDOC records hold literal bytes, a space followed by a character, and back references, which may overlap the bytes they write:
+>>> palmdoc_decompress(b'x\xe1\x03\xe9\xa0\xc3')
+b'x a\xe9\xa0\xc3'
+>>> palmdoc_decompress(b'abcdef\x80\x30'), palmdoc_decompress(b'abc\x80\x1b')
+(b'abcdefabc', b'abcabcabc')
+
+Trailing entries are removed from the end of each text record, their sizes read backwards, then the multibyte bytes:
+>>> get_trailing_size(b'text\xc3\x01\x00\x82', 3)
+4
+>>> get_value(b'\x01\x83', 0)
+(2, 131)
+
+HUFF/CDIC records: here each byte is a code of 8 bits, and code 0xff is the phrase 'hi', itself compressed:
+>>> huff = b'HUFF' + struct.pack('>III', 0x18, 24, 24 + 1024) + bytes(8) + struct.pack('>256I', *[(255 << 8) | 0x80 | 8] * 256) + bytes(256)
+>>> phrases = [struct.pack('>H', 2) + b'hi'] + [struct.pack('>H', 0x8000 | 1) + bytes([255 - i]) for i in range(1, 256)]
+>>> offsets = [512 + sum(len(phrase) for phrase in phrases[:i]) for i in range(256)]
+>>> cdic = b'CDIC' + struct.pack('>III', 0x10, 256, 8) + struct.pack('>256H', *offsets) + b''.join(phrases)
+>>> HuffCdic(huff, [cdic]).decompress(b'ab\xffc')
+b'abhic'
+
+The sample book is a mobi7 book, compressed with PalmDOC:
+>>> book = MobiReader(Path(GDLC.GDLC.__file__).parents[1] / 'source' / 'Gran Diccionari de la Llengua Catalana (Catalan Edition).azw')
+>>> book.header['compression'], book.header['version'], book.header['encoding'], book.header['text_records'], book.kf8
+(2, 7, 65001, 1145, None)
+>>> book.exth[503][0].decode('utf8')
+'Gran Diccionari de la Llengua Catalana (Catalan Edition)'
+>>> [(name, len(data)) for name, data in book.iter_parts()]
+[('book.html', 4689357)]
+>>> text = book.get_text()
+>>> bytes(text[:12]), 'Desviació de la veritat' in text.decode('utf8')
+(b'<html><head>', True)
+>>> book.close()
+
+A KF8 book: here two skeletons, each with one fragment to insert before </body>, followed by a css flow. The text, the FDST record and the two indexes are built in memory:
+>>> from GDLC.mobi.mobi import PALMDB_HEADER, NULL_INDEX, encode_value, get_indx_record
+>>> import tempfile
+>>> def get_index_records(tags, entries):
+...     tagx = b'TAGX' + struct.pack('>II', 12 + 4 * len(tags), 1) + b''.join(bytes(tag) for tag in tags)
+...     entries = [bytes([len(key)]) + key + bytes([control]) + b''.join(encode_value(v) for v in values) for key, control, values in entries]
+...     return [get_indx_record([], kind=0, count=1, tagx=tagx), get_indx_record(entries, count=len(entries))]
+>>> skeleton = b'<html><body></body></html>'
+>>> text = skeleton + b'<p>one</p>' + skeleton + b'<p>two</p>' + b'p { margin: 0 }'
+>>> fdst = b'FDST' + struct.pack('>IIIIII', 12, 2, 0, 72, 72, len(text))
+>>> skeletons = get_index_records([(1, 1, 0x03, 0), (6, 2, 0x0C, 0), (0, 0, 0, 1)], [(b'SKEL0000000000', 0x05, [1, 0, 26]), (b'SKEL0000000001', 0x05, [1, 36, 26])])
+>>> fragments = get_index_records([(3, 1, 0x01, 0), (6, 2, 0x02, 0), (0, 0, 0, 1)], [(b'0000000012', 0x03, [0, 12, 10]), (b'0000000048', 0x03, [1, 12, 10])])
+>>> header = bytearray(0x118)
+>>> struct.pack_into('>HHIHHHH', header, 0, 1, 0, len(text), 1, 4096, 0, 0)
+>>> header[16:20] = b'MOBI'
+>>> struct.pack_into('>IIIII', header, 20, 0x108, 2, 65001, 0, 8)
+>>> struct.pack_into('>I', header, 0x28, NULL_INDEX)
+>>> struct.pack_into('>I', header, 0xC0, 2)
+>>> struct.pack_into('>II', header, 0xF8, 5, 3)
+>>> records = [bytes(header), text, fdst] + skeletons + fragments
+>>> offset = PALMDB_HEADER.size + 8 * len(records) + 2
+>>> data = PALMDB_HEADER.pack(b'kf8', 0, 0, 0, 0, 0, 0, 0, 0, b'BOOK', b'MOBI', 0, 0, len(records))
+>>> for i, record in enumerate(records):
+...     data += struct.pack('>II', offset, 2 * i)
+...     offset += len(record)
+>>> path = Path(tempfile.mkdtemp()) / 'kf8.azw3'
+>>> _ = path.write_bytes(data + b'\x00\x00' + b''.join(records))
+>>> book = MobiReader(path)
+>>> book.kf8['version'], [bytes(flow) for flow in book.get_flows(book.get_text())][1]
+(8, b'p { margin: 0 }')
+>>> list(book.iter_parts())
+[('part0000.xhtml', b'<html><body><p>one</p></body></html>'), ('part0001.xhtml', b'<html><body><p>two</p></body></html>')]
+>>> book.close()
+
+"""
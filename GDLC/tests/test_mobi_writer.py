@@ -0,0 +1,78 @@
+""" 
+Write a Kindle dictionary without KindleGen, and read it back.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.mobi.mobi import MobiReader, MobiWriter, write_mobi, palmdoc_compress, palmdoc_decompress, encode_value, get_value, get_entry_keys, strip_index_tags
+>>> import tempfile
+
+PalmDOC compression writes back references, a space followed by a character as one byte, and other bytes in counted runs:
+>>> palmdoc_compress(b'abcabcabc a')
+b'abc\x80\x18\x80\x18\xe1'
+>>> palmdoc_compress('mà'.encode('utf8'))
+b'm\x02\xc3\xa0'
+>>> text = ' '.join(['entrada', 'àcid', 'ésser', 'abc'] * 400).encode('utf8')[:4096]
+>>> palmdoc_decompress(palmdoc_compress(text)) == text
+True
+
+Index values are forward variable-width integers:
+>>> encode_value(131), get_value(encode_value(300000), 0)
+(b'\x01\x83', (3, 300000))
+
+The keys of an entry are the values of <idx:orth> and <idx:iform>, each once, and the index tags are removed from the text:
+>>> entry = template_entry('acid', 'àcid', '<b>àcid</b>', '<div>substància</div>')
+>>> entry = entry.replace('</idx:infl>', '  <idx:iform name="" value="àcida"/>\n</idx:infl>')
+>>> get_entry_keys(entry)
+['acid', 'àcida']
+>>> strip_index_tags(entry)
+'<div><span><b>àcid</b></span></div><span><b>àcid</b>.</span><div>substància</div>'
+
+A dictionary of three entries and a heading, read back with the reader:
+>>> entries = [Entry(1, '<h2>A</h2>', protected=True), Entry(2, entry)]
+>>> entries += [Entry(3, template_entry('mot', 'mot', 'mot', '<div>' + 'paraula ' * 800 + '</div>')), Entry(4, template_entry('A&B', 'A&B', 'A&amp;B', '<div>i</div>'))]
+>>> path = Path(tempfile.mkdtemp()) / 'test.mobi'
+>>> metadata = {'title': 'Diccionari', 'language': 'ca', 'creator': 'GDLC'}
+>>> write_mobi(entries, path, metadata=metadata) == path
+True
+>>> book = MobiReader(path)
+>>> header = book.header
+>>> header['type'], header['encoding'], header['compression'], header['extra_flags'], header['text_records']
+(2, 65001, 2, 1, 2)
+>>> book.exth[503], book.exth[524], book.exth[531]
+([b'Diccionari'], [b'ca'], [b'ca'])
+>>> text = book.get_text()
+>>> bytes(text[:51])
+b'<html><head><guide></guide></head><body><h2>A</h2>\n'
+>>> b'idx:' in text, text.endswith(b'</body></html>')
+(False, True)
+
+The keys are sorted by their bytes, and each points to the text of its entry:
+>>> keys = book.get_orth()
+>>> list(keys)
+['A&B', 'acid', 'mot', 'àcida']
+>>> keys['acid'] == keys['àcida']
+True
+>>> for key, [(start, length)] in keys.items():
+...     print(key, text[start:start + length].split(b'</div>')[0].decode('utf8'))
+A&B <div><span><b>A&amp;B</b></span>
+acid <div><span><b>àcid</b></span>
+mot <div><span><b>mot</b></span>
+àcida <div><span><b>àcid</b></span>
+>>> book.close()
+
+A character split between two records is copied after the first record, as a multibyte trailing entry:
+>>> page = 'x' * (4096 - 40 - 1) + 'àcid'
+>>> with MobiWriter(path.with_name('split.mobi'), compression=1) as book:
+...     book.add(page)
+>>> book = MobiReader(book.path)
+>>> book.get_record(1)[-3:], book.get_text().decode('utf8')[40:].startswith(page)
+(b'\xc3\xa0\x01', True)
+>>> book.close()
+
+The same entries make the same file:
+>>> data = path.read_bytes()
+>>> write_mobi(entries, path, metadata=metadata).read_bytes() == data
+True
+>>> sorted(file.name for file in path.parent.iterdir())
+['split.mobi', 'test.mobi']
+
+"""
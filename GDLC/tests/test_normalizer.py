@@ -0,0 +1,32 @@
+""" 
+Apply several replacement rules to a string in a single scan.
+
+>>> from GDLC.GDLC import *
+
+Literals are matched longest first, and all rules are applied together, so a replacement is never replaced again:
+>>> normalize = Normalizer({'-': '+', '->': '', 'a': 'b', 'b': 'a'})
+>>> normalize('a->b-c')
+'ba+c'
+
+Regular expressions are joined to the same alternation:
+>>> normalize = Normalizer({'&nbsp;': ' '}, [(' {2,}', ' '), ('[0-9]+', '#')], strip=True)
+>>> normalize('  12 apples&nbsp;and   3 pears ')
+'# apples and # pears'
+
+Case is ignored on request:
+>>> Normalizer({'<?xml version="1.0" encoding="utf-8"?>': ''}, ignorecase=True)('<?XML VERSION="1.0" ENCODING="UTF-8"?><p/>')
+'<p/>'
+
+The normalizers used for every entry are compiled once, when the module is loaded:
+>>> normalize_definition('\n<blockquote>\n\n\n<span>A</span></blockquote>\n\n<?xml version="1.0" encoding="utf-8"?>\n')
+'<blockquote>\n<span>A</span></blockquote>'
+>>> normalize_arrows('-&gt;ABC ->DEF')
+'ABC DEF'
+
+`replace_strings()` and `strip_header()` compile a normalizer on their first call only:
+>>> replace_strings('a■b-&gt;c', '■', '-&gt;', replace='-')
+'a-b-c'
+>>> get_normalizer(('■', '-&gt;'), '-') is get_normalizer(('■', '-&gt;'), '-')
+True
+
+"""
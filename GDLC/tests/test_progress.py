@@ -0,0 +1,88 @@
+""" 
+Show one progress display for a whole run, across worker processes.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.progress.progress import Progress, SharedCounter, get_time_string
+>>> import tempfile
+
+>>> get_time_string(3725), get_time_string(None)
+('1:02:05', '--:--:--')
+
+When the output is not a terminal, a line is printed every `log_interval` seconds, and once more at the end:
+>>> stream = io.StringIO()
+>>> progress = Progress(total_files=2, total_bytes=2000000, stream=stream)
+>>> progress.tty, progress.interval
+(False, 10.0)
+>>> for i in range(1000):
+...     progress.update(entries=1)
+>>> progress.update(files=1, bytes=1000000)
+>>> stream.getvalue()
+''
+>>> progress.close()
+>>> print(stream.getvalue())  # doctest: +ELLIPSIS
+files 1/2 | 1000 entries | ... entries/s | ... MB/s | elapsed 0:00:00 | ETA 0:00:00
+<BLANKLINE>
+
+A terminal line is rewritten in place:
+>>> class Terminal(io.StringIO):
+...     def isatty(self):
+...         return True
+>>> stream = Terminal()
+>>> progress = Progress(total_entries=4, interval=0, stream=stream)
+>>> progress.update(entries=1)
+>>> progress.write('a message')
+>>> progress.update(entries=1)
+>>> progress.close()
+>>> stream.getvalue().count('\r'), stream.getvalue().endswith('\n')
+(5, True)
+>>> 'a message' in stream.getvalue().split('\r')[3]
+True
+
+Outside a process pool, a `SharedCounter` has no shared count and drops its entries:
+>>> counter = SharedCounter(batch=10)
+>>> for i in range(25):
+...     counter.update(entries=1)
+>>> counter.pending
+5
+>>> counter.flush()
+>>> counter.pending
+0
+
+`make_dictionary()` updates the progress display of the run:
+>>> dml = '''\
+... <html><body>
+...   <h2 class="centrat2">A</h2>
+...   <blockquote class="calibre27">
+...     <p class="rf">-&gt;ABC</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">ABC</strong></code></p>
+...     <p class="ps">Definition here.</p>
+...   </blockquote>
+... </body></html>'''
+>>> progress = Progress(stream=io.StringIO())
+>>> dico = make_dictionary(BeautifulSoup(dml, 'lxml').body, tags=['blockquote'], classes=['calibre27'], protected=['h2'], progress=progress)
+>>> progress.entries
+2
+>>> dico = make_dictionary(io.BytesIO(dml.encode('utf8')), tags=['blockquote'], classes=['calibre27'], protected=['h2'], progress=progress, engine='lxml-stream')
+>>> progress.entries
+4
+
+`main_loop()` counts the entries of the workers, and shows one line for all files:
+>>> tmp = Path(tempfile.mkdtemp())
+>>> files = [tmp / 'part0001.xhtml', tmp / 'part0002.xhtml']
+>>> for file in files:
+...     _ = file.write_text(dml, encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+>>> main_loop(files, dir=outdir, query=False, workers=2)  # doctest: +ELLIPSIS
+<BLANKLINE>
+...files 2/2 | 4 entries | ... entries/s | ... MB/s | elapsed ... | ETA 0:00:00
+<BLANKLINE>
+PEAK MEMORY: ... MB...
+<BLANKLINE>
+<BLANKLINE>
+ALL FILES PROCESSED: CHECK THE LOGS FOR ANY ERRORS.
+<BLANKLINE>
+NO EXCEPTIONS WERE RECORDED!
+■
+
+"""
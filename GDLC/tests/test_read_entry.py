@@ -0,0 +1,50 @@
+""" 
+Find the byte offsets of the entries of a source file and parse only the entries requested.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.index.index import scan_blockquotes, get_entry_offsets, index_entries, read_entry_offsets, read_entry, iter_entries
+>>> import tempfile
+>>> dml = '''\
+... <?xml version="1.0" encoding="UTF-8"?><html xmlns="http://www.w3.org/1999/xhtml">
+... <head>
+...   <title>TITLE</title>
+... </head>
+... <body>
+...   <blockquote class="calibre27" id="d1"><p class="rf">-&gt;àbac</p><blockquote><p>Nested.</p></blockquote></blockquote>
+...   <blockquote class="calibre27" id="d2"><p class="rf">-&gt;abadia</p></blockquote>
+...   <blockquote class="calibre27" id="d3"><p class="rf">-&gt;abat</p></blockquote>
+... </body>
+... </html>
+... '''
+>>> tmp = Path(tempfile.mkdtemp())
+>>> source = tmp / 'part0001.xhtml'
+>>> _ = source.write_text(dml, encoding='utf8')
+
+The scanner counts nested blockquotes and works on bytes:
+>>> data = source.read_bytes()
+>>> offsets = get_entry_offsets(source)
+>>> offsets == scan_blockquotes(data)
+True
+>>> len(offsets)
+3
+>>> data[offsets[1][0]:offsets[1][1]].decode('utf8')
+'<blockquote class="calibre27" id="d2"><p class="rf">-&gt;abadia</p></blockquote>'
+
+Offsets of several files may be saved and read back:
+>>> _ = index_entries([source], tmp / 'offsets.json')
+>>> read_entry_offsets(tmp / 'offsets.json', 'part0001.xhtml') == offsets
+True
+
+Parse a single entry, or a range of entries:
+>>> read_entry(source, 0)
+<blockquote class="calibre27" id="d1"><p class="rf">-&gt;àbac</p><blockquote><p>Nested.</p></blockquote></blockquote>
+>>> [entry['id'] for entry in iter_entries(source, 1, offsets=offsets)]
+['d2', 'd3']
+>>> read_entry(source, -1)['id']
+'d3'
+>>> read_entry(source, 3)  # doctest: +ELLIPSIS
+Traceback (most recent call last):
+...
+IndexError: entry 3 not found in ...part0001.xhtml, which has 3 entries
+
+"""
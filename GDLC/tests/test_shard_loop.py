@@ -0,0 +1,82 @@
+""" 
+Repack the entries of several source files into shards of bounded size, and update content.opf to match.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.shard.shard import shard_loop, write_shards, get_letter, get_link
+>>> import tempfile
+
+>>> get_letter('Àbac'), get_letter('-ABC'), get_letter('')
+('a', '', '')
+
+>>> def make_source(words, heading):
+...     entries = ''.join('''
+...   <blockquote class="calibre27" id="d{0}">
+...     <p class="rf">-&gt;{0}</p>
+...     <p class="df"><code class="calibre22"><strong class="calibre13">{0}</strong></code></p>
+...     <p class="ps">See <a href="part0002.xhtml#dbeta">beta</a>.</p>
+...   </blockquote>'''.format(word) for word in words)
+...     return '<?xml version="1.0" encoding="UTF-8"?><html><body><h2 class="centrat2" id="aid-{0}">{0}</h2>{1}</body></html>'.format(heading, entries)
+>>> tmp = Path(tempfile.mkdtemp())
+>>> files = [tmp / 'part0001.xhtml', tmp / 'part0002.xhtml']
+>>> _ = files[0].write_text(make_source(['abac', 'abat', 'abet'], 'A'), encoding='utf8')
+>>> _ = files[1].write_text(make_source(['beta', 'cap'], 'B'), encoding='utf8')
+>>> opf = tmp / 'content.opf'
+>>> _ = opf.write_text('''<manifest>
+... <item id="item0" media-type="application/xhtml+xml" href="Text/cover_page.xhtml" />
+... <item id="item1" media-type="application/xhtml+xml" href="Text/part0001.xhtml" />
+... <item id="item2" media-type="application/xhtml+xml" href="Text/part0002.xhtml" />
+... <item id="ncx" media-type="application/x-dtbncx+xml" href="toc.ncx" />
+... </manifest>
+... <spine toc="ncx">
+... <itemref idref="item0" linear="no"/>
+... <itemref idref="item1"/>
+... <itemref idref="item2"/>
+... </spine>
+... <guide>
+... <reference type="index" title="Index" href="Text/part0002.xhtml#aid-B" />
+... </guide>
+... ''', encoding='utf8')
+
+At most two entries per shard, and a new shard at each new letter:
+>>> outdir = tmp / 'out'
+>>> shards = shard_loop(files, outdir, max_entries=2, max_bytes=None, letters=True, opf=opf, progress=False)
+>>> [shard.name for shard in shards]
+['shard0000.xhtml', 'shard0001.xhtml', 'shard0002.xhtml', 'shard0003.xhtml']
+>>> [re.findall('<idx:orth value="(\\w+)"', shard.read_text(encoding='utf8')) for shard in shards]
+[['abac', 'abat'], ['abet'], ['beta'], ['cap']]
+
+The heading of a letter stays with the entry that follows it, and the links point to the shards:
+>>> page = shards[2].read_text(encoding='utf8')
+>>> '<h2 class="centrat2" id="aid-B">B</h2>' in page
+True
+>>> sorted(set(re.findall('href="([^"]*#[^"]*)"', shards[0].read_text(encoding='utf8'))))
+['shard0002.xhtml#dbeta']
+
+The manifest, the spine and the guide list the shards in place of the source files:
+>>> print((outdir / 'content.opf').read_text(encoding='utf8'))
+<manifest>
+<item id="item0" media-type="application/xhtml+xml" href="Text/cover_page.xhtml" />
+<item id="shard0000" media-type="application/xhtml+xml" href="Text/shard0000.xhtml" />
+<item id="shard0001" media-type="application/xhtml+xml" href="Text/shard0001.xhtml" />
+<item id="shard0002" media-type="application/xhtml+xml" href="Text/shard0002.xhtml" />
+<item id="shard0003" media-type="application/xhtml+xml" href="Text/shard0003.xhtml" />
+<item id="ncx" media-type="application/x-dtbncx+xml" href="toc.ncx" />
+</manifest>
+<spine toc="ncx">
+<itemref idref="item0" linear="no"/>
+<itemref idref="shard0000"/>
+<itemref idref="shard0001"/>
+<itemref idref="shard0002"/>
+<itemref idref="shard0003"/>
+</spine>
+<guide>
+<reference type="index" title="Index" href="Text/shard0002.xhtml#aid-B" />
+</guide>
+<BLANKLINE>
+
+Without letters, shards are filled up to a size in bytes:
+>>> shards = shard_loop(files, tmp / 'bytes', max_bytes=1000, progress=False, engine='lxml-stream')
+>>> all(len(shard.read_bytes()) < 1000 + sum(map(len, template_page())) for shard in shards), len(shards)
+(True, 3)
+
+"""
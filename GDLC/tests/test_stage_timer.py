@@ -0,0 +1,47 @@
+""" 
+Time the stages of a build, file by file.
+
+>>> from GDLC.GDLC import *
+>>> from GDLC.timers.timers import StageTimer, get_stats
+>>> import tempfile, json
+
+Statistics of a list of durations, with percentiles by the nearest-rank method:
+>>> get_stats([0.4, 0.1, 0.3, 0.2])
+{'count': 4, 'total': 1.0, 'p50': 0.2, 'p99': 0.4}
+
+Each stage of `make_entry()` is recorded when a timer is passed:
+>>> dml = '''\
+... <blockquote class="calibre27">
+...   <p class="rf">-&gt;ABC</p>
+...   <p class="df"><code class="calibre22"><strong class="calibre13">ABC</strong></code></p>
+...   <p class="ps">Definition here.</p>
+... </blockquote>'''
+>>> timer = StageTimer()
+>>> timer.set_file('part0001.xhtml')
+>>> entry = make_entry(BeautifulSoup(dml, features='lxml').blockquote, timer=timer)
+>>> entry == make_entry(BeautifulSoup(dml, features='lxml').blockquote)
+True
+>>> summary = timer.summary()
+>>> list(summary['total'])
+['split_entry', 'make_label', 'make_headword', 'make_definition', 'serialize']
+>>> summary['files']['part0001.xhtml']['make_label']['count']
+1
+
+`main_loop()` prints a summary table and saves it as json:
+>>> tmp = Path(tempfile.mkdtemp())
+>>> source = tmp / 'part0001.xhtml'
+>>> _ = source.write_text('<html><body>' + dml + dml + '</body></html>', encoding='utf8')
+>>> outdir = tmp / 'out'
+>>> outdir.mkdir()
+>>> main_loop([source], dir=outdir, query=False, progress=False, timings=tmp / 'timings.json')  # doctest: +ELLIPSIS
+<BLANKLINE>
+...STAGE TIMINGS, all files :
+stage                   count    total s     p50 ms     p99 ms
+parse                       1 ...
+split_entry                 2 ...
+...
+>>> summary = json.loads((tmp / 'timings.json').read_text())
+>>> summary['files']['part0001.xhtml']['make_definition']['count']
+2
+
+"""
@@ -64,4 +64,15 @@ Strip the anchor in both id and href:
 </div>
 </body>
 
+Anchors to other files are kept, unless the target id is known:
+>>> dml = '<body><p id="d1">One, see <a href="#d1">one</a>, <a href="part0017.xhtml#d00401">two</a> and <a href="part0018.xhtml#d00500">three</a>.</p></body>'
+>>> print(strip_anchor(BeautifulSoup(dml, features='lxml').body))
+<body><p>One, see one, <a href="part0017.xhtml#d00401">two</a> and <a href="part0018.xhtml#d00500">three</a>.</p></body>
+>>> print(strip_anchor(BeautifulSoup(dml, features='lxml').body, ids={'d00401', 'd00500'}))
+<body><p>One, see one, two and three.</p></body>
+
+With a mapping from id to file, the file in href must match:
+>>> print(strip_anchor(BeautifulSoup(dml, features='lxml').body, ids={'d00401': 'part0017.xhtml', 'd00500': ['part0019.xhtml']}))
+<body><p>One, see one, two and <a href="part0018.xhtml#d00500">three</a>.</p></body>
+
 """
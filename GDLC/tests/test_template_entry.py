@@ -0,0 +1,36 @@
+""" 
+Assemble an <idx:entry> from templates compiled once.
+
+>>> from GDLC.GDLC import *
+
+A template is parsed into literal and slot segments, values are escaped unless the slot takes markup:
+>>> template = Template('<b>{word}</b><span title="{word}">{markup}</span>', raw=('markup',))
+>>> template(word='A&B "C"', markup='<i>x</i>')
+'<b>A&amp;B &quot;C&quot;</b><span title="A&amp;B &quot;C&quot;"><i>x</i></span>'
+
+Values are never taken for slots, e.g. a short form that holds the word 'long':
+>>> template_headword('longitud', '<strong>longitud</strong>')
+'<div><span><b>longitud</b></span></div><span><strong>longitud</strong>.</span>'
+>>> print(template_label('label'))
+<idx:orth value="label">
+      <idx:infl>
+        <idx:iform name="" value="label"/>
+      </idx:infl>
+    </idx:orth>
+
+A whole entry is a single join, the same markup as the parts put together:
+>>> entry = template_entry('ABC', 'ABC', '<strong>ABC</strong>', '<div>\n<blockquote>A</blockquote>\n</div>')
+>>> entry == make_entry_idx() + '\n' + template_label('ABC') + template_headword('ABC', '<strong>ABC</strong>') + '<div>\n<blockquote>A</blockquote>\n</div>' + '\n</idx:entry>'
+True
+>>> print(entry)
+<idx:entry name="Catalan" scriptable="yes" spell="yes">
+<idx:orth value="ABC">
+      <idx:infl>
+        <idx:iform name="" value="ABC"/>
+      </idx:infl>
+    </idx:orth><div><span><b>ABC</b></span></div><span><strong>ABC</strong>.</span><div>
+<blockquote>A</blockquote>
+</div>
+</idx:entry>
+
+"""
@@ -0,0 +1,36 @@
+""" 
+Write a dictionary page around formatted entries, without parsing the page.
+
+>>> from GDLC.GDLC import *
+>>> import io
+>>> entries = ['<idx:entry name="Catalan" scriptable="yes" spell="yes">\n<idx:orth value="ABC"/><div>ABC</div>\n</idx:entry>\n']
+>>> stream = io.StringIO()
+>>> write_page(stream, entries)
+>>> page = stream.getvalue()
+>>> print(page[:38])
+<?xml version="1.0" encoding="UTF-8"?>
+>>> print(page[page.index('<head>'):])  # doctest: +ELLIPSIS
+<head>
+<title>Gran Diccionari de la llengua catalana</title> 
+...
+</head>
+<body>
+<mbp:frameset>
+<idx:entry name="Catalan" scriptable="yes" spell="yes">
+<idx:orth value="ABC"/><div>ABC</div>
+</idx:entry>
+<BLANKLINE>
+</mbp:frameset>
+</body>
+</html>
+<BLANKLINE>
+
+The page is well-formed xml, with the Kindle namespaces declared on the <html> tag:
+>>> from lxml import etree
+>>> root = etree.fromstring(page.encode('utf8'))
+>>> root.nsmap['idx']
+'https://kindlegen.s3.amazonaws.com/AmazonKindlePublishingGuidelines.pdf'
+>>> [etree.QName(child).localname for child in root.find('body')]
+['frameset']
+
+"""
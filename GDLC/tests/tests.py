@@ -23,10 +23,30 @@ def test_examples(verbose = False):
     a = [0,0]
     r = [0,0]
 
+    if verbose: print('...testing examples in file test_bench.py')
+    r = doctest.testfile('test_bench.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_chunk_loop.py')
+    r = doctest.testfile('test_chunk_loop.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_complete.py')
+    r = doctest.testfile('test_complete.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_count_parser_calls.py')
+    r = doctest.testfile('test_count_parser_calls.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_destroy_tags.py')
     r = doctest.testfile('test_destroy_tags.py', optionflags=flags)
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_entry_cache.py')
+    r = doctest.testfile('test_entry_cache.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_extract_patched.py')
     r = doctest.testfile('test_extract_patched.py', optionflags=flags)
     a[0] += r[0] ; a[1] += r[1]
@@ -55,6 +75,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_get_html_attrs.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_get_id_index.py')
+    r = doctest.testfile('test_get_id_index.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_get_meta_opf.py')
     r = doctest.testfile('test_get_meta_opf.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -67,6 +91,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_get_sorted_id.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_inflect.py')
+    r = doctest.testfile('test_inflect.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_insert_frameset.py')
     r = doctest.testfile('test_insert_frameset.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -75,6 +103,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_insert_pagebreak.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_iter_dictionary.py')
+    r = doctest.testfile('test_iter_dictionary.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_list_files_all.py')
     r = doctest.testfile('test_list_files_all.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -99,15 +131,35 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_list_valid_tags.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_lookup.py')
+    r = doctest.testfile('test_lookup.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_main_loop.py')
+    r = doctest.testfile('test_main_loop.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     # to do: add this one
     #if verbose: print('...testing examples in file test_make_anchor.py')
     #r = doctest.testfile('test_make_anchor.py')
     #a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_main_loop_incremental.py')
+    r = doctest.testfile('test_main_loop_incremental.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_main_loop_pipeline.py')
+    r = doctest.testfile('test_main_loop_pipeline.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_make_definition.py')
     r = doctest.testfile('test_make_definition.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_make_dictionary_stream.py')
+    r = doctest.testfile('test_make_dictionary_stream.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_make_dml.py')
     r = doctest.testfile('test_make_dml.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -116,6 +168,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_make_entry.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_make_entry_from_element.py')
+    r = doctest.testfile('test_make_entry_from_element.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_make_entry_idx.py')
     r = doctest.testfile('test_make_entry_idx.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -128,6 +184,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_make_label.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_make_strip_pipeline.py')
+    r = doctest.testfile('test_make_strip_pipeline.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_markup_handler.py')
     r = doctest.testfile('test_markup_handler.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -137,14 +197,46 @@ def test_examples(verbose = False):
     #r = doctest.testfile('test_parser.py')
     #a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_memory.py')
+    r = doctest.testfile('test_memory.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_mobi.py')
+    r = doctest.testfile('test_mobi.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_mobi_writer.py')
+    r = doctest.testfile('test_mobi_writer.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_normalizer.py')
+    r = doctest.testfile('test_normalizer.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_progress.py')
+    r = doctest.testfile('test_progress.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
+    if verbose: print('...testing examples in file test_read_entry.py')
+    r = doctest.testfile('test_read_entry.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_replace_strings.py')
     r = doctest.testfile('test_replace_strings.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_shard_loop.py')
+    r = doctest.testfile('test_shard_loop.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_split_entry.py')
     r = doctest.testfile('test_split_entry.py')
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_stage_timer.py')
+    r = doctest.testfile('test_stage_timer.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_strip_anchor.py')
     r = doctest.testfile('test_strip_anchor.py')
     a[0] += r[0] ; a[1] += r[1]
@@ -193,6 +285,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_template_copy.py', optionflags=flags)
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_template_entry.py')
+    r = doctest.testfile('test_template_entry.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     if verbose: print('...testing examples in file test_template_head.py')
     r = doctest.testfile('test_template_head.py', optionflags=flags)
     a[0] += r[0] ; a[1] += r[1]
@@ -205,6 +301,10 @@ def test_examples(verbose = False):
     r = doctest.testfile('test_template_xml.py', optionflags=flags)
     a[0] += r[0] ; a[1] += r[1]
 
+    if verbose: print('...testing examples in file test_write_page.py')
+    r = doctest.testfile('test_write_page.py', optionflags=flags)
+    a[0] += r[0] ; a[1] += r[1]
+
     return tuple(a)
 
 
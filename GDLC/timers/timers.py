@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GDLC stage timers
+
+Opt-in timers for the stages of a build: parsing a file, `split_entry()`, `make_label()`, `make_headword()`, `make_definition()`, serialization, cache lookups, and the whole of `make_dictionary()`, which includes writing the page since the entries are written as they are formatted. For each file and each stage, the timer keeps every duration, and reports the count, the total, the median (p50) and the 99th percentile (p99).
+
+Functions that accept a `timer` argument do nothing more than an `if timer is not None` test when it is left to None, so the timers cost nothing when disabled.
+
+Usage:
+    main_loop(files, dir, timings=True)  # prints a summary table
+    main_loop(files, dir, timings='~/GDLC/logs/timings.json')  # also saves the summary as json
+
+    or for a single entry:
+        timer = StageTimer()
+        make_entry(soup, timer=timer)
+        timer.print_summary()
+
+Created 18 October 2026
+"""
+import json
+import math
+from pathlib import Path
+from time import perf_counter
+
+
+class StageTimer:
+    """
+    Accumulate the durations of the stages of a build, file by file.
+
+    Notes:
+        A stage is timed by two calls: `start = timer.start()` before and `start = timer.add('stage', start)` after. `add()` returns the current time, so consecutive stages are chained without calling the clock twice.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.set_file(None)
+
+    def set_file(self, file):
+        """Record the following stages under the name of `file`."""
+        self.file = Path(file).name if file is not None else None
+        self.current = self.stages.setdefault(self.file, {})
+        return None
+
+    def start(self) -> float:
+        """Return the current time."""
+        return perf_counter()
+
+    def add(self, stage, start) -> float:
+        """Record the time elapsed since `start` for `stage`. Return the current time."""
+        now = perf_counter()
+        self.current.setdefault(stage, []).append(now - start)
+        return now
+
+    def merge(self, other) -> None:
+        """Add the durations recorded by another timer, e.g. sent back by a worker process."""
+        for file, stages in other.stages.items():
+            mine = self.stages.setdefault(file, {})
+            for stage, durations in stages.items():
+                mine.setdefault(stage, []).extend(durations)
+        return None
+
+    def summary(self) -> dict:
+        """
+        Summarize the durations.
+
+        Returns:
+            summary ({str:{}}): 'total' maps each stage to its count, total, p50 and p99 in seconds over all files. 'files' maps each file name to the same statistics for that file.
+        """
+        total, files = {}, {}
+        for file, stages in self.stages.items():
+            if not stages:
+                continue
+            files[file] = {stage: get_stats(durations) for stage, durations in stages.items()}
+            for stage, durations in stages.items():
+                total.setdefault(stage, []).extend(durations)
+        total = {stage: get_stats(durations) for stage, durations in total.items()}
+        return {'total': total, 'files': files}
+
+    def print_summary(self, by_file=False) -> None:
+        """Print the summary as a table, over all files, and for each file if `by_file=True`."""
+        summary = self.summary()
+        tables = [('all files', summary['total'])]
+        if by_file:
+            tables += list(summary['files'].items())
+        for name, stats in tables:
+            print('\nSTAGE TIMINGS,', name, ':')
+            print('{:<20} {:>8} {:>10} {:>10} {:>10}'.format('stage', 'count', 'total s', 'p50 ms', 'p99 ms'))
+            for stage, s in stats.items():
+                print('{:<20} {:>8} {:>10.3f} {:>10.3f} {:>10.3f}'.format(stage, s['count'], s['total'], 1000*s['p50'], 1000*s['p99']))
+        return None
+
+    def write_json(self, path) -> None:
+        """Save the summary as json."""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=1), encoding='utf8')
+        return None
+
+
+def get_percentile(durations: list, q: float) -> float:
+    """Return the `q` percentile of sorted durations, by the nearest-rank method."""
+    if not durations:
+        return 0.0
+    rank = max(1, math.ceil(q * len(durations)))
+    return durations[rank - 1]
+
+
+def get_stats(durations: list) -> dict:
+    """Return the count, total, p50 and p99 of a list of durations."""
+    durations = sorted(durations)
+    return {'count': len(durations), 'total': sum(durations), 'p50': get_percentile(durations, 0.5), 'p99': get_percentile(durations, 0.99)}